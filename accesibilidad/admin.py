@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import InstitucionEducativa, EncuestaBarreras
+from .models import InstitucionEducativa, EncuestaBarreras, PuntajeInstitucion, ResumenRegional
 
 @admin.register(InstitucionEducativa)
 class InstitucionEducativaAdmin(admin.ModelAdmin):
@@ -13,7 +13,19 @@ class InstitucionEducativaAdmin(admin.ModelAdmin):
 
 @admin.register(EncuestaBarreras)
 class EncuestaBarrerasAdmin(admin.ModelAdmin):
-    list_display = ('institucion', 'fecha_encuesta', 'encuestador', 'fecha_registro')
+    list_display = ('institucion', 'fecha_encuesta', 'encuestador', 'puntaje_fisico', 'puntaje_tecnologico', 'puntaje_general', 'fecha_registro')
     list_filter = ('fecha_encuesta',)
     search_fields = ('institucion__nombre_institucion', 'encuestador')
-    date_hierarchy = 'fecha_encuesta'
\ No newline at end of file
+    date_hierarchy = 'fecha_encuesta'
+
+@admin.register(PuntajeInstitucion)
+class PuntajeInstitucionAdmin(admin.ModelAdmin):
+    list_display = ('institucion', 'total_encuestas', 'fecha_ultima_encuesta', 'ultimo_fisico', 'ultimo_tecnologico', 'ultimo_general', 'historico_general')
+    search_fields = ('institucion__nombre_institucion', 'institucion__codigo_amie')
+    readonly_fields = [f.name for f in PuntajeInstitucion._meta.fields]
+
+@admin.register(ResumenRegional)
+class ResumenRegionalAdmin(admin.ModelAdmin):
+    list_display = ('provincia', 'canton', 'tipo_institucion', 'instituciones', 'encuestas', 'fecha_actualizacion')
+    list_filter = ('tipo_institucion', 'provincia')
+    readonly_fields = [f.name for f in ResumenRegional._meta.fields]
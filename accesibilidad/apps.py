@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class AccesibilidadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accesibilidad'
\ No newline at end of file
+    name = 'accesibilidad'
+
+    def ready(self):
+        from . import signals  # noqa: F401
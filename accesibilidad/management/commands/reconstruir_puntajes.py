@@ -0,0 +1,12 @@
+# accesibilidad/management/commands/reconstruir_puntajes.py
+from django.core.management.base import BaseCommand
+
+from accesibilidad.puntajes import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los puntajes de accesibilidad de todas las instituciones desde sus encuestas'
+
+    def handle(self, *args, **options):
+        total = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'✅ Puntajes de {total} instituciones reconstruidos'))
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:22
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia fija de accesibilidad/puntajes.py al crear la tabla: la migración no
+# debe cambiar si después cambia ese módulo
+PREGUNTAS_FISICAS = ['p1_accesos', 'p2_pasillos', 'p3_rampas', 'p4_banos', 'p5_puertas', 'p6_senialetica', 'p7_iluminacion']
+PREGUNTAS_TECNOLOGICAS = ['p8_equipos', 'p9_internet', 'p10_software', 'p11_plataformas', 'p12_capacitacion',
+                          'p13_soporte', 'p14_recursos']
+PREGUNTAS = PREGUNTAS_FISICAS + PREGUNTAS_TECNOLOGICAS
+PUNTUACIONES = {'SIEMPRE': 100, 'CASI_SIEMPRE': 80, 'AVECES': 60, 'CASI_NUNCA': 40, 'NUNCA': 20, 'NO_APLICA': 0}
+
+
+def _decimal(valor):
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _promedio(valores):
+    valores = [v for v in valores if v > 0]
+    return sum(valores) / len(valores) if valores else None
+
+
+def _puntajes_encuesta(respuestas):
+    fisico = _promedio(PUNTUACIONES.get(respuestas[p], 0) for p in PREGUNTAS_FISICAS) or 0
+    tecnologico = _promedio(PUNTUACIONES.get(respuestas[p], 0) for p in PREGUNTAS_TECNOLOGICAS) or 0
+    return fisico, tecnologico, (fisico + tecnologico) / 2
+
+
+def _resumir(encuestas):
+    valores = {
+        'total_encuestas': len(encuestas),
+        'ultima_encuesta_id': None,
+        'fecha_ultima_encuesta': None,
+        'ultimo_fisico': None,
+        'ultimo_tecnologico': None,
+        'ultimo_general': None,
+        'historico_fisico': None,
+        'historico_tecnologico': None,
+        'historico_general': None,
+        'promedios_preguntas': {},
+    }
+    if not encuestas:
+        return valores
+
+    puntajes = [_puntajes_encuesta(encuesta) for encuesta in encuestas]
+    ultima = encuestas[0]
+    valores.update({
+        'ultima_encuesta_id': ultima['id'],
+        'fecha_ultima_encuesta': ultima['fecha_encuesta'],
+        'ultimo_fisico': _decimal(puntajes[0][0]),
+        'ultimo_tecnologico': _decimal(puntajes[0][1]),
+        'ultimo_general': _decimal(puntajes[0][2]),
+        'historico_fisico': _decimal(sum(p[0] for p in puntajes) / len(puntajes)),
+        'historico_tecnologico': _decimal(sum(p[1] for p in puntajes) / len(puntajes)),
+        'historico_general': _decimal(sum(p[2] for p in puntajes) / len(puntajes)),
+    })
+    for pregunta in PREGUNTAS:
+        promedio = _promedio(PUNTUACIONES.get(e[pregunta], 0) for e in encuestas)
+        valores['promedios_preguntas'][pregunta] = round(promedio, 2) if promedio is not None else None
+    return valores
+
+
+def cargar_puntajes(apps, schema_editor):
+    InstitucionEducativa = apps.get_model('accesibilidad', 'InstitucionEducativa')
+    EncuestaBarreras = apps.get_model('accesibilidad', 'EncuestaBarreras')
+    PuntajeInstitucion = apps.get_model('accesibilidad', 'PuntajeInstitucion')
+    db = schema_editor.connection.alias
+
+    encuestas = {}
+    filas = EncuestaBarreras.objects.using(db).order_by('-fecha_encuesta', '-id').values(
+        'id', 'institucion_id', 'fecha_encuesta', *PREGUNTAS
+    )
+    for fila in filas.iterator(chunk_size=2000):
+        encuestas.setdefault(fila['institucion_id'], []).append(fila)
+
+    PuntajeInstitucion.objects.using(db).bulk_create([
+        PuntajeInstitucion(institucion_id=institucion_id, **_resumir(encuestas.get(institucion_id, [])))
+        for institucion_id in InstitucionEducativa.objects.using(db).values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accesibilidad', '0002_alter_encuestabarreras_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntajeInstitucion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_encuestas', models.IntegerField(default=0, verbose_name='Encuestas')),
+                ('fecha_ultima_encuesta', models.DateField(blank=True, null=True, verbose_name='Fecha de la Última Encuesta')),
+                ('ultimo_fisico', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje Físico (última)')),
+                ('ultimo_tecnologico', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje Tecnológico (última)')),
+                ('ultimo_general', models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje General (última)')),
+                ('historico_fisico', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje Físico (histórico)')),
+                ('historico_tecnologico', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje Tecnológico (histórico)')),
+                ('historico_general', models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=5, null=True, verbose_name='Puntaje General (histórico)')),
+                ('promedios_preguntas', models.JSONField(default=dict, verbose_name='Promedio por Pregunta')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('institucion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='puntaje', to='accesibilidad.institucioneducativa', verbose_name='Institución')),
+                ('ultima_encuesta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accesibilidad.encuestabarreras', verbose_name='Última Encuesta')),
+            ],
+            options={
+                'verbose_name': 'Puntaje de Institución',
+                'verbose_name_plural': 'Puntajes de Instituciones',
+                'ordering': ['-ultimo_general'],
+            },
+        ),
+        migrations.RunPython(cargar_puntajes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:24
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+# Copia fija de accesibilidad/puntajes.py al agregar los campos: la migración no
+# debe cambiar si después cambia ese módulo
+PREGUNTAS_FISICAS = ['p1_accesos', 'p2_pasillos', 'p3_rampas', 'p4_banos', 'p5_puertas', 'p6_senialetica', 'p7_iluminacion']
+PREGUNTAS_TECNOLOGICAS = ['p8_equipos', 'p9_internet', 'p10_software', 'p11_plataformas', 'p12_capacitacion',
+                          'p13_soporte', 'p14_recursos']
+PUNTUACIONES = {'SIEMPRE': 100, 'CASI_SIEMPRE': 80, 'AVECES': 60, 'CASI_NUNCA': 40, 'NUNCA': 20, 'NO_APLICA': 0}
+
+
+def _promedio(valores):
+    valores = [v for v in valores if v > 0]
+    return sum(valores) / len(valores) if valores else None
+
+
+def _puntajes_encuesta(respuestas):
+    fisico = _promedio(PUNTUACIONES.get(respuestas[p], 0) for p in PREGUNTAS_FISICAS) or 0
+    tecnologico = _promedio(PUNTUACIONES.get(respuestas[p], 0) for p in PREGUNTAS_TECNOLOGICAS) or 0
+    return fisico, tecnologico, (fisico + tecnologico) / 2
+
+
+def calcular_puntajes(apps, schema_editor):
+    EncuestaBarreras = apps.get_model('accesibilidad', 'EncuestaBarreras')
+    db = schema_editor.connection.alias
+    campos = ['puntaje_fisico', 'puntaje_tecnologico', 'puntaje_general']
+    preguntas = PREGUNTAS_FISICAS + PREGUNTAS_TECNOLOGICAS
+
+    pendientes = []
+    for encuesta in EncuestaBarreras.objects.using(db).only('id', *preguntas).iterator(chunk_size=2000):
+        puntajes = _puntajes_encuesta({p: getattr(encuesta, p) for p in preguntas})
+        for campo, valor in zip(campos, puntajes):
+            setattr(encuesta, campo, Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+        pendientes.append(encuesta)
+        if len(pendientes) >= 2000:
+            EncuestaBarreras.objects.using(db).bulk_update(pendientes, campos)
+            pendientes = []
+    if pendientes:
+        EncuestaBarreras.objects.using(db).bulk_update(pendientes, campos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accesibilidad', '0003_puntajeinstitucion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encuestabarreras',
+            name='puntaje_fisico',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=5, verbose_name='Puntaje Físico'),
+        ),
+        migrations.AddField(
+            model_name='encuestabarreras',
+            name='puntaje_general',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=5, verbose_name='Puntaje General'),
+        ),
+        migrations.AddField(
+            model_name='encuestabarreras',
+            name='puntaje_tecnologico',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=5, verbose_name='Puntaje Tecnológico'),
+        ),
+        migrations.RunPython(calcular_puntajes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:26
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def cargar_resumen(apps, schema_editor):
+    PuntajeInstitucion = apps.get_model('accesibilidad', 'PuntajeInstitucion')
+    ResumenRegional = apps.get_model('accesibilidad', 'ResumenRegional')
+    db = schema_editor.connection.alias
+
+    filas = PuntajeInstitucion.objects.using(db).filter(ultimo_general__isnull=False).values(
+        'institucion__provincia', 'institucion__canton', 'institucion__tipo_institucion',
+    ).annotate(
+        instituciones=Count('id'),
+        encuestas=Sum('total_encuestas'),
+        suma_fisico=Sum('ultimo_fisico'),
+        suma_tecnologico=Sum('ultimo_tecnologico'),
+        suma_general=Sum('ultimo_general'),
+    ).order_by()
+    ResumenRegional.objects.using(db).bulk_create([
+        ResumenRegional(
+            provincia=fila['institucion__provincia'],
+            canton=fila['institucion__canton'],
+            tipo_institucion=fila['institucion__tipo_institucion'],
+            instituciones=fila['instituciones'],
+            encuestas=fila['encuestas'] or 0,
+            suma_fisico=fila['suma_fisico'] or 0,
+            suma_tecnologico=fila['suma_tecnologico'] or 0,
+            suma_general=fila['suma_general'] or 0,
+        )
+        for fila in filas
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accesibilidad', '0004_encuestabarreras_puntajes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenRegional',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provincia', models.CharField(max_length=50, verbose_name='Provincia')),
+                ('canton', models.CharField(max_length=50, verbose_name='Cantón')),
+                ('tipo_institucion', models.CharField(choices=[('PUBLICA', 'Pública'), ('PRIVADA', 'Privada'), ('FISCOMISIONAL', 'Fiscomisional'), ('MUNICIPAL', 'Municipal')], max_length=20, verbose_name='Tipo de Institución')),
+                ('instituciones', models.IntegerField(default=0, verbose_name='Instituciones evaluadas')),
+                ('encuestas', models.IntegerField(default=0, verbose_name='Encuestas')),
+                ('suma_fisico', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Suma Puntaje Físico')),
+                ('suma_tecnologico', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Suma Puntaje Tecnológico')),
+                ('suma_general', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Suma Puntaje General')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen Regional',
+                'verbose_name_plural': 'Resúmenes Regionales',
+                'ordering': ['provincia', 'canton', 'tipo_institucion'],
+                'unique_together': {('provincia', 'canton', 'tipo_institucion')},
+            },
+        ),
+        migrations.RunPython(cargar_resumen, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
 
 class InstitucionEducativa(models.Model):
@@ -41,6 +43,12 @@ class EncuestaBarreras(models.Model):
         puntaje_tecnologicas = self.calcular_puntaje_tecnologicas()
         return (puntaje_fisicas + puntaje_tecnologicas) / 2
     
+    PREGUNTAS_FISICAS = ['p1_accesos', 'p2_pasillos', 'p3_rampas', 'p4_banos',
+                         'p5_puertas', 'p6_senialetica', 'p7_iluminacion']
+    PREGUNTAS_TECNOLOGICAS = ['p8_equipos', 'p9_internet', 'p10_software', 'p11_plataformas',
+                              'p12_capacitacion', 'p13_soporte', 'p14_recursos']
+    PREGUNTAS = PREGUNTAS_FISICAS + PREGUNTAS_TECNOLOGICAS
+    
     # Puntuaciones en porcentaje (sobre 100)
     PUNTUACIONES = {
         'SIEMPRE': {'valor': 100, 'texto': 'Excelente', 'clase': 'bg-success'},
@@ -77,6 +85,14 @@ class EncuestaBarreras(models.Model):
     observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
     recomendaciones = models.TextField(blank=True, null=True, verbose_name="Recomendaciones")
     
+    # Puntajes calculados al guardar (ver save), indexados para filtrar y ordenar
+    puntaje_fisico = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False, 
+                                         db_index=True, verbose_name="Puntaje Físico")
+    puntaje_tecnologico = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False, 
+                                              db_index=True, verbose_name="Puntaje Tecnológico")
+    puntaje_general = models.DecimalField(max_digits=5, decimal_places=2, default=0, editable=False, 
+                                          db_index=True, verbose_name="Puntaje General")
+    
     fecha_registro = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -91,16 +107,8 @@ class EncuestaBarreras(models.Model):
         return {'valor': 0, 'texto': 'Sin calificar', 'clase': 'bg-light text-dark'}
     
     def get_puntuacion(self, respuesta):
-        """Convierte respuesta textual a puntuación numérica"""
-        puntuaciones = {
-            'SIEMPRE': 100,
-            'CASI_SIEMPRE': 80,
-            'AVECES': 60,
-            'CASI_NUNCA': 40,
-            'NUNCA': 20,
-            'NO_APLICA': 0,
-        }
-        return puntuaciones.get(respuesta, 0)
+        """Convierte respuesta textual a puntuación numérica (PUNTUACIONES)"""
+        return self.get_info_puntuacion(respuesta)['valor']
     
     def get_promedio_fisico_calculado(self):
         """Calcula promedio de accesibilidad física"""
@@ -150,5 +158,95 @@ class EncuestaBarreras(models.Model):
         # Promedio de ambos grupos
         return (fisico + tecnologico) / 2
     
+    def calcular_puntajes(self):
+        """Actualiza los puntajes almacenados a partir de las respuestas"""
+        def redondear(valor):
+            return Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        
+        self.puntaje_fisico = redondear(self.get_promedio_fisico_calculado())
+        self.puntaje_tecnologico = redondear(self.get_promedio_tecnologico_calculado())
+        self.puntaje_general = redondear(self.get_promedio_general_calculado())
+    
+    def save(self, *args, **kwargs):
+        """Sobreescribir save para calcular los puntajes automáticamente"""
+        self.calcular_puntajes()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'puntaje_fisico', 'puntaje_tecnologico', 'puntaje_general'}
+        super().save(*args, **kwargs)
+    
     def __str__(self):
-        return f"Encuesta {self.institucion} - {self.fecha_encuesta}"
\ No newline at end of file
+        return f"Encuesta {self.institucion} - {self.fecha_encuesta}"
+
+class PuntajeInstitucion(models.Model):
+    """Resumen de puntajes de accesibilidad de una institución.
+    
+    Lo mantienen las señales de EncuestaBarreras (ver puntajes.py) para que
+    listados y rankings ordenen por puntaje sin leer las encuestas.
+    """
+    institucion = models.OneToOneField(InstitucionEducativa, on_delete=models.CASCADE, 
+                                       related_name='puntaje', verbose_name="Institución")
+    total_encuestas = models.IntegerField(default=0, verbose_name="Encuestas")
+    
+    # Última encuesta (por fecha de encuesta)
+    ultima_encuesta = models.ForeignKey(EncuestaBarreras, on_delete=models.SET_NULL, null=True, blank=True, 
+                                        related_name='+', verbose_name="Última Encuesta")
+    fecha_ultima_encuesta = models.DateField(null=True, blank=True, verbose_name="Fecha de la Última Encuesta")
+    ultimo_fisico = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, 
+                                        verbose_name="Puntaje Físico (última)")
+    ultimo_tecnologico = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, 
+                                             verbose_name="Puntaje Tecnológico (última)")
+    ultimo_general = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, db_index=True, 
+                                         verbose_name="Puntaje General (última)")
+    
+    # Promedio de todas las encuestas de la institución
+    historico_fisico = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, 
+                                           verbose_name="Puntaje Físico (histórico)")
+    historico_tecnologico = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, 
+                                                verbose_name="Puntaje Tecnológico (histórico)")
+    historico_general = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, db_index=True, 
+                                            verbose_name="Puntaje General (histórico)")
+    
+    # {"p1_accesos": 73.33, ...}; None cuando todas las respuestas son NO_APLICA
+    promedios_preguntas = models.JSONField(default=dict, verbose_name="Promedio por Pregunta")
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Puntaje de Institución"
+        verbose_name_plural = "Puntajes de Instituciones"
+        ordering = ['-ultimo_general']
+    
+    def __str__(self):
+        return f"{self.institucion} - {self.ultimo_general}"
+
+class ResumenRegional(models.Model):
+    """Celda del cubo de accesibilidad por provincia, cantón y tipo de institución.
+    
+    Suma los puntajes de la última encuesta (PuntajeInstitucion) de las
+    instituciones de la celda; los niveles superiores (provincia, país) se
+    obtienen sumando celdas. Lo mantiene regiones.py desde las señales.
+    """
+    provincia = models.CharField(max_length=50, verbose_name="Provincia")
+    canton = models.CharField(max_length=50, verbose_name="Cantón")
+    tipo_institucion = models.CharField(max_length=20, choices=InstitucionEducativa.TIPO_CHOICES, 
+                                        verbose_name="Tipo de Institución")
+    
+    instituciones = models.IntegerField(default=0, verbose_name="Instituciones evaluadas")
+    encuestas = models.IntegerField(default=0, verbose_name="Encuestas")
+    suma_fisico = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Suma Puntaje Físico")
+    suma_tecnologico = models.DecimalField(max_digits=12, decimal_places=2, default=0, 
+                                           verbose_name="Suma Puntaje Tecnológico")
+    suma_general = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Suma Puntaje General")
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Resumen Regional"
+        verbose_name_plural = "Resúmenes Regionales"
+        ordering = ['provincia', 'canton', 'tipo_institucion']
+        unique_together = ['provincia', 'canton', 'tipo_institucion']
+    
+    def __str__(self):
+        return f"{self.provincia} / {self.canton} / {self.get_tipo_institucion_display()}"
+
@@ -0,0 +1,173 @@
+# accesibilidad/puntajes.py
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+
+from .models import InstitucionEducativa, EncuestaBarreras, PuntajeInstitucion
+from .ranking import invalidar_ranking
+from . import regiones
+
+# Respuesta -> puntaje, tomado del modelo; los puntajes de cada encuesta los calcula
+# EncuestaBarreras.save() y aquí se leen de sus campos puntaje_*
+PUNTUACIONES = {respuesta: info['valor'] for respuesta, info in EncuestaBarreras.PUNTUACIONES.items()}
+PUNTAJES_ENCUESTA = ['puntaje_fisico', 'puntaje_tecnologico', 'puntaje_general']
+
+
+def _decimal(valor):
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _promedio(valores):
+    """Promedio de puntuaciones excluyendo NO_APLICA (0); None si no queda ninguna"""
+    valores = [v for v in valores if v > 0]
+    return sum(valores) / len(valores) if valores else None
+
+
+def resumir(encuestas):
+    """Valores del resumen a partir de las encuestas de una institución, la más reciente primero.
+
+    Cada encuesta es un dict con id, fecha_encuesta, sus puntajes guardados
+    (PUNTAJES_ENCUESTA) y las 14 preguntas.
+    """
+    valores = {
+        'total_encuestas': len(encuestas),
+        'ultima_encuesta_id': None,
+        'fecha_ultima_encuesta': None,
+        'ultimo_fisico': None,
+        'ultimo_tecnologico': None,
+        'ultimo_general': None,
+        'historico_fisico': None,
+        'historico_tecnologico': None,
+        'historico_general': None,
+        'promedios_preguntas': {},
+    }
+    if not encuestas:
+        return valores
+
+    puntajes = [[encuesta[campo] for campo in PUNTAJES_ENCUESTA] for encuesta in encuestas]
+    ultima = encuestas[0]
+    valores.update({
+        'ultima_encuesta_id': ultima['id'],
+        'fecha_ultima_encuesta': ultima['fecha_encuesta'],
+        'ultimo_fisico': _decimal(puntajes[0][0]),
+        'ultimo_tecnologico': _decimal(puntajes[0][1]),
+        'ultimo_general': _decimal(puntajes[0][2]),
+        'historico_fisico': _decimal(sum(p[0] for p in puntajes) / len(puntajes)),
+        'historico_tecnologico': _decimal(sum(p[1] for p in puntajes) / len(puntajes)),
+        'historico_general': _decimal(sum(p[2] for p in puntajes) / len(puntajes)),
+    })
+    for pregunta in EncuestaBarreras.PREGUNTAS:
+        promedio = _promedio(PUNTUACIONES.get(e[pregunta], 0) for e in encuestas)
+        valores['promedios_preguntas'][pregunta] = round(promedio, 2) if promedio is not None else None
+    return valores
+
+
+def calcular(institucion_id):
+    """Valores del resumen de una institución (una consulta)"""
+    encuestas = EncuestaBarreras.objects.filter(institucion_id=institucion_id).order_by(
+        '-fecha_encuesta', '-id'
+    ).values('id', 'fecha_encuesta', *PUNTAJES_ENCUESTA, *EncuestaBarreras.PREGUNTAS)
+    return resumir(list(encuestas))
+
+
+def _guardar(institucion_id):
+    if not InstitucionEducativa.objects.filter(pk=institucion_id).exists():
+        return None
+    puntaje, _ = PuntajeInstitucion.objects.update_or_create(
+        institucion_id=institucion_id, defaults=calcular(institucion_id),
+    )
+    return puntaje
+
+
+def recalcular(institucion_id):
+    """Actualiza la fila de resumen de una institución y su celda regional (llamado desde signals.py)"""
+    with transaction.atomic():
+        puntaje = _guardar(institucion_id)
+        if puntaje is not None:
+            regiones.recalcular_institucion(institucion_id)
+    invalidar_ranking(*InstitucionEducativa.objects.filter(pk=institucion_id).values_list('provincia', flat=True))
+    return puntaje
+
+
+def reconstruir():
+    """Recalcula el resumen de todas las instituciones y el cubo regional (comando reconstruir_puntajes)"""
+    ids = list(InstitucionEducativa.objects.values_list('id', flat=True))
+    for institucion_id in ids:
+        _guardar(institucion_id)
+    regiones.reconstruir()
+    invalidar_ranking(*InstitucionEducativa.objects.values_list('provincia', flat=True).distinct())
+    return len(ids)
+
+
+# ========== AGREGADOS EN SQL ==========
+
+def puntaje_sql(pregunta, prefijo=''):
+    """Expresión Case/When que convierte la respuesta de una pregunta en puntaje dentro de la base.
+
+    NO_APLICA (y cualquier valor desconocido) queda en NULL, así Avg/Count lo excluyen.
+    El prefijo permite usarla desde otra tabla, p. ej. 'encuestabarreras__'.
+    """
+    return Case(
+        *[When(**{f'{prefijo}{pregunta}': respuesta}, then=Value(valor))
+          for respuesta, valor in PUNTUACIONES.items() if valor > 0],
+        default=Value(None),
+        output_field=IntegerField(),
+    )
+
+
+def agregados(prefijo=''):
+    """Expresiones de aggregate()/annotate(): encuestas, y suma y respuestas válidas por pregunta"""
+    expresiones = {'total_encuestas': Count(f'{prefijo}id')}
+    for pregunta in EncuestaBarreras.PREGUNTAS:
+        expresiones[f'{pregunta}_suma'] = Sum(puntaje_sql(pregunta, prefijo))
+        expresiones[f'{pregunta}_respuestas'] = Count(puntaje_sql(pregunta, prefijo))
+    return expresiones
+
+
+def armar_resultados(fila):
+    """Promedios por pregunta, por categoría y general a partir de la fila de agregados().
+
+    Por categoría se promedian todas las respuestas válidas de sus preguntas;
+    el general es la media de ambas categorías, como get_promedio_general_calculado.
+    """
+    preguntas = []
+    categorias = {}
+    promedios = {}
+    for categoria, campos in (('fisico', EncuestaBarreras.PREGUNTAS_FISICAS),
+                              ('tecnologico', EncuestaBarreras.PREGUNTAS_TECNOLOGICAS)):
+        suma = respuestas = 0
+        for campo in campos:
+            suma_pregunta = fila[f'{campo}_suma'] or 0
+            respuestas_pregunta = fila[f'{campo}_respuestas']
+            preguntas.append({
+                'numero': EncuestaBarreras.PREGUNTAS.index(campo) + 1,
+                'campo': campo,
+                'texto': EncuestaBarreras._meta.get_field(campo).verbose_name,
+                'categoria': categoria,
+                'promedio': round(suma_pregunta / respuestas_pregunta, 2) if respuestas_pregunta else 0,
+                'respuestas': respuestas_pregunta,
+            })
+            suma += suma_pregunta
+            respuestas += respuestas_pregunta
+        promedios[categoria] = suma / respuestas if respuestas else 0
+        categorias[categoria] = {
+            'promedio': round(promedios[categoria], 2),
+            'respuestas': respuestas,
+        }
+
+    return {
+        'total_encuestas': fila['total_encuestas'],
+        'preguntas': preguntas,
+        'categorias': categorias,
+        # Con los promedios sin redondear: redondear dos veces puede perder una centésima
+        'promedio_general': round((promedios['fisico'] + promedios['tecnologico']) / 2, 2),
+        'respuestas': categorias['fisico']['respuestas'] + categorias['tecnologico']['respuestas'],
+    }
+
+
+def resultados(encuestas):
+    """Resultados de un queryset de encuestas en una sola consulta de agregación"""
+    return armar_resultados(encuestas.order_by().aggregate(**agregados()))
@@ -0,0 +1,129 @@
+# accesibilidad/ranking.py
+from django.db.models import F, Window
+from django.db.models.functions import FirstValue, PercentRank, Rank
+
+from gesinfra_sistema.cache import cachear, incrementar_version
+
+from .models import PuntajeInstitucion
+
+SEGUNDOS_CACHE_RANKING = 60 * 60
+
+# Percentil (0 = mejor, 1 = peor) desde el que una institución está en el decil inferior
+PERCENTIL_DECIL_INFERIOR = 0.9
+
+
+def _ventana(funcion, *particion):
+    return Window(
+        expression=funcion(),
+        partition_by=[F(f'institucion__{campo}') for campo in particion] or None,
+        order_by=F('ultimo_general').desc(),
+    )
+
+
+def consulta_ranking(provincia='', canton=''):
+    """Puntaje de la última encuesta de cada institución con su posición en el país,
+    su provincia y su cantón, calculadas por la base con RANK y PERCENT_RANK.
+
+    Las ventanas se evalúan después del WHERE: al filtrar por provincia las
+    particiones por provincia y cantón no cambian, pero la posición nacional
+    dejaría de serlo, por eso en ese caso no se calcula. El cantón se filtra
+    sobre una ventana, que Django aplica después de calcularlas (QUALIFY o
+    subconsulta): rank_provincia sigue refiriéndose a toda la provincia.
+    """
+    consulta = PuntajeInstitucion.objects.filter(ultimo_general__isnull=False)
+    ventanas = {
+        'rank_provincia': _ventana(Rank, 'provincia'),
+        'percentil_provincia': _ventana(PercentRank, 'provincia'),
+        'rank_canton': _ventana(Rank, 'provincia', 'canton'),
+        'percentil_canton': _ventana(PercentRank, 'provincia', 'canton'),
+    }
+    if provincia:
+        consulta = consulta.filter(institucion__provincia=provincia)
+    else:
+        ventanas['rank_nacional'] = _ventana(Rank)
+        ventanas['percentil_nacional'] = _ventana(PercentRank)
+    if canton:
+        ventanas['canton_ventana'] = Window(
+            expression=FirstValue('institucion__canton'),
+            partition_by=[F('institucion__provincia'), F('institucion__canton')],
+        )
+
+    consulta = consulta.annotate(**ventanas)
+    if canton:
+        consulta = consulta.filter(canton_ventana=canton)
+    return consulta.values(
+        'institucion_id', 'institucion__nombre_institucion', 'institucion__codigo_amie',
+        'institucion__provincia', 'institucion__canton', 'institucion__tipo_institucion',
+        'ultimo_fisico', 'ultimo_tecnologico', 'ultimo_general', 'fecha_ultima_encuesta',
+        *ventanas,
+    )
+
+
+def _percentil(valor):
+    return round(valor, 4) if valor is not None else None
+
+
+def _fila(valores):
+    return {
+        'institucion_id': valores['institucion_id'],
+        'nombre_institucion': valores['institucion__nombre_institucion'],
+        'codigo_amie': valores['institucion__codigo_amie'],
+        'provincia': valores['institucion__provincia'],
+        'canton': valores['institucion__canton'],
+        'tipo_institucion': valores['institucion__tipo_institucion'],
+        'puntaje_fisico': float(valores['ultimo_fisico']),
+        'puntaje_tecnologico': float(valores['ultimo_tecnologico']),
+        'puntaje_general': float(valores['ultimo_general']),
+        'fecha_ultima_encuesta': valores['fecha_ultima_encuesta'].isoformat(),
+        'rank_nacional': valores.get('rank_nacional'),
+        'percentil_nacional': _percentil(valores.get('percentil_nacional')),
+        'rank_provincia': valores['rank_provincia'],
+        'percentil_provincia': _percentil(valores['percentil_provincia']),
+        'rank_canton': valores['rank_canton'],
+        'percentil_canton': _percentil(valores['percentil_canton']),
+    }
+
+
+def _version_provincia(provincia):
+    return f'puntajes.{provincia}'
+
+
+def _cacheado(calcular, provincia, *partes):
+    # El ranking de una provincia solo depende de sus instituciones; el nacional, de todas
+    dependencias = [_version_provincia(provincia)] if provincia else ['puntajes']
+    return cachear('accesibilidad:ranking', dependencias, calcular, provincia, *partes,
+                   timeout=SEGUNDOS_CACHE_RANKING)
+
+
+def ranking_region(provincia='', canton=''):
+    """Ranking de una provincia (o de un cantón dentro de ella); sin provincia, el nacional.
+
+    El orden y las posiciones vienen de la base; para un cantón, rank_provincia
+    sigue refiriéndose a toda la provincia (ver consulta_ranking).
+    """
+    def calcular():
+        if provincia:
+            consulta = consulta_ranking(provincia, canton).order_by('rank_provincia', 'institucion_id')
+        else:
+            consulta = consulta_ranking(canton=canton).order_by('rank_nacional', 'institucion_id')
+        return [_fila(valores) for valores in consulta]
+
+    return _cacheado(calcular, provincia, canton)
+
+
+def decil_inferior():
+    """Instituciones en el 10 % con peor puntaje a nivel nacional, de peor a mejor"""
+    def calcular():
+        consulta = consulta_ranking().filter(
+            percentil_nacional__gte=PERCENTIL_DECIL_INFERIOR
+        ).order_by('-rank_nacional', 'institucion_id')
+        return [_fila(valores) for valores in consulta]
+
+    return _cacheado(calcular, '', 'decil_inferior')
+
+
+def invalidar_ranking(*provincias):
+    """Invalida el ranking nacional y el de las provincias dadas; los de las demás siguen en el cache"""
+    incrementar_version('puntajes')
+    for provincia in set(provincias):
+        incrementar_version(_version_provincia(provincia))
@@ -0,0 +1,143 @@
+# accesibilidad/regiones.py
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import InstitucionEducativa, PuntajeInstitucion, ResumenRegional
+
+DIMENSIONES = ['provincia', 'canton', 'tipo_institucion']
+
+SUMAS = ['instituciones', 'encuestas', 'suma_fisico', 'suma_tecnologico', 'suma_general']
+
+
+def _agregados_puntajes():
+    return {
+        'instituciones': Count('id'),
+        'encuestas': Sum('total_encuestas'),
+        'suma_fisico': Sum('ultimo_fisico'),
+        'suma_tecnologico': Sum('ultimo_tecnologico'),
+        'suma_general': Sum('ultimo_general'),
+    }
+
+
+def recalcular_celda(provincia, canton, tipo_institucion):
+    """Vuelve a sumar una sola celda a partir de los puntajes de sus instituciones"""
+    with transaction.atomic():
+        fila = PuntajeInstitucion.objects.filter(
+            ultimo_general__isnull=False,
+            institucion__provincia=provincia,
+            institucion__canton=canton,
+            institucion__tipo_institucion=tipo_institucion,
+        ).aggregate(**_agregados_puntajes())
+
+        celda = {'provincia': provincia, 'canton': canton, 'tipo_institucion': tipo_institucion}
+        if not fila['instituciones']:
+            ResumenRegional.objects.filter(**celda).delete()
+            return None
+        resumen, _ = ResumenRegional.objects.update_or_create(
+            **celda, defaults={campo: fila[campo] or 0 for campo in SUMAS},
+        )
+    return resumen
+
+
+def recalcular_institucion(institucion_id):
+    """Recalcula la celda en la que está la institución (tras cambiar su puntaje)"""
+    region = InstitucionEducativa.objects.filter(pk=institucion_id).values_list(*DIMENSIONES).first()
+    if region is not None:
+        recalcular_celda(*region)
+
+
+def reconstruir():
+    """Regenera todo el cubo con un GROUP BY (comando reconstruir_puntajes)"""
+    filas = PuntajeInstitucion.objects.filter(ultimo_general__isnull=False).values(
+        *[f'institucion__{d}' for d in DIMENSIONES]
+    ).annotate(**_agregados_puntajes()).order_by()
+
+    with transaction.atomic():
+        ResumenRegional.objects.all().delete()
+        ResumenRegional.objects.bulk_create([
+            ResumenRegional(
+                **{d: fila[f'institucion__{d}'] for d in DIMENSIONES},
+                **{campo: fila[campo] or 0 for campo in SUMAS},
+            )
+            for fila in filas
+        ], batch_size=500)
+    return len(filas)
+
+
+# ========== CONSULTAS ==========
+
+def _promedios(fila):
+    instituciones = fila['instituciones']
+    return {
+        'instituciones': instituciones,
+        'encuestas': fila['encuestas'],
+        'promedio_fisico': round(float(fila['suma_fisico']) / instituciones, 2),
+        'promedio_tecnologico': round(float(fila['suma_tecnologico']) / instituciones, 2),
+        'promedio_general': round(float(fila['suma_general']) / instituciones, 2),
+    }
+
+
+def _sumar_celdas(celdas, *agrupar):
+    sumas = {campo: Sum(campo) for campo in SUMAS}
+    if agrupar:
+        filas = celdas.values(*agrupar).annotate(**sumas).order_by(*agrupar)
+        return [dict({d: fila[d] for d in agrupar}, **_promedios(fila)) for fila in filas]
+    fila = celdas.aggregate(**sumas)
+    return _promedios(fila) if fila['instituciones'] else None
+
+
+def cubo(provincia='', canton='', tipo_institucion=''):
+    """Un nivel del cubo con su desglose: país -> provincias -> cantones -> instituciones.
+
+    Devuelve el total del nivel, el desglose por tipo de institución y las filas
+    del siguiente nivel. Salvo las instituciones, todo se lee de ResumenRegional.
+    """
+    celdas = ResumenRegional.objects.all()
+    if tipo_institucion:
+        celdas = celdas.filter(tipo_institucion=tipo_institucion)
+    if provincia:
+        celdas = celdas.filter(provincia=provincia)
+    if canton:
+        celdas = celdas.filter(canton=canton)
+
+    resultado = {
+        'provincia': provincia or None,
+        'canton': canton or None,
+        'tipo_institucion': tipo_institucion or None,
+        'total': _sumar_celdas(celdas),
+        'por_tipo': _sumar_celdas(celdas, 'tipo_institucion'),
+    }
+
+    if not provincia:
+        resultado['nivel'] = 'provincia'
+        resultado['filas'] = _sumar_celdas(celdas, 'provincia')
+    elif not canton:
+        resultado['nivel'] = 'canton'
+        resultado['filas'] = _sumar_celdas(celdas, 'canton')
+    else:
+        resultado['nivel'] = 'institucion'
+        instituciones = PuntajeInstitucion.objects.filter(
+            ultimo_general__isnull=False,
+            institucion__provincia=provincia,
+            institucion__canton=canton,
+        )
+        if tipo_institucion:
+            instituciones = instituciones.filter(institucion__tipo_institucion=tipo_institucion)
+        resultado['filas'] = [
+            {
+                'institucion_id': fila['institucion_id'],
+                'nombre_institucion': fila['institucion__nombre_institucion'],
+                'codigo_amie': fila['institucion__codigo_amie'],
+                'tipo_institucion': fila['institucion__tipo_institucion'],
+                'encuestas': fila['total_encuestas'],
+                'promedio_fisico': float(fila['ultimo_fisico']),
+                'promedio_tecnologico': float(fila['ultimo_tecnologico']),
+                'promedio_general': float(fila['ultimo_general']),
+            }
+            for fila in instituciones.order_by('-ultimo_general').values(
+                'institucion_id', 'institucion__nombre_institucion', 'institucion__codigo_amie',
+                'institucion__tipo_institucion', 'total_encuestas',
+                'ultimo_fisico', 'ultimo_tecnologico', 'ultimo_general',
+            )
+        ]
+    return resultado
@@ -0,0 +1,69 @@
+# accesibilidad/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from gesinfra_sistema.cache import incrementar_al_confirmar
+
+from .models import InstitucionEducativa, EncuestaBarreras
+from .ranking import invalidar_ranking
+from . import puntajes, regiones
+
+
+def _recalcular_al_confirmar(*institucion_ids):
+    # Tras el commit: si la institución se está eliminando en cascada, ya no existe
+    for institucion_id in set(filter(None, institucion_ids)):
+        transaction.on_commit(lambda i=institucion_id: puntajes.recalcular(i))
+
+
+@receiver(pre_save, sender=EncuestaBarreras)
+def encuesta_por_guardar(sender, instance, raw=False, **kwargs):
+    # Si la encuesta cambia de institución también hay que recalcular la anterior
+    instance._institucion_anterior = None
+    if instance.pk and not raw:
+        instance._institucion_anterior = EncuestaBarreras.objects.filter(
+            pk=instance.pk
+        ).values_list('institucion_id', flat=True).first()
+
+
+@receiver(post_save, sender=EncuestaBarreras)
+def encuesta_guardada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    incrementar_al_confirmar('encuestas')
+    _recalcular_al_confirmar(instance.institucion_id, getattr(instance, '_institucion_anterior', None))
+
+
+@receiver(post_delete, sender=EncuestaBarreras)
+def encuesta_eliminada(sender, instance, **kwargs):
+    incrementar_al_confirmar('encuestas')
+    _recalcular_al_confirmar(instance.institucion_id)
+
+
+@receiver(pre_save, sender=InstitucionEducativa)
+def institucion_por_guardar(sender, instance, raw=False, **kwargs):
+    # Celda regional anterior, por si cambia la provincia, el cantón o el tipo
+    instance._region_anterior = None
+    if instance.pk and not raw:
+        instance._region_anterior = InstitucionEducativa.objects.filter(
+            pk=instance.pk
+        ).values_list(*regiones.DIMENSIONES).first()
+
+
+@receiver(post_save, sender=InstitucionEducativa)
+@receiver(post_delete, sender=InstitucionEducativa)
+def institucion_modificada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Cambios de provincia/cantón/tipo o bajas mueven la institución de celda y de ranking
+    celdas = {tuple(getattr(instance, d) for d in regiones.DIMENSIONES)}
+    if getattr(instance, '_region_anterior', None):
+        celdas.add(instance._region_anterior)
+
+    def actualizar():
+        for celda in celdas:
+            regiones.recalcular_celda(*celda)
+        # Solo las provincias de la institución, antes y después del cambio
+        invalidar_ranking(*(provincia for provincia, *_ in celdas))
+    transaction.on_commit(actualizar)
+    incrementar_al_confirmar('instituciones')
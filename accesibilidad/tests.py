@@ -1,3 +1,321 @@
+# accesibilidad/tests.py
+import datetime
+import importlib
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Sum
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import InstitucionEducativa, EncuestaBarreras, PuntajeInstitucion, ResumenRegional
+from .puntajes import PUNTUACIONES, recalcular
+from .ranking import decil_inferior, ranking_region
+from .regiones import cubo, reconstruir
+
+
+def respuestas(fisicas='NO_APLICA', tecnologicas='NO_APLICA', **otras):
+    """Las 14 respuestas de una encuesta: la misma en cada grupo salvo las indicadas"""
+    datos = {pregunta: fisicas for pregunta in EncuestaBarreras.PREGUNTAS_FISICAS}
+    datos.update({pregunta: tecnologicas for pregunta in EncuestaBarreras.PREGUNTAS_TECNOLOGICAS})
+    datos.update(otras)
+    return datos
+
+
+class Instituciones:
+    """Crea instituciones y encuestas ejecutando los on_commit de las señales (puntajes, regiones)"""
+
+    def setUp(self):
+        # Las versiones del cache no vuelven atrás con el rollback de cada prueba
+        cache.clear()
+
+    @classmethod
+    def institucion(cls, amie, provincia='PICHINCHA', canton='QUITO', tipo='PUBLICA'):
+        with cls.captureOnCommitCallbacks(execute=True):
+            return InstitucionEducativa.objects.create(
+                nombre_institucion=f'Escuela {amie}', codigo_amie=amie, provincia=provincia,
+                canton=canton, direccion='Av. Principal', tipo_institucion=tipo,
+            )
+
+    @classmethod
+    def encuesta(cls, institucion, fecha=datetime.date(2025, 3, 1), **datos):
+        with cls.captureOnCommitCallbacks(execute=True):
+            return EncuestaBarreras.objects.create(institucion=institucion, fecha_encuesta=fecha, **datos)
+
+
+# ========== PUNTAJES ==========
+
+class PuntajesTests(Instituciones, TestCase):
+
+    def test_resumen_de_la_institucion(self):
+        institucion = self.institucion('Q1')
+        self.encuesta(institucion, fecha=datetime.date(2025, 1, 1), **respuestas('SIEMPRE', 'NUNCA'))
+        self.encuesta(institucion, **respuestas('AVECES', 'NO_APLICA', p1_accesos='SIEMPRE'))
+        puntaje = PuntajeInstitucion.objects.get(institucion=institucion)
+        self.assertEqual(puntaje.total_encuestas, 2)
+        # Última: físico (100 + 6 * 60) / 7, tecnológico 0 (todo NO_APLICA)
+        self.assertEqual((puntaje.ultimo_fisico, puntaje.ultimo_tecnologico, puntaje.ultimo_general),
+                         (Decimal('65.71'), Decimal('0.00'), Decimal('32.86')))
+        self.assertEqual((puntaje.historico_fisico, puntaje.historico_general), (Decimal('82.86'), Decimal('46.43')))
+        self.assertEqual(puntaje.promedios_preguntas['p1_accesos'], 100)
+        self.assertEqual(puntaje.promedios_preguntas['p2_pasillos'], 80)
+        self.assertEqual(puntaje.promedios_preguntas['p8_equipos'], 20)
+
+    def test_cada_encuesta_recalcula_sus_puntajes_al_guardar(self):
+        encuesta = self.encuesta(self.institucion('Q1'), **respuestas('SIEMPRE', 'NUNCA'))
+        self.assertEqual((encuesta.puntaje_fisico, encuesta.puntaje_tecnologico, encuesta.puntaje_general),
+                         (Decimal('100.00'), Decimal('20.00'), Decimal('60.00')))
+
+        # También con update_fields, que solo nombra la respuesta cambiada
+        encuesta.p8_equipos = 'SIEMPRE'
+        encuesta.save(update_fields=['p8_equipos'])
+        encuesta.refresh_from_db()
+        self.assertEqual((encuesta.puntaje_tecnologico, encuesta.puntaje_general),
+                         (Decimal('31.43'), Decimal('65.71')))
+
+    def test_la_migracion_calcula_igual_que_el_modelo(self):
+        migracion = importlib.import_module('accesibilidad.migrations.0004_encuestabarreras_puntajes')
+        institucion = self.institucion('Q1')
+        opciones = [respuesta for respuesta, _ in EncuestaBarreras.RESPUESTA_CHOICES]
+        azar = random.Random(35)
+        EncuestaBarreras.objects.bulk_create([
+            EncuestaBarreras(institucion=institucion, fecha_encuesta=datetime.date(2025, 1, 1),
+                             **{pregunta: azar.choice(opciones) for pregunta in EncuestaBarreras.PREGUNTAS})
+            for _ in range(300)
+        ])
+
+        migracion.calcular_puntajes(apps, SimpleNamespace(connection=connection))
+        for encuesta in EncuestaBarreras.objects.all():
+            guardados = (encuesta.puntaje_fisico, encuesta.puntaje_tecnologico, encuesta.puntaje_general)
+            encuesta.calcular_puntajes()
+            self.assertEqual(guardados, (encuesta.puntaje_fisico, encuesta.puntaje_tecnologico,
+                                         encuesta.puntaje_general))
+
+    def test_lee_los_puntajes_guardados_de_cada_encuesta(self):
+        institucion = self.institucion('Q1')
+        encuesta = self.encuesta(institucion, **respuestas('SIEMPRE', 'SIEMPRE'))
+        # update() no pasa por save(): el resumen usa lo guardado, no vuelve a puntuar las respuestas
+        EncuestaBarreras.objects.filter(pk=encuesta.pk).update(puntaje_general=Decimal('12.34'))
+        self.assertEqual(recalcular(institucion.pk).ultimo_general, Decimal('12.34'))
+
+    def test_una_sola_tabla_de_puntuaciones(self):
+        encuesta = EncuestaBarreras()
+        for respuesta, _ in EncuestaBarreras.RESPUESTA_CHOICES:
+            self.assertEqual(encuesta.get_puntuacion(respuesta), PUNTUACIONES[respuesta])
+        self.assertEqual(encuesta.get_puntuacion('OTRA'), 0)
+
+
+# ========== RESULTADOS ==========
+
+class ResultadosEncuestasTests(Instituciones, TestCase):
+
+    def resultados(self):
+        return self.client.get(reverse('accesibilidad:resultados_encuestas')).context
+
+    def test_sin_encuestas(self):
+        self.assertEqual(self.resultados()['total_encuestas'], 0)
+
+    def test_no_aplica_no_cuenta_en_los_promedios(self):
+        institucion = self.institucion('Q1')
+        self.encuesta(institucion, **respuestas('SIEMPRE'))
+        self.encuesta(institucion, **respuestas(tecnologicas='AVECES', p1_accesos='NUNCA'))
+
+        contexto = self.resultados()
+        self.assertEqual(contexto['total_encuestas'], 2)
+        preguntas = {p['campo']: (p['promedio'], p['respuestas']) for p in contexto['preguntas']}
+        self.assertEqual(preguntas['p1_accesos'], (60, 2))     # (100 + 20) / 2
+        self.assertEqual(preguntas['p2_pasillos'], (100, 1))   # la segunda respondió NO_APLICA
+        self.assertEqual(preguntas['p8_equipos'], (60, 1))
+        # Por categoría se promedian todas las respuestas válidas: (7 * 100 + 20) / 8
+        self.assertEqual(contexto['promedio_fisico'], 90)
+        self.assertEqual(contexto['promedio_tecnologico'], 60)
+        self.assertEqual(contexto['promedio_general'], 75)
+        self.assertEqual(contexto['respuestas'], 15)
+        self.assertEqual(len(contexto['preguntas_fisicas']), 7)
+
+        # Una encuesta nueva invalida el resultado cacheado
+        self.encuesta(institucion, **respuestas('NUNCA', 'NUNCA'))
+        self.assertEqual(self.resultados()['total_encuestas'], 3)
+
+
+class EstadisticasInstitucionTests(Instituciones, TestCase):
+
+    def estadisticas(self, institucion):
+        return self.client.get(reverse('accesibilidad:estadisticas_institucion', args=[institucion.pk]))
+
+    def test_promedios_de_sus_encuestas(self):
+        institucion = self.institucion('Q1')
+        otra = self.institucion('Q2')
+        self.encuesta(institucion, fecha=datetime.date(2025, 1, 1),
+                      **respuestas('CASI_SIEMPRE', 'CASI_NUNCA', p3_rampas='NUNCA'))
+        ultima = self.encuesta(institucion, **respuestas('SIEMPRE', p9_internet='AVECES'))
+        self.encuesta(otra, **respuestas('NUNCA', 'NUNCA'))
+
+        with self.assertNumQueries(2):
+            contexto = self.estadisticas(institucion).context
+        self.assertEqual(contexto['total_encuestas'], 2)
+        self.assertEqual(contexto['ultima_encuesta'], ultima)
+        self.assertEqual(contexto['promedios']['p1_accesos'], 90)    # (80 + 100) / 2
+        self.assertEqual(contexto['promedios']['p3_rampas'], 60)     # (20 + 100) / 2
+        self.assertEqual(contexto['promedios']['p8_equipos'], 40)    # solo la primera respondió
+        self.assertEqual(contexto['promedios']['p9_internet'], 50)   # (40 + 60) / 2
+        # Físico: (6 * 80 + 20 + 7 * 100) / 14; tecnológico: (7 * 40 + 60) / 8
+        self.assertEqual(contexto['promedio_fisico'], 85.71)
+        self.assertEqual(contexto['promedio_tecnologico'], 42.5)
+        self.assertEqual(contexto['promedio_general'], 64.11)
+        self.assertEqual([p['texto_corto'] for p in contexto['preguntas']][:2],
+                         ['Accesos principales al edificio', 'Pasillos, aulas y espacios comunes'])
+
+    def test_sin_encuestas_vuelve_al_detalle(self):
+        institucion = self.institucion('Q1')
+        self.assertRedirects(
+            self.estadisticas(institucion),
+            reverse('accesibilidad:detalle_institucion', args=[institucion.pk]), fetch_redirect_response=False,
+        )
+
+
+# ========== RANKING ==========
+
+class RankingTests(Instituciones, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.quito = cls.institucion('Q1')
+        cls.cayambe = cls.institucion('C1', canton='CAYAMBE')
+        cls.guayaquil = cls.institucion('G1', provincia='GUAYAS', canton='GUAYAQUIL')
+        cls.encuesta(cls.quito, **respuestas('SIEMPRE', 'SIEMPRE'))
+        cls.encuesta(cls.cayambe, **respuestas('AVECES', 'AVECES'))
+        cls.encuesta(cls.guayaquil, **respuestas('NUNCA', 'NUNCA'))
+
+    def test_empates_y_orden(self):
+        empatada = self.institucion('Q2')
+        self.encuesta(empatada, **respuestas('SIEMPRE', 'SIEMPRE'))
+        self.institucion('Q3')  # sin encuestas: no entra al ranking
+
+        nacional = ranking_region()
+        # RANK deja un hueco después del empate; PERCENT_RANK = (rank - 1) / (n - 1)
+        self.assertEqual(
+            [(fila['institucion_id'], fila['rank_nacional'], fila['percentil_nacional']) for fila in nacional],
+            [(self.quito.pk, 1, 0), (empatada.pk, 1, 0), (self.cayambe.pk, 3, 0.6667), (self.guayaquil.pk, 4, 1)],
+        )
+        self.assertEqual([fila['rank_provincia'] for fila in nacional], [1, 1, 3, 1])
+        self.assertEqual([fila['rank_canton'] for fila in nacional], [1, 1, 1, 1])
+
+        pichincha = ranking_region('PICHINCHA')
+        self.assertEqual(
+            [(fila['institucion_id'], fila['rank_provincia'], fila['percentil_provincia']) for fila in pichincha],
+            [(self.quito.pk, 1, 0), (empatada.pk, 1, 0), (self.cayambe.pk, 3, 1)],
+        )
+        self.assertIsNone(pichincha[0]['rank_nacional'])
+        self.assertEqual([fila['institucion_id'] for fila in ranking_region('PICHINCHA', 'QUITO')],
+                         [self.quito.pk, empatada.pk])
+        self.assertEqual([fila['institucion_id'] for fila in decil_inferior()], [self.guayaquil.pk])
+
+    def test_el_canton_conserva_la_posicion_en_la_provincia(self):
+        filas = ranking_region('PICHINCHA', 'CAYAMBE')
+        self.assertEqual([fila['institucion_id'] for fila in filas], [self.cayambe.pk])
+        self.assertEqual((filas[0]['rank_provincia'], filas[0]['rank_canton']), (2, 1))
+        self.assertEqual(ranking_region('PICHINCHA', 'GUAYAQUIL'), [])
+
+    def test_guardar_solo_invalida_su_provincia(self):
+        ranking_region('PICHINCHA')
+        ranking_region('GUAYAS')
+        ranking_region()
+
+        self.encuesta(self.cayambe, fecha=datetime.date(2025, 6, 1), **respuestas('SIEMPRE', 'SIEMPRE'))
+        with self.assertNumQueries(0):
+            self.assertEqual(ranking_region('GUAYAS')[0]['puntaje_general'], 20.0)
+        with self.assertNumQueries(1):
+            pichincha = ranking_region('PICHINCHA')
+        self.assertEqual([fila['puntaje_general'] for fila in pichincha], [100.0, 100.0])
+        with self.assertNumQueries(1):
+            self.assertEqual(ranking_region()[1]['puntaje_general'], 100.0)
+
+        # Cambiar de provincia invalida la anterior y la nueva
+        self.cayambe.provincia = 'GUAYAS'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cayambe.save()
+        self.assertEqual([fila['institucion_id'] for fila in ranking_region('PICHINCHA')], [self.quito.pk])
+        self.assertEqual([fila['institucion_id'] for fila in ranking_region('GUAYAS')],
+                         [self.cayambe.pk, self.guayaquil.pk])
+
+
+# ========== REGIONES ==========
+
+class RegionesTests(Instituciones, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        azar = random.Random(37)
+        opciones = [respuesta for respuesta, _ in EncuestaBarreras.RESPUESTA_CHOICES]
+        regiones = [('PICHINCHA', 'QUITO'), ('PICHINCHA', 'CAYAMBE'), ('GUAYAS', 'GUAYAQUIL')]
+        tipos = [tipo for tipo, _ in InstitucionEducativa.TIPO_CHOICES]
+        for numero in range(18):
+            provincia, canton = regiones[numero % 3]
+            institucion = cls.institucion(f'R{numero}', provincia, canton, tipos[numero % 4])
+            # Algunas quedan sin encuestas y no cuentan en el cubo
+            for dia in range(numero % 4):
+                cls.encuesta(institucion, fecha=datetime.date(2025, 1, dia + 1),
+                             **{pregunta: azar.choice(opciones) for pregunta in EncuestaBarreras.PREGUNTAS})
+
+    def directo(self, **filtros):
+        """Lo que el cubo debería dar, agregando PuntajeInstitucion sin pasar por ResumenRegional"""
+        fila = PuntajeInstitucion.objects.filter(
+            ultimo_general__isnull=False, **{f'institucion__{campo}': valor for campo, valor in filtros.items()}
+        ).aggregate(instituciones=Count('id'), encuestas=Sum('total_encuestas'), suma_fisico=Sum('ultimo_fisico'),
+                    suma_tecnologico=Sum('ultimo_tecnologico'), suma_general=Sum('ultimo_general'))
+        if not fila['instituciones']:
+            return None
+        return {
+            'instituciones': fila['instituciones'],
+            'encuestas': fila['encuestas'],
+            'promedio_fisico': round(float(fila['suma_fisico']) / fila['instituciones'], 2),
+            'promedio_tecnologico': round(float(fila['suma_tecnologico']) / fila['instituciones'], 2),
+            'promedio_general': round(float(fila['suma_general']) / fila['instituciones'], 2),
+        }
+
+    def comprobar_cubo(self):
+        for tipo in ['', 'PRIVADA']:
+            filtro_tipo = {'tipo_institucion': tipo} if tipo else {}
+            niveles = [{}, {'provincia': 'PICHINCHA'}, {'provincia': 'PICHINCHA', 'canton': 'CAYAMBE'}]
+            for region in niveles:
+                nivel = cubo(**region, tipo_institucion=tipo)
+                self.assertEqual(nivel['total'], self.directo(**region, **filtro_tipo), (region, tipo))
+                for fila in nivel['por_tipo']:
+                    self.assertEqual({k: v for k, v in fila.items() if k != 'tipo_institucion'},
+                                     self.directo(**region, tipo_institucion=fila['tipo_institucion']))
+                if nivel['nivel'] == 'institucion':
+                    self.assertEqual(len(nivel['filas']), nivel['total']['instituciones'])
+                    continue
+                for fila in nivel['filas']:
+                    subregion = dict(region, **{nivel['nivel']: fila[nivel['nivel']]})
+                    self.assertEqual({k: v for k, v in fila.items() if k != nivel['nivel']},
+                                     self.directo(**subregion, **filtro_tipo))
+
+    def celdas(self):
+        return sorted(ResumenRegional.objects.values_list(
+            'provincia', 'canton', 'tipo_institucion', 'instituciones', 'encuestas',
+            'suma_fisico', 'suma_tecnologico', 'suma_general',
+        ))
+
+    def test_las_sumas_del_cubo_coinciden_con_el_agregado_directo(self):
+        self.comprobar_cubo()
+        self.assertEqual(cubo()['total']['instituciones'], 13)
+
+    def test_las_senales_mantienen_el_cubo_como_la_reconstruccion(self):
+        movida = InstitucionEducativa.objects.get(codigo_amie='R1')
+        movida.canton, movida.tipo_institucion = 'QUITO', 'MUNICIPAL'
+        with self.captureOnCommitCallbacks(execute=True):
+            movida.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            EncuestaBarreras.objects.filter(institucion__codigo_amie='R5').delete()
+        self.encuesta(InstitucionEducativa.objects.get(codigo_amie='R4'), **respuestas('SIEMPRE', 'NUNCA'))
 
-# Create your tests here.
+        incremental = self.celdas()
+        self.comprobar_cubo()
+        reconstruir()
+        self.assertEqual(self.celdas(), incremental)
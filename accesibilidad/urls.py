@@ -28,4 +28,12 @@ urlpatterns = [
     
     # Exportar datos
     path('exportar/encuestas/', views.exportar_datos_encuestas, name='exportar_datos_encuestas'),
+    
+    # Ranking
+    path('ranking/', views.ranking_instituciones, name='ranking_instituciones'),
+    path('api/ranking/', views.api_ranking, name='api_ranking'),
+    
+    # Resumen regional (provincia -> cantón -> institución)
+    path('regiones/', views.resumen_regional, name='resumen_regional'),
+    path('api/regiones/', views.api_resumen_regional, name='api_resumen_regional'),
 ]
\ No newline at end of file
@@ -1,27 +1,45 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import IntegrityError
+from django.template.response import TemplateResponse
 from .models import InstitucionEducativa, EncuestaBarreras
 from .forms import InstitucionForm, EncuestaBarrerasForm
+from .puntajes import agregados, armar_resultados, resultados
+from .ranking import ranking_region, decil_inferior
+from .regiones import cubo
 from django.http import JsonResponse  
-from django.db.models import Count, Avg
+from django.db.models import Count, Avg, F
+
+from gesinfra_sistema.cache import acachear, cachear
+from gesinfra_sistema.concurrente import en_paralelo
+from gesinfra_sistema.reportes import vista_de_reportes
+
+# ?orden= de lista_instituciones -> campo de PuntajeInstitucion
+ORDENES_PUNTAJE = {
+    'puntaje': 'puntaje__ultimo_general',
+    'fisico': 'puntaje__ultimo_fisico',
+    'tecnologico': 'puntaje__ultimo_tecnologico',
+    'historico': 'puntaje__historico_general',
+}
 
 def encuesta_nueva(request):
     """Redirige a la selección de institución para nueva encuesta"""
     return redirect('accesibilidad:seleccionar_institucion')
 
 # ===== DASHBOARD =====
-def dashboard(request):
-    instituciones = InstitucionEducativa.objects.all().order_by('-fecha_registro')[:5]
-    encuestas = EncuestaBarreras.objects.all().order_by('-fecha_registro')[:5]
-    
-    context = {
-        'instituciones': instituciones,
-        'encuestas': encuestas,
-        'total_instituciones': InstitucionEducativa.objects.count(),
-        'total_encuestas': EncuestaBarreras.objects.count(),
-    }
-    return render(request, 'accesibilidad/dashboard.html', context)
+@vista_de_reportes
+async def dashboard(request):
+    # Cacheado hasta que cambie una institución o una encuesta (gesinfra_sistema/cache.py);
+    # las cuatro consultas corren a la vez (gesinfra_sistema/concurrente.py)
+    def calcular():
+        return en_paralelo(
+            instituciones=lambda: list(InstitucionEducativa.objects.all().order_by('-fecha_registro')[:5]),
+            encuestas=lambda: list(EncuestaBarreras.objects.select_related('institucion').order_by('-fecha_registro')[:5]),
+            total_instituciones=InstitucionEducativa.objects.count,
+            total_encuestas=EncuestaBarreras.objects.count,
+        )
+    context = await acachear('accesibilidad:dashboard', ['instituciones', 'encuestas'], calcular)
+    return TemplateResponse(request, 'accesibilidad/dashboard.html', context)
 
 # ===== INSTITUCIONES =====
 def nueva_institucion(request):
@@ -46,11 +64,19 @@ def nueva_institucion(request):
 
 def lista_instituciones(request):
     try:
-        # Obtener todas las instituciones ordenadas por nombre
-        instituciones = InstitucionEducativa.objects.all().order_by('nombre_institucion')
+        # Orden por nombre o por puntaje (tabla PuntajeInstitucion, sin leer encuestas)
+        orden = request.GET.get('orden', 'nombre')
+        instituciones = InstitucionEducativa.objects.select_related('puntaje')
+        if orden in ORDENES_PUNTAJE:
+            campo = ORDENES_PUNTAJE[orden]
+            instituciones = instituciones.order_by(F(campo).desc(nulls_last=True), 'nombre_institucion')
+        else:
+            orden = 'nombre'
+            instituciones = instituciones.order_by('nombre_institucion')
         
         context = {
             'instituciones': instituciones,
+            'orden': orden,
             'titulo': 'Instituciones Educativas'
         }
         
@@ -63,12 +89,13 @@ def lista_instituciones(request):
         return redirect('accesibilidad:dashboard')
 
 def detalle_institucion(request, institucion_id):
-    institucion = get_object_or_404(InstitucionEducativa, id=institucion_id)
+    institucion = get_object_or_404(InstitucionEducativa.objects.select_related('puntaje'), id=institucion_id)
     encuestas = EncuestaBarreras.objects.filter(institucion=institucion)
     
     context = {
         'institucion': institucion,
         'encuestas': encuestas,
+        'puntaje': getattr(institucion, 'puntaje', None),
     }
     return render(request, 'accesibilidad/instituciones/detalle.html', context)
 def editar_institucion(request, institucion_id):
@@ -178,10 +205,24 @@ def crear_encuesta(request):
     return render(request, 'accesibilidad/encuestas/crear.html', context)
 def lista_encuestas(request):
     """Muestra la lista de todas las encuestas"""
-    encuestas = EncuestaBarreras.objects.all().order_by('-fecha_encuesta')
+    encuestas = EncuestaBarreras.objects.select_related('institucion')
+    
+    # Filtro por provincia y orden por puntaje almacenado (columnas indexadas)
+    provincia = request.GET.get('provincia', '').strip()
+    if provincia:
+        encuestas = encuestas.filter(institucion__provincia__iexact=provincia)
+    orden = request.GET.get('orden', '')
+    if orden == 'peor':
+        encuestas = encuestas.order_by('puntaje_general', '-fecha_encuesta')
+    elif orden == 'mejor':
+        encuestas = encuestas.order_by('-puntaje_general', '-fecha_encuesta')
+    else:
+        encuestas = encuestas.order_by('-fecha_encuesta')
     
     context = {
         'encuestas': encuestas,
+        'provincia': provincia,
+        'orden': orden,
         'titulo': 'Lista de Encuestas'
     }
     
@@ -264,17 +305,26 @@ def eliminar_encuesta(request, encuesta_id):
     
     return render(request, 'accesibilidad/encuestas/eliminar.html', context)
 
+@vista_de_reportes
 def resultados_encuestas(request):
     """Vista para mostrar resultados y métricas"""
-    # Estadísticas generales
-    total_encuestas = EncuestaBarreras.objects.count()
+    # Todos los promedios salen de una sola consulta de agregación (puntajes.resultados)
+    context = dict(cachear('accesibilidad:resultados', ['encuestas'],
+                           lambda: resultados(EncuestaBarreras.objects.all())))
     
-    if total_encuestas == 0:
+    if context['total_encuestas'] == 0:
         context = {
             'total_encuestas': 0,
             'mensaje': 'No hay encuestas registradas todavía.'
         }
         return render(request, 'accesibilidad/encuestas/resultados.html', context)
+    
+    context['preguntas_fisicas'] = [p for p in context['preguntas'] if p['categoria'] == 'fisico']
+    context['preguntas_tecnologicas'] = [p for p in context['preguntas'] if p['categoria'] == 'tecnologico']
+    context['promedio_fisico'] = context['categorias']['fisico']['promedio']
+    context['promedio_tecnologico'] = context['categorias']['tecnologico']['promedio']
+    return render(request, 'accesibilidad/encuestas/resultados.html', context)
+
 def calificaciones_encuesta(request, encuesta_id):
     encuesta = get_object_or_404(EncuestaBarreras, id=encuesta_id)
     
@@ -301,12 +351,14 @@ def imprimir_encuesta(request, encuesta_id):
         'encuesta': encuesta,
     })
 
+@vista_de_reportes
 def exportar_datos_encuestas(request):
     """Vista para exportar datos en JSON"""
-    encuestas = EncuestaBarreras.objects.all()
+    encuestas = EncuestaBarreras.objects.select_related('institucion').order_by('id')
     
     datos = []
-    for encuesta in encuestas:
+    # iterator(): lectura por bloques (cursor de servidor en PostgreSQL)
+    for encuesta in encuestas.iterator(chunk_size=2000):
         datos.append({
             'id': encuesta.id,
             'institucion': encuesta.institucion.nombre_institucion,
@@ -320,34 +372,29 @@ def exportar_datos_encuestas(request):
         })
     
     return JsonResponse({'encuestas': datos}, safe=False)
+@vista_de_reportes
 def estadisticas_institucion(request, institucion_id):
     """Muestra estadísticas específicas para una institución"""
-    institucion = get_object_or_404(InstitucionEducativa, id=institucion_id)
-    encuestas = EncuestaBarreras.objects.filter(institucion=institucion)
+    # Consulta 1: institución con los puntajes de sus encuestas agregados (Case/When en SQL)
+    institucion = get_object_or_404(
+        InstitucionEducativa.objects.annotate(**agregados('encuestabarreras__')),
+        id=institucion_id,
+    )
     
-    if not encuestas.exists():
+    if not institucion.total_encuestas:
         messages.warning(request, f'No hay encuestas registradas para {institucion.nombre_institucion}')
         return redirect('accesibilidad:detalle_institucion', institucion_id=institucion_id)
     
-    # Calcular promedios para esta institución
-    promedios = {}
-    preguntas = [
-        'p1_accesos', 'p2_pasillos', 'p3_rampas', 'p4_banos', 'p5_puertas',
-        'p6_senialetica', 'p7_iluminacion', 'p8_equipos', 'p9_internet',
-        'p10_software', 'p11_plataformas', 'p12_capacitacion', 'p13_soporte', 'p14_recursos'
-    ]
-    
-    for pregunta in preguntas:
-        promedio = encuestas.aggregate(
-            avg=Avg(pregunta)
-        )['avg']
-        promedios[pregunta] = round(promedio, 2) if promedio else 0
-    
-    # Calcular promedio general
-    promedio_general = sum(promedios.values()) / len(promedios) if promedios else 0
+    resultados_institucion = armar_resultados({
+        nombre: getattr(institucion, nombre) for nombre in agregados()
+    })
+    promedios = {p['campo']: p['promedio'] for p in resultados_institucion['preguntas']}
+    promedio_general = resultados_institucion['promedio_general']
     
-    # Última encuesta
-    ultima_encuesta = encuestas.order_by('-fecha_encuesta').first()
+    # Consulta 2: última encuesta
+    ultima_encuesta = EncuestaBarreras.objects.filter(
+        institucion_id=institucion.id
+    ).order_by('-fecha_encuesta', '-id').first()
     
     # Texto de las preguntas para mostrar
     preguntas_texto = [
@@ -365,4 +412,83 @@ def estadisticas_institucion(request, institucion_id):
         "Soporte para estudiantes",
         "Soporte técnico adecuado",
         "Recursos digitales educativos"
-    ]
\ No newline at end of file
+    ]
+    
+    context = {
+        'institucion': institucion,
+        'total_encuestas': institucion.total_encuestas,
+        'promedios': promedios,
+        'promedio_general': promedio_general,
+        'promedio_fisico': resultados_institucion['categorias']['fisico']['promedio'],
+        'promedio_tecnologico': resultados_institucion['categorias']['tecnologico']['promedio'],
+        'preguntas': [
+            dict(pregunta, texto_corto=texto)
+            for pregunta, texto in zip(resultados_institucion['preguntas'], preguntas_texto)
+        ],
+        'preguntas_texto': preguntas_texto,
+        'ultima_encuesta': ultima_encuesta,
+    }
+    
+    return render(request, 'accesibilidad/instituciones/estadisticas.html', context)
+
+# ===== RANKING =====
+@vista_de_reportes
+def ranking_instituciones(request):
+    """Ranking de instituciones por puntaje de accesibilidad en su provincia y cantón"""
+    provincia = request.GET.get('provincia', '').strip()
+    canton = request.GET.get('canton', '').strip()
+    
+    regiones = cachear('accesibilidad:regiones_disponibles', ['instituciones'], lambda: list(
+        InstitucionEducativa.objects.order_by('provincia', 'canton').values_list('provincia', 'canton').distinct()
+    ))
+    context = {
+        'filas': ranking_region(provincia, canton),
+        'provincia': provincia,
+        'canton': canton,
+        'provincias': sorted({p for p, _ in regiones}),
+        'cantones': sorted({c for p, c in regiones if not provincia or p == provincia}),
+        'decil_inferior': decil_inferior() if not provincia and not canton else [],
+        'titulo': 'Ranking de Accesibilidad',
+    }
+    return render(request, 'accesibilidad/ranking.html', context)
+
+@vista_de_reportes
+def api_ranking(request):
+    """Ranking en JSON: ?provincia=&canton=, o ?decil=inferior para el 10 % peor del país"""
+    if request.GET.get('decil') == 'inferior':
+        return JsonResponse({'decil': 'inferior', 'instituciones': decil_inferior()})
+    
+    provincia = request.GET.get('provincia', '').strip()
+    canton = request.GET.get('canton', '').strip()
+    return JsonResponse({
+        'provincia': provincia or None,
+        'canton': canton or None,
+        'instituciones': ranking_region(provincia, canton),
+    })
+
+# ===== RESUMEN REGIONAL =====
+def _parametros_region(request):
+    return {
+        'provincia': request.GET.get('provincia', '').strip(),
+        'canton': request.GET.get('canton', '').strip(),
+        'tipo_institucion': request.GET.get('tipo', '').strip(),
+    }
+
+def _cubo_cacheado(parametros):
+    return cachear('accesibilidad:regiones', ['puntajes', 'instituciones'],
+                   lambda: cubo(**parametros), *parametros.values())
+
+@vista_de_reportes
+def resumen_regional(request):
+    """Promedios de accesibilidad por región con desglose provincia -> cantón -> institución"""
+    parametros = _parametros_region(request)
+    context = dict(_cubo_cacheado(parametros))
+    context['tipo_choices'] = InstitucionEducativa.TIPO_CHOICES
+    context['titulo'] = 'Accesibilidad por Región'
+    return render(request, 'accesibilidad/resumen_regional.html', context)
+
+@vista_de_reportes
+def api_resumen_regional(request):
+    """Mismo desglose que resumen_regional en JSON"""
+    return JsonResponse(_cubo_cacheado(_parametros_region(request)))
+
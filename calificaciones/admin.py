@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Estudiante, Docente, Asignatura, Calificacion
+from .models import Estudiante, Docente, Asignatura, Calificacion, EstadisticaCalificaciones, AuditoriaCalificaciones
 
 @admin.register(Estudiante)
 class EstudianteAdmin(admin.ModelAdmin):
@@ -24,4 +24,18 @@ class CalificacionAdmin(admin.ModelAdmin):
     list_display = ('estudiante', 'asignatura', 'trimestre', 'promedio_final_100')
     list_filter = ('trimestre', 'asignatura', 'estudiante__grado')
     search_fields = ('estudiante__nombres_completos', 'asignatura__nombre')
-    ordering = ('estudiante', 'asignatura', 'trimestre')
\ No newline at end of file
+    ordering = ('estudiante', 'asignatura', 'trimestre')
+
+@admin.register(EstadisticaCalificaciones)
+class EstadisticaCalificacionesAdmin(admin.ModelAdmin):
+    list_display = ('grado', 'paralelo', 'asignatura', 'trimestre', 'total_registros', 'promedio', 'aprobados', 'supletorios', 'reprobados')
+    list_filter = ('grado', 'paralelo', 'trimestre', 'asignatura')
+    readonly_fields = [f.name for f in EstadisticaCalificaciones._meta.fields]
+
+@admin.register(AuditoriaCalificaciones)
+class AuditoriaCalificacionesAdmin(admin.ModelAdmin):
+    list_display = ('fecha_accion', 'accion', 'calificacion', 'usuario', 'ip_address')
+    list_filter = ('accion', 'fecha_accion')
+    search_fields = ('calificacion__estudiante__nombres_completos', 'usuario__username')
+    list_select_related = ('calificacion__estudiante', 'calificacion__asignatura', 'usuario')
+    readonly_fields = [f.name for f in AuditoriaCalificaciones._meta.fields]
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def crear_indice_busqueda(sender, using='default', **kwargs):
+    """Asegura el índice FTS5 de estudiantes después de cada migrate"""
+    from .busqueda import INDICE_ESTUDIANTES
+    INDICE_ESTUDIANTES.asegurar(using)
+
 
 class CalificacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calificaciones'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(crear_indice_busqueda, sender=self)
@@ -0,0 +1,156 @@
+# calificaciones/auditoria.py
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, OperationalError, close_old_connections, transaction
+
+from gesinfra_sistema.tiempos import medicion_actual
+
+from .estadisticas import NOTAS
+from .models import AuditoriaCalificaciones, Calificacion
+
+logger = logging.getLogger('calificaciones.auditoria')
+
+# Identifican la fila aunque se haya eliminado (el evento ELIMINAR no tiene calificacion)
+CLAVES = ['estudiante_id', 'asignatura_id', 'trimestre']
+CAMPOS = NOTAS + ['promedio_formativo', 'promedio_sumativo', 'promedio_final_100']
+
+
+def datos_fila(fila):
+    """datos() de un dict de values() con CLAVES y CAMPOS"""
+    return {
+        **{clave: int(fila[clave]) for clave in CLAVES},
+        # Como texto con dos decimales, igual que en la base
+        **{campo: f'{fila[campo]:.2f}' for campo in CAMPOS},
+    }
+
+
+def datos(calificacion):
+    """Estudiante, asignatura, trimestre, notas y promedios de una calificación"""
+    return datos_fila({campo: getattr(calificacion, campo) for campo in CLAVES + CAMPOS})
+
+
+class EscritorAuditoria:
+    """Eventos de auditoría pendientes de este proceso y el hilo que los guarda.
+
+    Quien guarda una nota solo agrega el evento a la lista; un hilo aparte los
+    inserta con un bulk_create cuando se juntan GESINFRA_AUDITORIA_LOTE o pasan
+    GESINFRA_AUDITORIA_SEGUNDOS. Si la base está ocupada (OperationalError) el
+    lote vuelve a la lista para el próximo intento; cualquier otro error se
+    resuelve fila por fila para que un evento inválido no detenga a los demás.
+    La lista no pasa de GESINFRA_AUDITORIA_MAXIMO eventos y al terminar el
+    proceso (atexit) se guardan los que queden.
+    """
+
+    def __init__(self):
+        self.pendientes = []
+        self.candado = threading.Lock()
+        # Un solo volcado a la vez: el del hilo y el de atexit no se pisan
+        self.volcando = threading.Lock()
+        self.lleno = threading.Event()
+        self.hilo = None
+
+    def agregar(self, evento):
+        with self.candado:
+            self.pendientes.append(evento)
+            self._recortar()
+            lleno = len(self.pendientes) >= settings.GESINFRA_AUDITORIA_LOTE
+            # Se crea en el primer evento de cada proceso (también en los hijos de un fork)
+            if self.hilo is None or not self.hilo.is_alive():
+                self.hilo = threading.Thread(target=self._escribir, name='auditoria-calificaciones', daemon=True)
+                self.hilo.start()
+        if lleno:
+            self.lleno.set()
+
+    def _escribir(self):
+        while True:
+            self.lleno.wait(settings.GESINFRA_AUDITORIA_SEGUNDOS)
+            self.lleno.clear()
+            try:
+                self.volcar()
+            finally:
+                close_old_connections()
+
+    def volcar(self):
+        """Inserta todos los eventos pendientes con un solo bulk_create"""
+        with self.volcando:
+            with self.candado:
+                eventos, self.pendientes = self.pendientes, []
+            if not eventos:
+                return
+            try:
+                AuditoriaCalificaciones.objects.bulk_create(eventos, batch_size=500)
+            except OperationalError:
+                logger.warning('No se pudieron guardar %d eventos de auditoría; se reintentará', len(eventos), exc_info=True)
+                with self.candado:
+                    self.pendientes[:0] = eventos
+                    self._recortar()
+            except DatabaseError:
+                # Típicamente una calificación o un usuario borrados antes del volcado
+                self._uno_por_uno(eventos)
+
+    def _recortar(self):
+        # Con la base caída durante mucho tiempo se descartan los más viejos, no la memoria del proceso
+        sobrantes = len(self.pendientes) - settings.GESINFRA_AUDITORIA_MAXIMO
+        if sobrantes > 0:
+            del self.pendientes[:sobrantes]
+            logger.error('Se descartaron %d eventos de auditoría por falta de espacio en la lista', sobrantes)
+
+    def _uno_por_uno(self, eventos):
+        try:
+            calificaciones = set(Calificacion.objects.filter(
+                pk__in={evento.calificacion_id for evento in eventos},
+            ).values_list('pk', flat=True))
+            usuarios = set(get_user_model().objects.filter(
+                pk__in={evento.usuario_id for evento in eventos},
+            ).values_list('pk', flat=True))
+        except DatabaseError:
+            # Sin las tablas (base sin migrar o ya eliminada) no hay dónde guardarlos
+            logger.exception('Se descartaron %d eventos de auditoría', len(eventos))
+            return
+        for evento in eventos:
+            # Lo mismo que haría on_delete=SET_NULL si la fila ya estuviera guardada
+            if evento.calificacion_id not in calificaciones:
+                evento.calificacion_id = None
+            if evento.usuario_id not in usuarios:
+                evento.usuario_id = None
+            # bulk_create pudo asignar la clave antes de revertirse
+            evento.pk = None
+            try:
+                with transaction.atomic():
+                    evento.save(force_insert=True)
+            except DatabaseError:
+                logger.exception('Evento de auditoría descartado: %s %s', evento.accion, evento.datos_nuevos)
+
+
+escritor = EscritorAuditoria()
+atexit.register(escritor.volcar)
+
+
+def registrar_al_confirmar(cambios):
+    """Encola tras el commit [(accion, calificacion_id, anteriores, nuevos), ...]; los que no cambian nada se omiten.
+
+    El usuario y la IP salen de la petición en curso (TiemposMiddleware); desde
+    un comando o el shell quedan vacíos.
+    """
+    medicion = medicion_actual()
+    peticion = medicion.peticion if medicion is not None else None
+    usuario = getattr(peticion, 'user', None)
+    ip = peticion.META.get('REMOTE_ADDR') if peticion is not None else None
+    eventos = [
+        AuditoriaCalificaciones(
+            accion=accion,
+            calificacion_id=calificacion_id,
+            usuario_id=usuario.pk if usuario is not None and usuario.is_authenticated else None,
+            datos_anteriores=anteriores,
+            datos_nuevos=nuevos,
+            ip_address=ip or None,
+        )
+        for accion, calificacion_id, anteriores, nuevos in cambios
+        if anteriores != nuevos
+    ]
+    if eventos:
+        transaction.on_commit(lambda: [escritor.agregar(evento) for evento in eventos])
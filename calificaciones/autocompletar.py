@@ -0,0 +1,165 @@
+# calificaciones/autocompletar.py
+import bisect
+import logging
+import threading
+import unicodedata
+
+from django.db import DatabaseError
+
+from gesinfra_sistema.cache import incrementar_version, versiones
+
+logger = logging.getLogger(__name__)
+
+# Con prefijos muy cortos se dejan de recorrer claves al llegar a este número
+MAX_CANDIDATOS = 200
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'José Núñez' -> 'jose nunez'"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+class IndicePrefijos:
+    """Índice en memoria para autocompletar por prefijo de nombre o cédula.
+
+    Guarda una lista ordenada de (clave, pk) con una clave por cada palabra
+    de nombres_completos y otra para la cédula; una búsqueda es un bisect
+    sobre esa lista. Las señales de signals.py lo mantienen al día en el
+    proceso que guarda, que además incrementa la versión propia del índice
+    ('autocompletado.<nombre>'); los demás procesos lo reconstruyen cuando
+    esa versión cambia.
+    """
+
+    def __init__(self, nombre, modelo, campo_pk):
+        self.nombre = nombre
+        self.modelo = modelo
+        self.campo_pk = campo_pk
+        self.version_compartida = f'autocompletado.{nombre}'
+        self._lock = threading.RLock()
+        self._claves = []
+        self._registros = {}
+        self._version = None
+
+    def construir(self, version=None):
+        """Carga todas las filas del modelo (una sola consulta)"""
+        # La versión se lee antes de cargar: un cambio durante la carga
+        # provoca otra reconstrucción en la siguiente búsqueda
+        if version is None:
+            version = versiones(self.version_compartida)[0]
+        filas = self.modelo.objects.values_list(self.campo_pk, 'nombres_completos', 'cedula')
+        claves = []
+        registros = {}
+        for pk, nombres, cedula in filas.iterator(chunk_size=5000):
+            registros[pk] = (nombres, cedula, normalizar(nombres))
+            claves.extend((clave, pk) for clave in self._claves_de(nombres, cedula))
+        claves.sort()
+
+        with self._lock:
+            self._claves = claves
+            self._registros = registros
+            self._version = version
+
+    def _asegurar(self):
+        version = versiones(self.version_compartida)[0]
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self.construir(version)
+
+    @staticmethod
+    def _claves_de(nombres, cedula):
+        claves = set(normalizar(nombres).split())
+        if cedula:
+            claves.add(cedula.strip().lower())
+        return claves
+
+    def actualizar(self, pk, nombres, cedula):
+        with self._lock:
+            if self._version is not None:
+                self._quitar(pk)
+                self._registros[pk] = (nombres, cedula, normalizar(nombres))
+                for clave in self._claves_de(nombres, cedula):
+                    bisect.insort(self._claves, (clave, pk))
+            self._anotar_cambio()
+
+    def eliminar(self, pk):
+        with self._lock:
+            if self._version is not None:
+                self._quitar(pk)
+            self._anotar_cambio()
+
+    def _anotar_cambio(self):
+        # Avisa a los demás procesos. Si nadie más cambió la versión desde la
+        # última que vimos, el índice local ya está al día y no se reconstruye
+        version = incrementar_version(self.version_compartida)
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def _quitar(self, pk):
+        registro = self._registros.pop(pk, None)
+        if registro is None:
+            return
+        for clave in self._claves_de(registro[0], registro[1]):
+            posicion = bisect.bisect_left(self._claves, (clave, pk))
+            if posicion < len(self._claves) and self._claves[posicion] == (clave, pk):
+                del self._claves[posicion]
+
+    def buscar(self, texto, limite=10):
+        """Devuelve [(pk, nombres, cedula)] cuyas palabras empiezan con cada término"""
+        terminos = normalizar(texto).split()
+        if not terminos:
+            return []
+        self._asegurar()
+
+        primero, resto = terminos[0], terminos[1:]
+        with self._lock:
+            inicio = bisect.bisect_left(self._claves, (primero,))
+            candidatos = []
+            vistos = set()
+            for clave, pk in self._claves[inicio:]:
+                if not clave.startswith(primero):
+                    break
+                if pk in vistos:
+                    continue
+                vistos.add(pk)
+                nombres, cedula, normalizado = self._registros[pk]
+                palabras = normalizado.split()
+                if all(any(p.startswith(t) for p in palabras) for t in resto):
+                    candidatos.append((normalizado, pk, nombres, cedula))
+                    if len(candidatos) >= MAX_CANDIDATOS:
+                        break
+
+        candidatos.sort()
+        return [(pk, nombres, cedula) for _, pk, nombres, cedula in candidatos[:limite]]
+
+
+def _crear_indices():
+    from .models import Estudiante, Docente
+    return {
+        'estudiantes': IndicePrefijos('estudiantes', Estudiante, 'id_estudiante'),
+        'docentes': IndicePrefijos('docentes', Docente, 'id_docente'),
+    }
+
+
+_indices = None
+_indices_lock = threading.Lock()
+
+
+def obtener_indice(nombre):
+    global _indices
+    if _indices is None:
+        with _indices_lock:
+            if _indices is None:
+                _indices = _crear_indices()
+    return _indices[nombre]
+
+
+def precargar_indices():
+    """Construye los índices al arrancar el proceso (wsgi.py / asgi.py)"""
+    for nombre in ('estudiantes', 'docentes'):
+        try:
+            obtener_indice(nombre).construir()
+        except DatabaseError:
+            # Base sin migrar: el índice se construirá en la primera búsqueda
+            logger.warning('No se pudo precargar el índice de autocompletado "%s"', nombre)
@@ -0,0 +1,47 @@
+# calificaciones/busqueda.py
+from django.db.models import Q
+
+from gesinfra_sistema.fts import IndiceFTS
+from .models import Estudiante
+
+INDICE_ESTUDIANTES = IndiceFTS(
+    tabla='calificaciones_estudiante_fts',
+    tabla_contenido='calificaciones_estudiante',
+    columna_id='id_estudiante',
+    columnas=['nombres_completos', 'cedula'],
+)
+
+
+def buscar_estudiantes(texto='', grado='', paralelo='', jornada='', anio_lectivo='',
+                       promedio_min=None, promedio_max=None):
+    """Búsqueda de estudiantes por fragmentos de nombre o prefijo de cédula y filtros.
+
+    El texto se resuelve con el índice FTS5; los filtros de curso usan el índice
+    estudiante_curso_idx y los de promedio el índice de promedio_general.
+    """
+    estudiantes = Estudiante.objects.all()
+
+    if grado:
+        estudiantes = estudiantes.filter(grado=grado)
+    if paralelo:
+        estudiantes = estudiantes.filter(paralelo=paralelo)
+    if jornada:
+        estudiantes = estudiantes.filter(jornada=jornada)
+    if anio_lectivo:
+        estudiantes = estudiantes.filter(anio_lectivo=anio_lectivo)
+    if promedio_min is not None:
+        estudiantes = estudiantes.filter(promedio_general__gte=promedio_min)
+    if promedio_max is not None:
+        estudiantes = estudiantes.filter(promedio_general__lte=promedio_max)
+
+    if texto:
+        if INDICE_ESTUDIANTES.usar_para(texto, estudiantes.db):
+            # Se conserva el orden alfabético del modelo en lugar de bm25
+            estudiantes = INDICE_ESTUDIANTES.filtrar(estudiantes, texto, por_relevancia=False)
+        else:
+            estudiantes = estudiantes.filter(
+                Q(nombres_completos__icontains=texto) |
+                Q(cedula__startswith=texto)
+            )
+
+    return estudiantes
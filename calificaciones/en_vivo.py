@@ -0,0 +1,65 @@
+# calificaciones/en_vivo.py
+from django.db import transaction
+from django.http import QueryDict
+
+from gesinfra_sistema import canales
+
+from .estadisticas import NOTAS
+
+# ws://.../ws/calificaciones/?grado=7EGB&paralelo=A&asignatura=3&trimestre=1
+# (los mismos filtros que sistema_calificaciones). Cada mensaje es un JSON:
+#   {"tipo": "fila", "estudiante_id": 12, "leccion1": 8.5, ..., "promedio_final": 8.1}
+#   {"tipo": "fila", "estudiante_id": 12, "eliminada": true, ...}
+#   {"tipo": "recargar"}  (el cliente se atrasó: volver a pedir la tabla)
+RUTA = '/ws/calificaciones/'
+
+
+def grupo(grado, paralelo, asignatura_id, trimestre):
+    """'calificaciones:asignatura:trimestre:grado:paralelo:'; sin paralelo, el grupo de todo el grado"""
+    partes = ['calificaciones', int(asignatura_id), int(trimestre), grado]
+    if paralelo:
+        partes.append(paralelo)
+    return ':'.join(str(parte) for parte in partes) + ':'
+
+
+def fila(calificacion, eliminada=False):
+    """La fila de la tabla con sus notas y promedios recalculados, como la respuesta de guardar_calificaciones_ajax"""
+    datos = {
+        'tipo': 'fila',
+        'estudiante_id': calificacion.estudiante_id,
+        **{nota: float(getattr(calificacion, nota)) for nota in NOTAS},
+        'promedio_formativo': float(calificacion.aporte_formativo_70),
+        'promedio_sumativo': float(calificacion.aporte_sumativo_30),
+        'promedio_final': float(calificacion.promedio_final_100),
+    }
+    if eliminada:
+        datos['eliminada'] = True
+    return datos
+
+
+def publicar_al_confirmar(filas):
+    """Publica [(clave, datos), ...] tras el commit; clave es la de estadisticas.aporte()
+
+    (grado, paralelo, asignatura_id, trimestre), que ya trae cada guardado.
+    """
+    mensajes = [(grupo(*clave), datos) for clave, datos in filas]
+    transaction.on_commit(lambda: canales.publicar(mensajes))
+
+
+async def websocket(scope, receive, send):
+    """Aplicación ASGI del websocket de la tabla de calificaciones (ver gesinfra_sistema/asgi.py)"""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    parametros = QueryDict(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        nombre = grupo(
+            parametros['grado'], parametros.get('paralelo', ''),
+            parametros['asignatura'], parametros.get('trimestre', '1'),
+        )
+    except (KeyError, ValueError):
+        await canales.rechazar(send)
+        return
+    if await canales.autenticar(scope) is None:
+        await canales.rechazar(send)
+        return
+    await canales.servir(nombre, receive, send)
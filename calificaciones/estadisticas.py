@@ -0,0 +1,129 @@
+# calificaciones/estadisticas.py
+from decimal import Decimal
+
+from django.db import transaction
+
+from gesinfra_sistema.cache import incrementar_version
+
+from .models import Estudiante, Calificacion, EstadisticaCalificaciones
+
+# Umbrales de calificaciones/views.py: >= 7 aprobado, >= 5 supletorio
+NOTA_APROBACION = Decimal('7')
+NOTA_SUPLETORIO = Decimal('5')
+
+NOTAS = ['leccion1', 'leccion2', 'actividad_experiencial', 'proyecto_interdisciplinar', 'examen']
+
+
+def aporte(grado, paralelo, asignatura_id, trimestre, promedio, notas):
+    """Lo que una calificación suma al resumen: (clave, promedio, completo)"""
+    clave = (grado, paralelo, asignatura_id, int(trimestre))
+    completo = all(Decimal(str(n)) > 0 for n in notas)
+    return clave, Decimal(str(promedio)), completo
+
+
+def aporte_instancia(calificacion):
+    """Aporte de una instancia en memoria (después de calcular_promedios)"""
+    grado, paralelo = Estudiante.objects.filter(pk=calificacion.estudiante_id).values_list(
+        'grado', 'paralelo'
+    ).first() or (None, None)
+    if grado is None:
+        return None
+    return aporte(
+        grado, paralelo, calificacion.asignatura_id, calificacion.trimestre,
+        calificacion.promedio_final_100,
+        [getattr(calificacion, nota) for nota in NOTAS],
+    )
+
+
+def _sumar(estadistica, promedio, completo, signo):
+    estadistica.total_registros += signo
+    if completo:
+        estadistica.completos += signo
+    if promedio > 0:
+        estadistica.con_promedio += signo
+        estadistica.suma_promedios += signo * promedio
+        if promedio >= NOTA_APROBACION:
+            estadistica.aprobados += signo
+        elif promedio >= NOTA_SUPLETORIO:
+            estadistica.supletorios += signo
+        else:
+            estadistica.reprobados += signo
+
+        centesimas = str(int(promedio * 100))
+        cantidad = estadistica.histograma.get(centesimas, 0) + signo
+        if cantidad > 0:
+            estadistica.histograma[centesimas] = cantidad
+        else:
+            estadistica.histograma.pop(centesimas, None)
+
+
+def aplicar(anterior=None, nuevo=None):
+    """Quita el aporte anterior y suma el nuevo en las filas de resumen afectadas"""
+    aplicar_varios([(anterior, nuevo)])
+
+
+def aplicar_varios(cambios_aportes):
+    """aplicar() para muchos pares (anterior, nuevo) con un solo guardado por fila de resumen"""
+    cambios = {}
+    for anterior, nuevo in cambios_aportes:
+        if anterior == nuevo:
+            continue
+        if anterior is not None:
+            cambios.setdefault(anterior[0], []).append((anterior[1], anterior[2], -1))
+        if nuevo is not None:
+            cambios.setdefault(nuevo[0], []).append((nuevo[1], nuevo[2], 1))
+    if not cambios:
+        return
+
+    with transaction.atomic():
+        for (grado, paralelo, asignatura_id, trimestre), deltas in cambios.items():
+            clave = {'grado': grado, 'paralelo': paralelo, 'asignatura_id': asignatura_id, 'trimestre': trimestre}
+            filas = EstadisticaCalificaciones.objects.select_for_update()
+            if all(signo < 0 for _, _, signo in deltas):
+                # Solo hay que restar: si la fila no existe (p. ej. la borró la
+                # cascada de una Asignatura eliminada) no se vuelve a crear
+                estadistica = filas.filter(**clave).first()
+                if estadistica is None:
+                    continue
+            else:
+                estadistica, _ = filas.get_or_create(**clave)
+            for promedio, completo, signo in deltas:
+                _sumar(estadistica, promedio, completo, signo)
+            estadistica.save()
+
+
+def reconstruir():
+    """Recalcula desde cero las filas de resumen (comando reconstruir_estadisticas)"""
+    calificaciones = Calificacion.objects.values_list(
+        'estudiante__grado', 'estudiante__paralelo', 'asignatura_id', 'trimestre',
+        'promedio_final_100', *NOTAS,
+    )
+
+    resumenes = {}
+    for fila in calificaciones.iterator(chunk_size=5000):
+        clave, promedio, completo = aporte(*fila[:5], fila[5:])
+        if clave not in resumenes:
+            grado, paralelo, asignatura_id, trimestre = clave
+            resumenes[clave] = EstadisticaCalificaciones(
+                grado=grado, paralelo=paralelo, asignatura_id=asignatura_id,
+                trimestre=trimestre, histograma={},
+            )
+        _sumar(resumenes[clave], promedio, completo, 1)
+
+    with transaction.atomic():
+        EstadisticaCalificaciones.objects.all().delete()
+        EstadisticaCalificaciones.objects.bulk_create(resumenes.values(), batch_size=500)
+    incrementar_version('calificaciones')
+    return len(resumenes)
+
+
+def totalizar(estadisticas):
+    """Combina varias filas de resumen (p. ej. todo un grado) en una sola sin consultar calificaciones"""
+    total = EstadisticaCalificaciones(histograma={})
+    for estadistica in estadisticas:
+        for campo in ('total_registros', 'completos', 'con_promedio', 'suma_promedios',
+                      'aprobados', 'supletorios', 'reprobados'):
+            setattr(total, campo, getattr(total, campo) + getattr(estadistica, campo))
+        for centesimas, cantidad in estadistica.histograma.items():
+            total.histograma[centesimas] = total.histograma.get(centesimas, 0) + cantidad
+    return total
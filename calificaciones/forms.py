@@ -1,7 +1,46 @@
 # calificaciones/forms.py
 from django import forms
+from django.urls import reverse
 from .models import Estudiante, Docente, Asignatura, Calificacion
 
+class AutocompletarSelect(forms.Select):
+    """Select que solo renderiza la opción elegida.
+    
+    Las demás opciones llegan desde el endpoint de autocompletado
+    (data-autocompletar-url) con calificaciones/autocompletar.js, que la
+    plantilla incluye con {{ form.media }}; así la página no envía un
+    <option> por cada estudiante o docente. Con hasta LIMITE_COMPLETO
+    opciones se renderiza el select completo, que funciona también sin
+    JavaScript. La validación sigue siendo la del ModelChoiceField.
+    """
+    
+    LIMITE_COMPLETO = 300
+    
+    class Media:
+        js = ['calificaciones/autocompletar.js']
+    
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocompletar-url'] = reverse(self.url_name)
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        queryset = getattr(self.choices, 'queryset', None)
+        if queryset is None or not queryset[self.LIMITE_COMPLETO:self.LIMITE_COMPLETO + 1].exists():
+            return super().optgroups(name, value, attrs)
+        
+        seleccionados = [v for v in value if v not in ('', None)]
+        opciones = [self.create_option(name, '', '---------', not seleccionados, 0)]
+        if seleccionados:
+            for indice, objeto in enumerate(queryset.filter(pk__in=seleccionados), 1):
+                opciones.append(self.create_option(name, objeto.pk, str(objeto), True, indice))
+        
+        return [(None, opciones, 0)]
+
 class EstudianteForm(forms.ModelForm):
     class Meta:
         model = Estudiante
@@ -97,7 +136,7 @@ class AsignaturaForm(forms.ModelForm):
                 'class': 'form-control',
                 'required': 'required'
             }),
-            'docente': forms.Select(attrs={
+            'docente': AutocompletarSelect('calificaciones:autocompletar_docentes', attrs={
                 'class': 'form-control'
             }),
             'horas_semanales': forms.NumberInput(attrs={
@@ -112,7 +151,7 @@ class CalificacionForm(forms.ModelForm):
         model = Calificacion
         fields = '__all__'
         widgets = {
-            'estudiante': forms.Select(attrs={
+            'estudiante': AutocompletarSelect('calificaciones:autocompletar_estudiantes', attrs={
                 'class': 'form-control',
                 'required': 'required'
             }),
@@ -0,0 +1,127 @@
+# calificaciones/management/commands/benchmark_guardado_calificaciones.py
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections, transaction
+
+from calificaciones import auditoria
+from calificaciones.masivo import guardar_masivo
+from calificaciones.models import Estudiante, Asignatura, Calificacion
+from gesinfra_sistema.benchmark import base_temporal
+
+GRADOS = ['8EGB', '9EGB', '10EGB']
+PARALELOS = ['A', 'B', 'C']
+NOTAS = ['leccion1', 'leccion2', 'actividad_experiencial', 'proyecto_interdisciplinar', 'examen']
+
+
+def _nota():
+    return Decimal(random.randint(0, 1000)) / 100
+
+
+def guardado_individual(cursos, asignaturas):
+    """Lo que hace guardar_calificaciones_ajax por cada celda editada"""
+    estudiante_id = random.choice(random.choice(list(cursos.values())))
+    with transaction.atomic():
+        calificacion, _ = Calificacion.objects.get_or_create(
+            estudiante_id=estudiante_id,
+            asignatura_id=random.choice(asignaturas),
+            trimestre=random.randint(1, 3),
+        )
+        setattr(calificacion, random.choice(NOTAS), _nota())
+        calificacion.save()
+    return 1
+
+
+def guardado_masivo(cursos, asignaturas):
+    """guardar_calificaciones_masivo: una columna de notas de todo un curso"""
+    estudiantes = random.choice(list(cursos.values()))
+    campo = random.choice(NOTAS)
+    guardar_masivo(random.choice(asignaturas), random.randint(1, 3), [
+        {'estudiante_id': estudiante_id, campo: _nota()} for estudiante_id in estudiantes
+    ])
+    return len(estudiantes)
+
+
+class Command(BaseCommand):
+    help = ('Prueba de carga del ingreso de notas con varios docentes a la vez sobre una base '
+            'temporal del motor configurado (SQLite o PostgreSQL con --settings)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Docentes guardando a la vez')
+        parser.add_argument('--segundos', type=float, default=10)
+        parser.add_argument('--por-curso', type=int, default=40, help='Estudiantes por curso')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix='gesinfra-bench-') as directorio:
+            if connection.vendor == 'sqlite':
+                # Archivo en disco, no la base en memoria de los tests: es lo que usa el servidor
+                connection.settings_dict['TEST']['NAME'] = os.path.join(directorio, 'bench.sqlite3')
+
+            with base_temporal():
+                cursos, asignaturas = self.crear_datos(options['por_curso'])
+                lineas = [f'motor: {connection.vendor}, {options["hilos"]} hilos, {options["segundos"]:.0f}s',
+                          f"{'caso':<22}  {'operaciones/s':>13}  {'notas/s':>9}  {'errores':>7}"]
+                for nombre, funcion in (('guardado individual', guardado_individual),
+                                        ('guardado masivo', guardado_masivo)):
+                    operaciones, notas, errores = self.medir(funcion, cursos, asignaturas, options)
+                    lineas.append(f'{nombre:<22}  {operaciones:>13.1f}  {notas:>9.1f}  {errores:>7}')
+                # La auditoría pendiente va a la base temporal, no a la real al salir del proceso
+                auditoria.escritor.volcar()
+                self.stdout.write('\n'.join(lineas))
+
+    def medir(self, funcion, cursos, asignaturas, options):
+        hasta = time.time() + options['segundos']
+        totales = {'operaciones': 0, 'notas': 0, 'errores': 0}
+        candado = threading.Lock()
+
+        def docente():
+            operaciones = notas = errores = 0
+            try:
+                while time.time() < hasta:
+                    try:
+                        notas += funcion(cursos, asignaturas)
+                        operaciones += 1
+                    except DatabaseError:
+                        # 'database is locked' en SQLite tras busy_timeout: la petición fallaría
+                        errores += 1
+            finally:
+                connections.close_all()
+            with candado:
+                totales['operaciones'] += operaciones
+                totales['notas'] += notas
+                totales['errores'] += errores
+
+        hilos = [threading.Thread(target=docente) for _ in range(options['hilos'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = options['segundos']
+        return totales['operaciones'] / segundos, totales['notas'] / segundos, totales['errores']
+
+    def crear_datos(self, por_curso):
+        asignaturas = [
+            Asignatura.objects.create(nombre=nombre).pk
+            for nombre, _ in Asignatura.ASIGNATURA_CHOICES[:5]
+        ]
+        Estudiante.objects.bulk_create([
+            Estudiante(
+                nombres_completos=f'ESTUDIANTE {grado} {paralelo} {i:03d}',
+                cedula=f'{grado}{paralelo}{i:05d}',
+                fecha_nacimiento=datetime.date(2012, 1, 1),
+                edad=12, sexo=random.choice('MF'), nacionalidad='Ecuatoriana',
+                lugar_nacimiento='Quito', grado=grado, paralelo=paralelo,
+                jornada='MATUTINA', anio_lectivo='2024-2025',
+            )
+            for grado in GRADOS for paralelo in PARALELOS for i in range(por_curso)
+        ])
+        cursos = {}
+        for pk, grado, paralelo in Estudiante.objects.values_list('pk', 'grado', 'paralelo'):
+            cursos.setdefault((grado, paralelo), []).append(pk)
+        return cursos, asignaturas
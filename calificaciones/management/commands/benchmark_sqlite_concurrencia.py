@@ -0,0 +1,192 @@
+# calificaciones/management/commands/benchmark_sqlite_concurrencia.py
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+GRADOS = ['8EGB', '9EGB', '10EGB']
+PARALELOS = ['A', 'B', 'C']
+ASIGNATURAS = 8
+
+ESQUEMA = """
+CREATE TABLE estudiante (id INTEGER PRIMARY KEY, apellidos TEXT, nombres TEXT, grado TEXT, paralelo TEXT);
+CREATE TABLE calificacion (
+    id INTEGER PRIMARY KEY, estudiante_id INTEGER, asignatura_id INTEGER, trimestre INTEGER,
+    leccion1 REAL, leccion2 REAL, examen REAL, promedio REAL, fecha_actualizacion REAL,
+    UNIQUE (estudiante_id, asignatura_id, trimestre)
+);
+CREATE TABLE estadistica (
+    grado TEXT, paralelo TEXT, asignatura_id INTEGER, trimestre INTEGER,
+    total INTEGER, suma REAL, PRIMARY KEY (grado, paralelo, asignatura_id, trimestre)
+);
+CREATE INDEX estudiante_curso ON estudiante (grado, paralelo);
+"""
+
+# Lo que hace una petición de guardar_calificaciones_ajax: get_or_create, save y
+# la señal que actualiza EstadisticaCalificaciones, todo en una transacción
+LEER_CALIFICACION = 'SELECT id, leccion1, leccion2, examen, promedio FROM calificacion ' \
+                    'WHERE estudiante_id = ? AND asignatura_id = ? AND trimestre = ?'
+LEER_CURSO = 'SELECT grado, paralelo FROM estudiante WHERE id = ?'
+GUARDAR_CALIFICACION = 'UPDATE calificacion SET leccion1 = ?, promedio = ?, fecha_actualizacion = ? WHERE id = ?'
+GUARDAR_ESTADISTICA = 'UPDATE estadistica SET suma = suma + ? ' \
+                      'WHERE grado = ? AND paralelo = ? AND asignatura_id = ? AND trimestre = ?'
+
+# Lo que lee un reporte (PDF del curso, dashboard): el curso completo con sus notas
+LEER_REPORTE = """
+SELECT e.apellidos, e.nombres, c.asignatura_id, c.promedio
+FROM estudiante e JOIN calificacion c ON c.estudiante_id = e.id
+WHERE e.grado = ? AND e.paralelo = ? AND c.trimestre = ?
+ORDER BY e.apellidos, e.nombres
+"""
+LEER_RESUMEN = 'SELECT grado, paralelo, SUM(total), SUM(suma) FROM estadistica GROUP BY grado, paralelo'
+
+
+def configuraciones():
+    """Antes: valores por defecto de Django/SQLite. Ajustada: OPTIONS de settings.DATABASES"""
+    opciones = settings.DATABASES['default'].get('OPTIONS', {})
+    return {
+        'por defecto (DELETE, DEFERRED)': {
+            'pragmas': ['PRAGMA journal_mode=DELETE'],
+            'begin': 'BEGIN',
+        },
+        'ajustada (WAL, IMMEDIATE)': {
+            'pragmas': [c.strip() for c in opciones.get('init_command', '').split(';') if c.strip()],
+            'begin': f"BEGIN {opciones.get('transaction_mode') or ''}".strip(),
+        },
+    }
+
+
+def conectar(ruta, configuracion):
+    # Igual que el backend de Django: autocommit y BEGIN explícito en atomic(); timeout de 5 s
+    conexion = sqlite3.connect(ruta, timeout=5, isolation_level=None)
+    for pragma in configuracion['pragmas']:
+        conexion.execute(pragma)
+    return conexion
+
+
+def crear_base(ruta, configuracion, estudiantes):
+    conexion = conectar(ruta, configuracion)
+    conexion.executescript(ESQUEMA)
+    conexion.execute('BEGIN')
+    for i in range(1, estudiantes + 1):
+        grado, paralelo = random.choice(GRADOS), random.choice(PARALELOS)
+        conexion.execute('INSERT INTO estudiante VALUES (?, ?, ?, ?, ?)',
+                         (i, f'Apellido{i:05d}', f'Nombre{i:05d}', grado, paralelo))
+        for asignatura_id in range(1, ASIGNATURAS + 1):
+            for trimestre in (1, 2, 3):
+                conexion.execute(
+                    'INSERT INTO calificacion (estudiante_id, asignatura_id, trimestre, leccion1, leccion2, '
+                    'examen, promedio, fecha_actualizacion) VALUES (?, ?, ?, 7, 7, 7, 7, 0)',
+                    (i, asignatura_id, trimestre),
+                )
+    conexion.execute(
+        'INSERT INTO estadistica SELECT e.grado, e.paralelo, c.asignatura_id, c.trimestre, COUNT(*), SUM(c.promedio) '
+        'FROM calificacion c JOIN estudiante e ON e.id = c.estudiante_id GROUP BY 1, 2, 3, 4'
+    )
+    conexion.execute('COMMIT')
+    conexion.close()
+
+
+def escritor(ruta, configuracion, estudiantes, hasta, cola):
+    conexion = conectar(ruta, configuracion)
+    tiempos, bloqueos = [], 0
+    while time.time() < hasta:
+        estudiante_id = random.randint(1, estudiantes)
+        asignatura_id, trimestre = random.randint(1, ASIGNATURAS), random.randint(1, 3)
+        nota = round(random.uniform(0, 10), 2)
+        inicio = time.perf_counter()
+        try:
+            conexion.execute(configuracion['begin'])
+            fila = conexion.execute(LEER_CALIFICACION, (estudiante_id, asignatura_id, trimestre)).fetchone()
+            grado, paralelo = conexion.execute(LEER_CURSO, (estudiante_id,)).fetchone()
+            promedio = round((nota + fila[2] + fila[3]) / 3, 2)
+            conexion.execute(GUARDAR_CALIFICACION, (nota, promedio, time.time(), fila[0]))
+            conexion.execute(GUARDAR_ESTADISTICA, (promedio - fila[4], grado, paralelo, asignatura_id, trimestre))
+            conexion.execute('COMMIT')
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        except sqlite3.OperationalError:
+            # 'database is locked': la petición habría respondido con error al docente
+            bloqueos += 1
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+    conexion.close()
+    cola.put(('escritura', tiempos, bloqueos))
+
+
+def lector(ruta, configuracion, hasta, cola):
+    conexion = conectar(ruta, configuracion)
+    tiempos, bloqueos = [], 0
+    while time.time() < hasta:
+        inicio = time.perf_counter()
+        try:
+            conexion.execute(LEER_REPORTE, (random.choice(GRADOS), random.choice(PARALELOS),
+                                            random.randint(1, 3))).fetchall()
+            conexion.execute(LEER_RESUMEN).fetchall()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        except sqlite3.OperationalError:
+            bloqueos += 1
+    conexion.close()
+    cola.put(('lectura', tiempos, bloqueos))
+
+
+def _percentil(tiempos, fraccion):
+    if not tiempos:
+        return 0.0
+    tiempos = sorted(tiempos)
+    return tiempos[min(len(tiempos) - 1, int(len(tiempos) * fraccion))]
+
+
+class Command(BaseCommand):
+    help = ('Mide guardados y reportes concurrentes sobre un archivo SQLite temporal, '
+            'con la configuración por defecto y con la de settings.DATABASES')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8, help='Procesos guardando notas')
+        parser.add_argument('--lectores', type=int, default=8, help='Procesos generando reportes')
+        parser.add_argument('--segundos', type=float, default=10)
+        parser.add_argument('--estudiantes', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lineas = [f"{'configuración':<32}  {'escrituras/s':>12}  {'p95 escr.':>10}  {'bloqueos':>8}  "
+                  f"{'lecturas/s':>10}  {'p95 lect.':>10}"]
+        with tempfile.TemporaryDirectory(prefix='gesinfra-bench-') as directorio:
+            for indice, (nombre, configuracion) in enumerate(configuraciones().items()):
+                ruta = os.path.join(directorio, f'base{indice}.sqlite3')
+                self.stdout.write(f'{nombre}: creando {options["estudiantes"]} estudiantes...')
+                crear_base(ruta, configuracion, options['estudiantes'])
+                lineas.append(self.medir(nombre, ruta, configuracion, options))
+        self.stdout.write('\n'.join(lineas))
+
+    def medir(self, nombre, ruta, configuracion, options):
+        cola = multiprocessing.Queue()
+        hasta = time.time() + options['segundos']
+        procesos = [
+            multiprocessing.Process(target=escritor, args=(ruta, configuracion, options['estudiantes'], hasta, cola))
+            for _ in range(options['escritores'])
+        ] + [
+            multiprocessing.Process(target=lector, args=(ruta, configuracion, hasta, cola))
+            for _ in range(options['lectores'])
+        ]
+        for proceso in procesos:
+            proceso.start()
+        resultados = {'escritura': ([], 0), 'lectura': ([], 0)}
+        for _ in procesos:
+            tipo, tiempos, bloqueos = cola.get()
+            acumulados, total_bloqueos = resultados[tipo]
+            resultados[tipo] = (acumulados + tiempos, total_bloqueos + bloqueos)
+        for proceso in procesos:
+            proceso.join()
+
+        escrituras, bloqueos_escritura = resultados['escritura']
+        lecturas, bloqueos_lectura = resultados['lectura']
+        segundos = options['segundos']
+        return (
+            f'{nombre:<32}  {len(escrituras) / segundos:>12.1f}  {_percentil(escrituras, 0.95):>8.1f}ms  '
+            f'{bloqueos_escritura + bloqueos_lectura:>8}  {len(lecturas) / segundos:>10.1f}  '
+            f'{_percentil(lecturas, 0.95):>8.1f}ms'
+        )
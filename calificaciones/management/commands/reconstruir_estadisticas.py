@@ -0,0 +1,12 @@
+# calificaciones/management/commands/reconstruir_estadisticas.py
+from django.core.management.base import BaseCommand
+
+from calificaciones.estadisticas import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la tabla de estadísticas de calificaciones desde las calificaciones'
+
+    def handle(self, *args, **options):
+        filas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'✅ {filas} filas de estadísticas reconstruidas'))
@@ -0,0 +1,20 @@
+# calificaciones/management/commands/reconstruir_indice_estudiantes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from calificaciones.busqueda import INDICE_ESTUDIANTES
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda FTS5 de estudiantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not INDICE_ESTUDIANTES.soportado(using):
+            raise CommandError('El índice necesita SQLite compilado con FTS5')
+
+        if not INDICE_ESTUDIANTES.asegurar(using):
+            INDICE_ESTUDIANTES.reconstruir(using)
+        self.stdout.write(self.style.SUCCESS('✅ Índice de búsqueda de estudiantes reconstruido'))
@@ -0,0 +1,142 @@
+# calificaciones/masivo.py
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from gesinfra_sistema import metricas
+from gesinfra_sistema.cache import incrementar_al_confirmar
+from usuarios import contadores
+
+from .models import Estudiante, Asignatura, Calificacion
+from .signals import actualizar_promedio_general
+from . import auditoria, en_vivo, estadisticas
+
+NOTAS = estadisticas.NOTAS
+
+# Lo que cambia al volver a guardar una fila existente; fecha_registro y observaciones se conservan
+CAMPOS_ACTUALIZADOS = NOTAS + [
+    'promedio_formativo', 'aporte_formativo_70', 'promedio_sumativo', 'aporte_sumativo_30',
+    'promedio_final_100', 'fecha_actualizacion',
+]
+
+NOTA_MAXIMA = Decimal('10')
+
+TRIMESTRES = [valor for valor, _ in Calificacion.TRIMESTRE_CHOICES]
+
+
+def _nota(valor):
+    try:
+        nota = Decimal(str(valor or 0))
+    except InvalidOperation:
+        raise ValueError(f'Nota inválida: {valor}')
+    if not nota.is_finite() or not 0 <= nota <= NOTA_MAXIMA:
+        raise ValueError(f'La nota debe estar entre 0 y {NOTA_MAXIMA}: {valor}')
+    return nota
+
+
+def _entero(valor, descripcion):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'{descripcion} inválido: {valor}')
+
+
+def guardar_masivo(asignatura_id, trimestre, filas):
+    """Guarda las notas de varios estudiantes de una asignatura y trimestre.
+
+    filas es una lista de dicts con estudiante_id y las notas que cambian; las
+    que no vienen conservan su valor. Todas las filas se escriben con un solo
+    INSERT ... ON CONFLICT DO UPDATE (bulk_create con update_conflicts), así que
+    no hay señales por fila: el resumen de estadísticas, los promedios generales,
+    la auditoría, el contador de calificaciones y la versión del cache se
+    actualizan aquí una vez para todo el lote.
+
+    Los datos inválidos (trimestre, asignatura, estudiantes o notas) se
+    rechazan con ValueError antes de escribir nada.
+    """
+    asignatura_id = _entero(asignatura_id, 'Asignatura')
+    trimestre = _entero(trimestre, 'Trimestre')
+    if trimestre not in TRIMESTRES:
+        raise ValueError(f'Trimestre inválido: {trimestre}')
+    if not all(isinstance(fila, dict) and 'estudiante_id' in fila for fila in filas):
+        raise ValueError('Cada fila necesita estudiante_id')
+    notas_por_estudiante = {
+        _entero(fila['estudiante_id'], 'Estudiante'): {campo: _nota(fila[campo]) for campo in NOTAS if campo in fila}
+        for fila in filas
+    }
+    ids = list(notas_por_estudiante)
+
+    with transaction.atomic():
+        if not Asignatura.objects.filter(pk=asignatura_id).exists():
+            raise ValueError(f'Asignatura inexistente: {asignatura_id}')
+        cursos = {
+            pk: (grado, paralelo)
+            for pk, grado, paralelo in Estudiante.objects.filter(pk__in=ids).values_list('pk', 'grado', 'paralelo')
+        }
+        faltantes = set(ids) - set(cursos)
+        if faltantes:
+            raise ValueError(f'Estudiantes inexistentes: {sorted(faltantes)}')
+
+        existentes = {
+            calificacion.estudiante_id: calificacion
+            for calificacion in Calificacion.objects.filter(
+                asignatura_id=asignatura_id, trimestre=trimestre, estudiante_id__in=ids,
+            ).only(*auditoria.CLAVES, *auditoria.CAMPOS)
+        }
+
+        calificaciones, aportes, cambios = [], [], []
+        for estudiante_id, notas in notas_por_estudiante.items():
+            grado, paralelo = cursos[estudiante_id]
+            existente = existentes.get(estudiante_id)
+            anterior = None
+            valores = {nota: Decimal('0') for nota in NOTAS}
+            if existente is not None:
+                valores = {nota: getattr(existente, nota) for nota in NOTAS}
+                anterior = estadisticas.aporte(
+                    grado, paralelo, asignatura_id, trimestre,
+                    existente.promedio_final_100, list(valores.values()),
+                )
+            valores.update(notas)
+
+            # Instancia nueva (sin pk) aunque la fila exista: el conflicto se
+            # resuelve por (estudiante, asignatura, trimestre), no por la clave primaria
+            calificacion = Calificacion(
+                estudiante_id=estudiante_id, asignatura_id=asignatura_id, trimestre=trimestre, **valores,
+            )
+            calificacion.calcular_promedios()
+            calificaciones.append(calificacion)
+            cambios.append((existente, calificacion))
+            aportes.append((anterior, estadisticas.aporte(
+                grado, paralelo, asignatura_id, trimestre,
+                calificacion.promedio_final_100, [getattr(calificacion, nota) for nota in NOTAS],
+            )))
+
+        Calificacion.objects.bulk_create(
+            calificaciones,
+            update_conflicts=True,
+            unique_fields=['estudiante', 'asignatura', 'trimestre'],
+            update_fields=CAMPOS_ACTUALIZADOS,
+            batch_size=500,
+        )
+        estadisticas.aplicar_varios(aportes)
+        actualizar_promedio_general(*ids)
+        # bulk_create no envía post_save: el contador suma solo las filas nuevas
+        insertadas = sum(1 for existente, _ in cambios if existente is None)
+        if insertadas:
+            contadores.sumar('calificaciones', insertadas)
+        incrementar_al_confirmar('calificaciones')
+        auditoria.registrar_al_confirmar([
+            (
+                'CREAR' if existente is None else 'ACTUALIZAR',
+                # Con RETURNING bulk_create asigna la clave también a las filas actualizadas
+                calificacion.pk or (existente.pk if existente is not None else None),
+                auditoria.datos(existente) if existente is not None else None,
+                auditoria.datos(calificacion),
+            )
+            for existente, calificacion in cambios
+        ])
+        en_vivo.publicar_al_confirmar([
+            (nuevo[0], en_vivo.fila(calificacion)) for calificacion, (_, nuevo) in zip(calificaciones, aportes)
+        ])
+    metricas.sumar('gesinfra_calificaciones_guardadas_total', len(calificaciones), via='masivo')
+    return calificaciones
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:13
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_promedios_generales(apps, schema_editor):
+    Estudiante = apps.get_model('calificaciones', 'Estudiante')
+    Calificacion = apps.get_model('calificaciones', 'Calificacion')
+
+    promedio = Calificacion.objects.filter(
+        estudiante_id=OuterRef('pk'),
+        promedio_final_100__gt=0,
+    ).values('estudiante_id').annotate(p=Avg('promedio_final_100')).values('p')
+
+    Estudiante.objects.using(schema_editor.connection.alias).update(
+        promedio_general=Coalesce(
+            Subquery(promedio, output_field=models.DecimalField(max_digits=4, decimal_places=2)),
+            Value(Decimal('0.00')),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calificaciones', '0004_auditoriacalificaciones_configuracionsistema_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estudiante',
+            name='promedio_general',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=4, verbose_name='Promedio General'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['nombres_completos'], name='estudiante_nombres_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estudiante',
+            index=models.Index(fields=['grado', 'paralelo', 'jornada', 'anio_lectivo'], name='estudiante_curso_idx'),
+        ),
+        migrations.RunPython(calcular_promedios_generales, migrations.RunPython.noop),
+    ]
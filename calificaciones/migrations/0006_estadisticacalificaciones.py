@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:19
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia fija de calificaciones/estadisticas.py al crear la tabla: la migración no
+# debe cambiar si después cambia ese módulo
+NOTA_APROBACION = Decimal('7')
+NOTA_SUPLETORIO = Decimal('5')
+NOTAS = ['leccion1', 'leccion2', 'actividad_experiencial', 'proyecto_interdisciplinar', 'examen']
+
+
+def cargar_estadisticas(apps, schema_editor):
+    Calificacion = apps.get_model('calificaciones', 'Calificacion')
+    EstadisticaCalificaciones = apps.get_model('calificaciones', 'EstadisticaCalificaciones')
+    db = schema_editor.connection.alias
+
+    resumenes = {}
+    filas = Calificacion.objects.using(db).values_list(
+        'estudiante__grado', 'estudiante__paralelo', 'asignatura_id', 'trimestre',
+        'promedio_final_100', *NOTAS,
+    )
+    for grado, paralelo, asignatura_id, trimestre, promedio, *notas in filas.iterator(chunk_size=5000):
+        clave = (grado, paralelo, asignatura_id, trimestre)
+        if clave not in resumenes:
+            resumenes[clave] = EstadisticaCalificaciones(
+                grado=grado, paralelo=paralelo, asignatura_id=asignatura_id, trimestre=trimestre,
+                histograma={}, suma_promedios=Decimal('0'),
+            )
+        resumen = resumenes[clave]
+        promedio = Decimal(str(promedio))
+        resumen.total_registros += 1
+        if all(Decimal(str(nota)) > 0 for nota in notas):
+            resumen.completos += 1
+        if promedio > 0:
+            resumen.con_promedio += 1
+            resumen.suma_promedios += promedio
+            if promedio >= NOTA_APROBACION:
+                resumen.aprobados += 1
+            elif promedio >= NOTA_SUPLETORIO:
+                resumen.supletorios += 1
+            else:
+                resumen.reprobados += 1
+            centesimas = str(int(promedio * 100))
+            resumen.histograma[centesimas] = resumen.histograma.get(centesimas, 0) + 1
+
+    EstadisticaCalificaciones.objects.using(db).bulk_create(resumenes.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calificaciones', '0005_estudiante_promedio_general_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaCalificaciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grado', models.CharField(choices=[('5EGB', '5.º de EGB'), ('6EGB', '6.º de EGB'), ('7EGB', '7.º de EGB'), ('8EGB', '8.º de EGB'), ('9EGB', '9.º de EGB'), ('10EGB', '10.º de EGB'), ('1BGU', '1.º de BGU'), ('2BGU', '2.º de BGU'), ('3BGU', '3.º de BGU')], max_length=10, verbose_name='Grado')),
+                ('paralelo', models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E')], max_length=1, verbose_name='Paralelo')),
+                ('trimestre', models.IntegerField(choices=[(1, 'Primer Trimestre'), (2, 'Segundo Trimestre'), (3, 'Tercer Trimestre')], verbose_name='Trimestre')),
+                ('total_registros', models.IntegerField(default=0, verbose_name='Registros')),
+                ('completos', models.IntegerField(default=0, verbose_name='Registros con las cinco notas')),
+                ('con_promedio', models.IntegerField(default=0, verbose_name='Registros con promedio')),
+                ('suma_promedios', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Suma de promedios')),
+                ('aprobados', models.IntegerField(default=0, verbose_name='Aprobados')),
+                ('supletorios', models.IntegerField(default=0, verbose_name='Supletorios')),
+                ('reprobados', models.IntegerField(default=0, verbose_name='Reprobados')),
+                ('histograma', models.JSONField(default=dict, verbose_name='Histograma')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('asignatura', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='calificaciones.asignatura', verbose_name='Asignatura')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Calificaciones',
+                'verbose_name_plural': 'Estadísticas de Calificaciones',
+                'ordering': ['grado', 'paralelo', 'asignatura', 'trimestre'],
+                'unique_together': {('grado', 'paralelo', 'asignatura', 'trimestre')},
+            },
+        ),
+        migrations.RunPython(cargar_estadisticas, migrations.RunPython.noop),
+    ]
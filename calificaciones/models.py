@@ -51,12 +51,20 @@ class Estudiante(models.Model):
     jornada = models.CharField(max_length=15, choices=JORNADA_CHOICES, verbose_name="Jornada")
     anio_lectivo = models.CharField(max_length=20, verbose_name="Año lectivo", help_text="Ejemplo: 2024-2025")
     
+    # Promedio de promedio_final_100 de sus calificaciones con datos (lo mantiene signals.py)
+    promedio_general = models.DecimalField(max_digits=4, decimal_places=2, editable=False, 
+                                          default=0, db_index=True, verbose_name="Promedio General")
+    
     fecha_registro = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['nombres_completos']
         verbose_name = "Estudiante"
         verbose_name_plural = "Estudiantes"
+        indexes = [
+            models.Index(fields=['nombres_completos'], name='estudiante_nombres_idx'),
+            models.Index(fields=['grado', 'paralelo', 'jornada', 'anio_lectivo'], name='estudiante_curso_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombres_completos} - {self.get_grado_display()} {self.paralelo}"
@@ -209,4 +217,105 @@ class Calificacion(models.Model):
         super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"{self.estudiante} - {self.asignatura} - T{self.trimestre}: {self.promedio_final_100}"
\ No newline at end of file
+        return f"{self.estudiante} - {self.asignatura} - T{self.trimestre}: {self.promedio_final_100}"
+
+class EstadisticaCalificaciones(models.Model):
+    """Resumen de calificaciones por grado, paralelo, asignatura y trimestre.
+    
+    Se actualiza de forma incremental cada vez que se guarda o elimina una
+    Calificacion (ver estadisticas.py), de modo que el dashboard no recorre
+    las calificaciones.
+    """
+    grado = models.CharField(max_length=10, choices=Estudiante.GRADO_CHOICES, verbose_name="Grado")
+    paralelo = models.CharField(max_length=1, choices=Estudiante.PARALELO_CHOICES, verbose_name="Paralelo")
+    asignatura = models.ForeignKey(Asignatura, on_delete=models.CASCADE, 
+                                  verbose_name="Asignatura", related_name='estadisticas')
+    trimestre = models.IntegerField(choices=Calificacion.TRIMESTRE_CHOICES, verbose_name="Trimestre")
+    
+    total_registros = models.IntegerField(default=0, verbose_name="Registros")
+    completos = models.IntegerField(default=0, verbose_name="Registros con las cinco notas")
+    con_promedio = models.IntegerField(default=0, verbose_name="Registros con promedio")
+    suma_promedios = models.DecimalField(max_digits=12, decimal_places=2, default=0, 
+                                        verbose_name="Suma de promedios")
+    aprobados = models.IntegerField(default=0, verbose_name="Aprobados")
+    supletorios = models.IntegerField(default=0, verbose_name="Supletorios")
+    reprobados = models.IntegerField(default=0, verbose_name="Reprobados")
+    # Cantidad de registros por promedio en centésimas: {"725": 3} = tres promedios de 7.25
+    histograma = models.JSONField(default=dict, verbose_name="Histograma")
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['grado', 'paralelo', 'asignatura', 'trimestre']
+        verbose_name = "Estadística de Calificaciones"
+        verbose_name_plural = "Estadísticas de Calificaciones"
+        unique_together = ['grado', 'paralelo', 'asignatura', 'trimestre']
+    
+    def __str__(self):
+        return f"{self.get_grado_display()} {self.paralelo} - {self.asignatura} - T{self.trimestre}"
+    
+    @property
+    def promedio(self):
+        if not self.con_promedio:
+            return Decimal('0.00')
+        return (self.suma_promedios / self.con_promedio).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
+    @property
+    def mediana(self):
+        return mediana_histograma(self.histograma, self.con_promedio)
+    
+    @property
+    def tasa_completitud(self):
+        """Porcentaje de registros que tienen las cinco notas ingresadas"""
+        if not self.total_registros:
+            return 0
+        return round(self.completos * 100 / self.total_registros, 1)
+
+
+def mediana_histograma(histograma, cantidad):
+    """Mediana a partir de un histograma {centésimas: cantidad}; recorre a lo sumo 1001 claves"""
+    if not cantidad:
+        return Decimal('0.00')
+    
+    posiciones = [(cantidad - 1) // 2, cantidad // 2]
+    valores = []
+    acumulado = 0
+    for centesimas in sorted(histograma, key=int):
+        acumulado += histograma[centesimas]
+        while posiciones and posiciones[0] < acumulado:
+            posiciones.pop(0)
+            valores.append(Decimal(int(centesimas)) / 100)
+        if not posiciones:
+            break
+    return (sum(valores) / 2).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class AuditoriaCalificaciones(models.Model):
+    """Cambio de una calificación: quién, desde dónde y los valores antes y después.
+
+    Las filas las escribe en lotes calificaciones/auditoria.py, así que
+    fecha_accion es el momento de la escritura (a lo sumo
+    GESINFRA_AUDITORIA_SEGUNDOS después del cambio).
+    """
+    ACCION_CHOICES = [
+        ('CREAR', 'Crear'),
+        ('ACTUALIZAR', 'Actualizar'),
+        ('ELIMINAR', 'Eliminar'),
+    ]
+    
+    id_auditoria = models.AutoField(primary_key=True)
+    calificacion = models.ForeignKey(Calificacion, on_delete=models.SET_NULL, null=True)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    accion = models.CharField(max_length=20, choices=ACCION_CHOICES)
+    datos_anteriores = models.JSONField(null=True, blank=True)
+    datos_nuevos = models.JSONField(null=True, blank=True)
+    fecha_accion = models.DateTimeField(auto_now_add=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-fecha_accion']
+        verbose_name = "Auditoría"
+        verbose_name_plural = "Auditorías"
+    
+    def __str__(self):
+        return f"{self.get_accion_display()} - {self.calificacion_id} - {self.fecha_accion:%Y-%m-%d %H:%M}"
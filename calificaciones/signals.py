@@ -0,0 +1,153 @@
+# calificaciones/signals.py
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from gesinfra_sistema import metricas
+from gesinfra_sistema.cache import incrementar_al_confirmar
+
+from .models import Estudiante, Docente, Asignatura, Calificacion
+from .autocompletar import obtener_indice
+from . import auditoria, en_vivo, estadisticas
+
+# La fila tal como está en la base antes de guardarla: su aporte al resumen y los datos para la auditoría
+CAMPOS_ANTERIORES = ['estudiante__grado', 'estudiante__paralelo', *auditoria.CLAVES, *auditoria.CAMPOS]
+
+
+def actualizar_promedio_general(*estudiante_ids):
+    """Recalcula Estudiante.promedio_general de uno o varios estudiantes con un único UPDATE"""
+    promedio = Calificacion.objects.filter(
+        estudiante_id=OuterRef('pk'),
+        promedio_final_100__gt=0,
+    ).values('estudiante_id').annotate(p=Avg('promedio_final_100')).values('p')
+
+    Estudiante.objects.filter(pk__in=estudiante_ids).update(
+        promedio_general=Coalesce(
+            Subquery(promedio, output_field=DecimalField(max_digits=4, decimal_places=2)),
+            Value(Decimal('0.00')),
+        )
+    )
+
+
+@receiver(post_save, sender=Calificacion)
+@receiver(post_delete, sender=Calificacion)
+def calificacion_modificada(sender, instance, **kwargs):
+    actualizar_promedio_general(instance.estudiante_id)
+    if kwargs.get('created') is not None:
+        metricas.sumar('gesinfra_calificaciones_guardadas_total', via='individual')
+
+
+# ========== ESTADÍSTICAS ==========
+
+@receiver(pre_save, sender=Calificacion)
+def calificacion_por_guardar(sender, instance, raw=False, **kwargs):
+    # Aporte que tenía la fila antes del cambio, para descontarlo del resumen, y
+    # sus datos para la auditoría; una sola consulta para los dos
+    instance._aporte_anterior = None
+    instance._datos_anteriores = None
+    if instance.pk and not raw:
+        fila = Calificacion.objects.filter(pk=instance.pk).values(*CAMPOS_ANTERIORES).first()
+        if fila is not None:
+            instance._aporte_anterior = estadisticas.aporte(
+                fila['estudiante__grado'], fila['estudiante__paralelo'], fila['asignatura_id'], fila['trimestre'],
+                fila['promedio_final_100'], [fila[nota] for nota in estadisticas.NOTAS],
+            )
+            instance._datos_anteriores = auditoria.datos_fila(fila)
+
+
+@receiver(post_save, sender=Calificacion)
+def calificacion_guardada(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    auditoria.registrar_al_confirmar([(
+        'CREAR' if created else 'ACTUALIZAR', instance.pk,
+        getattr(instance, '_datos_anteriores', None), auditoria.datos(instance),
+    )])
+    nuevo = estadisticas.aporte_instancia(instance)
+    estadisticas.aplicar(anterior=getattr(instance, '_aporte_anterior', None), nuevo=nuevo)
+    if nuevo is not None:
+        en_vivo.publicar_al_confirmar([(nuevo[0], en_vivo.fila(instance))])
+
+
+@receiver(post_delete, sender=Calificacion)
+def calificacion_eliminada(sender, instance, **kwargs):
+    anterior = estadisticas.aporte_instancia(instance)
+    estadisticas.aplicar(anterior=anterior)
+    # Sin calificacion: la fila ya no existe; CLAVES en datos_anteriores la identifican
+    auditoria.registrar_al_confirmar([('ELIMINAR', None, auditoria.datos(instance), None)])
+    if anterior is not None:
+        en_vivo.publicar_al_confirmar([(anterior[0], en_vivo.fila(instance, eliminada=True))])
+
+
+@receiver(pre_save, sender=Estudiante)
+def estudiante_por_guardar(sender, instance, raw=False, **kwargs):
+    # Grado y paralelo antes del cambio: si cambian, sus calificaciones pasan a otro resumen
+    instance._curso_anterior = None
+    if instance.pk and not raw:
+        instance._curso_anterior = Estudiante.objects.filter(pk=instance.pk).values_list(
+            'grado', 'paralelo'
+        ).first()
+
+
+@receiver(post_save, sender=Estudiante)
+def estudiante_guardado(sender, instance, raw=False, **kwargs):
+    anterior = getattr(instance, '_curso_anterior', None)
+    if raw or anterior is None or anterior == (instance.grado, instance.paralelo):
+        return
+    calificaciones = Calificacion.objects.filter(estudiante_id=instance.pk).values_list(
+        'asignatura_id', 'trimestre', 'promedio_final_100', *estadisticas.NOTAS,
+    )
+    # Cada calificación resta su aporte del curso anterior y lo suma en el nuevo
+    estadisticas.aplicar_varios([
+        (
+            estadisticas.aporte(*anterior, *fila[:3], fila[3:]),
+            estadisticas.aporte(instance.grado, instance.paralelo, *fila[:3], fila[3:]),
+        )
+        for fila in calificaciones
+    ])
+    incrementar_al_confirmar('calificaciones')
+
+
+# ========== AUTOCOMPLETADO ==========
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_save, sender=Docente)
+def persona_guardada(sender, instance, **kwargs):
+    indice = obtener_indice('estudiantes' if sender is Estudiante else 'docentes')
+    transaction.on_commit(
+        lambda: indice.actualizar(instance.pk, instance.nombres_completos, instance.cedula)
+    )
+
+
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_delete, sender=Docente)
+def persona_eliminada(sender, instance, **kwargs):
+    indice = obtener_indice('estudiantes' if sender is Estudiante else 'docentes')
+    pk = instance.pk
+    transaction.on_commit(lambda: indice.eliminar(pk))
+
+
+# ========== CACHE ==========
+
+VERSIONES_CACHE = {
+    Estudiante: 'estudiantes',
+    Docente: 'docentes',
+    Asignatura: 'asignaturas',
+    Calificacion: 'calificaciones',
+}
+
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_save, sender=Docente)
+@receiver(post_delete, sender=Docente)
+@receiver(post_save, sender=Asignatura)
+@receiver(post_delete, sender=Asignatura)
+@receiver(post_save, sender=Calificacion)
+@receiver(post_delete, sender=Calificacion)
+def modelo_modificado(sender, **kwargs):
+    incrementar_al_confirmar(VERSIONES_CACHE[sender])
@@ -0,0 +1,72 @@
+// calificaciones/static/calificaciones/autocompletar.js
+// Completa los <select data-autocompletar-url> de AutocompletarSelect (calificaciones/forms.py):
+// agrega un campo de búsqueda encima del select y carga en él las opciones que
+// devuelve el endpoint de autocompletado (nombre o cédula, desde 2 caracteres).
+(function () {
+    'use strict';
+
+    var ESPERA_MS = 250;
+
+    function preparar(select) {
+        if (select.dataset.autocompletarListo) {
+            return;
+        }
+        select.dataset.autocompletarListo = '1';
+
+        var buscador = document.createElement('input');
+        buscador.type = 'search';
+        buscador.className = select.className;
+        buscador.placeholder = 'Buscar por nombre o cédula...';
+        buscador.autocomplete = 'off';
+        select.parentNode.insertBefore(buscador, select);
+
+        var temporizador = null;
+        var ultimoPedido = 0;
+
+        function mostrar(resultados) {
+            var elegido = select.value;
+            Array.prototype.slice.call(select.options).forEach(function (opcion) {
+                if (opcion.value && opcion.value !== elegido) {
+                    select.removeChild(opcion);
+                }
+            });
+            resultados.forEach(function (resultado) {
+                if (String(resultado.id) === elegido) {
+                    return;
+                }
+                var texto = resultado.cedula ? resultado.texto + ' (' + resultado.cedula + ')' : resultado.texto;
+                select.appendChild(new Option(texto, resultado.id));
+            });
+        }
+
+        function buscar(texto) {
+            if (texto.length < 2) {
+                return;
+            }
+            var pedido = ++ultimoPedido;
+            fetch(select.dataset.autocompletarUrl + '?q=' + encodeURIComponent(texto), {credentials: 'same-origin'})
+                .then(function (respuesta) { return respuesta.json(); })
+                .then(function (datos) {
+                    // Una respuesta atrasada no pisa la de una búsqueda más nueva
+                    if (pedido === ultimoPedido) {
+                        mostrar(datos.resultados);
+                    }
+                });
+        }
+
+        buscador.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () { buscar(buscador.value.trim()); }, ESPERA_MS);
+        });
+    }
+
+    function prepararTodos() {
+        Array.prototype.forEach.call(document.querySelectorAll('select[data-autocompletar-url]'), preparar);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', prepararTodos);
+    } else {
+        prepararTodos();
+    }
+})();
@@ -1,3 +1,367 @@
-from django.test import TestCase
+# calificaciones/tests.py
+import datetime
+import unittest
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from gesinfra_sistema.cache import incrementar_version
+from usuarios.models import Contador
+
+from . import auditoria
+from .auditoria import EscritorAuditoria
+from .autocompletar import IndicePrefijos, obtener_indice
+from .busqueda import INDICE_ESTUDIANTES, buscar_estudiantes
+from .masivo import guardar_masivo
+from .views import _leer_promedio
+from .models import Estudiante, Asignatura, Calificacion, EstadisticaCalificaciones, AuditoriaCalificaciones
+
+
+class Curso:
+    """Un curso (8EGB A) con dos estudiantes y una asignatura"""
+
+    @classmethod
+    def crear_curso(cls):
+        cls.estudiantes = [
+            Estudiante.objects.create(
+                nombres_completos=f'Estudiante {n}', cedula=f'17000000{n}', fecha_nacimiento=datetime.date(2012, 1, n),
+                edad=13, sexo='F', nacionalidad='Ecuatoriana', lugar_nacimiento='Quito',
+                grado='8EGB', paralelo='A', jornada='MATUTINA', anio_lectivo='2025-2026',
+            )
+            for n in (1, 2)
+        ]
+        cls.asignatura = Asignatura.objects.create(nombre='MATEMATICA')
+
+    def calificar(self, estudiante, trimestre=1, **notas):
+        return Calificacion.objects.create(
+            estudiante=estudiante, asignatura=self.asignatura, trimestre=trimestre, **notas,
+        )
+
+    def resumen(self, trimestre=1):
+        return EstadisticaCalificaciones.objects.filter(
+            grado='8EGB', paralelo='A', asignatura=self.asignatura, trimestre=trimestre,
+        ).first()
+
+
+class HiloVivo:
+    # En lugar del hilo escritor: las pruebas vuelcan a mano
+    def is_alive(self):
+        return True
+
+
+class EscritorManual:
+    """Las señales encolan en el escritor global sin arrancar su hilo; lo pendiente se vuelca en la base de la prueba"""
+
+    def setUp(self):
+        parche = mock.patch.object(auditoria.escritor, 'hilo', HiloVivo())
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(auditoria.escritor.volcar)
+        super().setUp()
+
+
+class DatosCalificaciones(Curso, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.crear_curso()
+
+
+# ========== ESTADÍSTICAS ==========
+
+class EstadisticasIncrementalesTests(DatosCalificaciones):
+
+    def test_crear_actualizar_y_eliminar(self):
+        calificacion = self.calificar(self.estudiantes[0], leccion1=8, leccion2=8, actividad_experiencial=8,
+                                      proyecto_interdisciplinar=8, examen=8)
+        self.calificar(self.estudiantes[1], leccion1=4)
+        resumen = self.resumen()
+        self.assertEqual(resumen.total_registros, 2)
+        self.assertEqual(resumen.completos, 1)
+        self.assertEqual(resumen.aprobados, 1)
+        self.assertEqual(resumen.reprobados, 1)
+
+        calificacion.examen = 0
+        calificacion.proyecto_interdisciplinar = 0
+        calificacion.save()
+        resumen.refresh_from_db()
+        self.assertEqual(resumen.completos, 0)
+        self.assertEqual(resumen.aprobados, 0)
+        self.assertEqual(resumen.histograma, {'560': 1, '280': 1})
+
+        calificacion.delete()
+        resumen.refresh_from_db()
+        self.assertEqual(resumen.total_registros, 1)
+        self.assertEqual(resumen.suma_promedios, Decimal('2.80'))
+
+    def test_cambio_de_paralelo_mueve_sus_calificaciones(self):
+        estudiante = self.estudiantes[0]
+        calificacion = self.calificar(estudiante, leccion1=8, leccion2=8, actividad_experiencial=8,
+                                      proyecto_interdisciplinar=8, examen=8)
+        self.calificar(self.estudiantes[1], leccion1=4)
+        estudiante.paralelo = 'B'
+        estudiante.save()
+
+        resumen_a = self.resumen()
+        resumen_b = EstadisticaCalificaciones.objects.get(grado='8EGB', paralelo='B', trimestre=1)
+        self.assertEqual((resumen_a.total_registros, resumen_a.aprobados, resumen_a.reprobados), (1, 0, 1))
+        self.assertEqual((resumen_b.total_registros, resumen_b.completos, resumen_b.aprobados), (1, 1, 1))
+
+        # Editar y borrar después del cambio descuenta del paralelo nuevo, no del anterior
+        calificacion.examen = 0
+        calificacion.save()
+        resumen_b.refresh_from_db()
+        self.assertEqual((resumen_b.total_registros, resumen_b.completos), (1, 0))
+        calificacion.delete()
+        resumen_a.refresh_from_db()
+        resumen_b.refresh_from_db()
+        self.assertEqual((resumen_a.total_registros, resumen_b.total_registros), (1, 0))
+        self.assertEqual(resumen_b.histograma, {})
+        self.assertEqual(resumen_b.suma_promedios, 0)
+
+    def test_eliminar_asignatura_con_calificaciones(self):
+        # La cascada borra el resumen; restar el aporte no debe volver a crearlo
+        self.calificar(self.estudiantes[0], leccion1=9, examen=9)
+        self.calificar(self.estudiantes[1], trimestre=2, leccion1=6)
+        self.asignatura.delete()
+        self.assertFalse(Calificacion.objects.exists())
+        self.assertFalse(EstadisticaCalificaciones.objects.exists())
+
+
+# ========== GUARDADO MASIVO ==========
+
+class GuardadoMasivoTests(DatosCalificaciones):
+
+    def test_crea_y_actualiza_en_un_lote(self):
+        existente = self.calificar(self.estudiantes[0], leccion1=6, examen=4)
+        Contador.objects.update_or_create(nombre='calificaciones', defaults={'valor': 1})
+
+        guardadas = guardar_masivo(str(self.asignatura.pk), '1', [
+            {'estudiante_id': self.estudiantes[0].pk, 'examen': '8'},
+            {'estudiante_id': str(self.estudiantes[1].pk), 'leccion1': '5', 'examen': '7'},
+        ])
+        self.assertEqual(len(guardadas), 2)
+
+        existente.refresh_from_db()
+        self.assertEqual((existente.leccion1, existente.examen), (Decimal('6.00'), Decimal('8.00')))
+        nueva = Calificacion.objects.get(estudiante=self.estudiantes[1])
+        self.assertEqual((nueva.leccion1, nueva.examen), (Decimal('5.00'), Decimal('7.00')))
+        self.assertEqual(nueva.promedio_final_100, nueva.aporte_formativo_70 + nueva.aporte_sumativo_30)
+
+        # Solo la fila nueva suma al contador; el resumen cuenta cada fila una vez
+        self.assertEqual(Contador.obtener('calificaciones')['calificaciones'], 2)
+        self.assertEqual(self.resumen().total_registros, 2)
+
+        guardar_masivo(self.asignatura.pk, 1, [{'estudiante_id': self.estudiantes[1].pk, 'examen': '9'}])
+        self.assertEqual(Contador.obtener('calificaciones')['calificaciones'], 2)
+        self.assertEqual(Calificacion.objects.get(estudiante=self.estudiantes[1]).examen, Decimal('9.00'))
+
+    def test_datos_invalidos_no_escriben_nada(self):
+        invalidos = [
+            (self.asignatura.pk, 4, [{'estudiante_id': self.estudiantes[0].pk}]),
+            (self.asignatura.pk, 'x', [{'estudiante_id': self.estudiantes[0].pk}]),
+            (self.asignatura.pk + 1, 1, [{'estudiante_id': self.estudiantes[0].pk}]),
+            (self.asignatura.pk, 1, [{'examen': '5'}]),
+            (self.asignatura.pk, 1, [{'estudiante_id': self.estudiantes[0].pk, 'examen': 'nan'}]),
+            (self.asignatura.pk, 1, [{'estudiante_id': self.estudiantes[0].pk, 'examen': '11'}]),
+            (self.asignatura.pk, 1, [
+                {'estudiante_id': self.estudiantes[0].pk, 'examen': '5'},
+                {'estudiante_id': 999999, 'examen': '5'},
+            ]),
+        ]
+        for asignatura_id, trimestre, filas in invalidos:
+            with self.subTest(trimestre=trimestre, filas=filas), self.assertRaises(ValueError):
+                guardar_masivo(asignatura_id, trimestre, filas)
+        self.assertFalse(Calificacion.objects.exists())
+        self.assertFalse(EstadisticaCalificaciones.objects.exists())
+
+
+# ========== BÚSQUEDA ==========
+
+class BuscarEstudiantesTests(DatosCalificaciones):
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'FTS5 solo existe en SQLite')
+    def test_indice_fts_y_terminos_cortos(self):
+        self.assertTrue(INDICE_ESTUDIANTES.usar_para('estud', 'default'))
+        self.assertEqual(buscar_estudiantes('estud 170000002').get(), self.estudiantes[1])
+        # Un término corto va por icontains y encuentra el texto dentro de la palabra
+        self.assertFalse(INDICE_ESTUDIANTES.usar_para('te 1', 'default'))
+        self.assertEqual(buscar_estudiantes('te 1').get(), self.estudiantes[0])
+
+    def test_sin_tabla_fts_vuelve_a_icontains(self):
+        with mock.patch.object(INDICE_ESTUDIANTES, 'tabla', 'tabla_inexistente_fts'), \
+                mock.patch.object(INDICE_ESTUDIANTES, '_comprobadas', set()):
+            self.assertFalse(INDICE_ESTUDIANTES.disponible('default'))
+            self.assertEqual(buscar_estudiantes('estudiante 2').get(), self.estudiantes[1])
+
+    def test_promedio_de_la_busqueda_avanzada(self):
+        self.assertEqual(_leer_promedio('7.5'), Decimal('7.5'))
+        self.assertEqual(_leer_promedio('10'), Decimal('10'))
+        for valor in ('', 'abc', 'nan', 'NaN', 'snan', 'inf', '-Infinity', '-1', '10.01', '1e400'):
+            self.assertIsNone(_leer_promedio(valor), valor)
+
+
+# ========== FRAGMENTOS ==========
+
+@override_settings(GESINFRA_CANALES=False)
+class ClavesFragmentosTests(EscritorManual, DatosCalificaciones):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('docente'))
+
+    def claves(self, trimestre=1):
+        contexto = self.client.get(reverse('calificaciones:sistema_calificaciones'), {
+            'grado': '8EGB', 'paralelo': 'A', 'asignatura': self.asignatura.pk, 'trimestre': trimestre,
+        }).context
+        filas = {item['estudiante'].pk: item['clave_cache'] for item in contexto['estudiantes_con_calificaciones_list']}
+        return filas, contexto['clave_tabla']
+
+    def test_editar_una_nota_solo_cambia_su_fila(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            calificacion = self.calificar(self.estudiantes[0], leccion1=7)
+        filas, tabla = self.claves()
+
+        calificacion.leccion1 = 9
+        with self.captureOnCommitCallbacks(execute=True):
+            calificacion.save()
+        nuevas, nueva_tabla = self.claves()
+        self.assertNotEqual(nuevas[self.estudiantes[0].pk], filas[self.estudiantes[0].pk])
+        self.assertEqual(nuevas[self.estudiantes[1].pk], filas[self.estudiantes[1].pk])
+        self.assertNotEqual(nueva_tabla, tabla)
+        self.assertEqual(self.claves(), (nuevas, nueva_tabla))
+
+    def test_una_fila_sin_nota_depende_del_trimestre(self):
+        filas, tabla = self.claves()
+        otras, otra_tabla = self.claves(trimestre=2)
+        self.assertNotEqual(otras[self.estudiantes[1].pk], filas[self.estudiantes[1].pk])
+        self.assertNotEqual(otra_tabla, tabla)
+
+
+# ========== AUTOCOMPLETADO ==========
+
+class IndicePrefijosTests(DatosCalificaciones):
+
+    def test_busca_por_prefijo_y_cedula(self):
+        indice = IndicePrefijos('estudiantes', Estudiante, 'id_estudiante')
+        self.assertEqual([pk for pk, _, _ in indice.buscar('estu 2')], [self.estudiantes[1].pk])
+        self.assertEqual([pk for pk, _, _ in indice.buscar('170000001')], [self.estudiantes[0].pk])
+
+    def test_reconstruye_si_otro_proceso_cambio_la_version(self):
+        indice = IndicePrefijos('estudiantes', Estudiante, 'id_estudiante')
+        self.assertEqual(indice.buscar('núñez'), [])
+        # update() no dispara señales: es lo que ve un proceso que no hizo el cambio
+        Estudiante.objects.filter(pk=self.estudiantes[0].pk).update(nombres_completos='José Núñez')
+        self.assertEqual(indice.buscar('nunez'), [])
+        incrementar_version('autocompletado.estudiantes')
+        self.assertEqual(indice.buscar('nunez'), [(self.estudiantes[0].pk, 'José Núñez', '170000001')])
+
+    def test_un_cambio_propio_no_reconstruye(self):
+        indice = obtener_indice('estudiantes')
+        indice.construir()
+        # El índice es del proceso: lo que quede de la prueba no debe sobrevivir al rollback
+        self.addCleanup(incrementar_version, 'autocompletado.estudiantes')
+        estudiante = self.estudiantes[1]
+        estudiante.nombres_completos = 'María Peñafiel'
+        with mock.patch.object(indice, 'construir', wraps=indice.construir) as construir:
+            with self.captureOnCommitCallbacks(execute=True):
+                estudiante.save()
+            self.assertEqual([pk for pk, _, _ in indice.buscar('penaf')], [estudiante.pk])
+            self.assertEqual(indice.buscar('estudiante 2'), [])
+            construir.assert_not_called()
+
+            # Con otro cambio de por medio (otro proceso) sí se reconstruye
+            incrementar_version('autocompletado.estudiantes')
+            with self.captureOnCommitCallbacks(execute=True):
+                self.estudiantes[0].delete()
+            self.assertEqual(indice.buscar('estudiante'), [])
+            construir.assert_called_once()
+
+
+# ========== AUDITORÍA ==========
+
+@override_settings(GESINFRA_AUDITORIA_LOTE=1000, GESINFRA_AUDITORIA_SEGUNDOS=3600, GESINFRA_AUDITORIA_MAXIMO=3,
+                   GESINFRA_CANALES=False)
+class EscritorAuditoriaTests(EscritorManual, Curso, TransactionTestCase):
+    # Sin la transacción de TestCase: las claves foráneas se verifican en cada commit, como en el servidor
+
+    def setUp(self):
+        super().setUp()
+        self.crear_curso()
+
+    def evento(self, calificacion_id):
+        return AuditoriaCalificaciones(accion='ACTUALIZAR', calificacion_id=calificacion_id, datos_nuevos={})
+
+    def test_evento_de_calificacion_borrada_no_bloquea_el_lote(self):
+        valida = self.calificar(self.estudiantes[0], leccion1=7)
+        borrada = self.calificar(self.estudiantes[1], leccion1=5)
+        escritor = EscritorAuditoria()
+        escritor.pendientes = [self.evento(borrada.pk), self.evento(valida.pk)]
+        borrada.delete()
+
+        escritor.volcar()
+        self.assertEqual(escritor.pendientes, [])
+        self.assertEqual(
+            sorted(AuditoriaCalificaciones.objects.values_list('calificacion_id', flat=True), key=str),
+            sorted([None, valida.pk], key=str),
+        )
+
+    def test_la_lista_no_crece_sin_limite(self):
+        escritor = EscritorAuditoria()
+        escritor.hilo = type('Hilo', (), {'is_alive': lambda self: True})()
+        with self.assertLogs('calificaciones.auditoria', 'ERROR'):
+            for n in range(5):
+                escritor.agregar(self.evento(n))
+        self.assertEqual([evento.calificacion_id for evento in escritor.pendientes], [2, 3, 4])
+
+
+@override_settings(GESINFRA_CANALES=False)
+class AuditoriaSenalesTests(EscritorManual, Curso, TransactionTestCase):
+    # Sin la transacción de TestCase: on_commit encola en el momento y las claves foráneas se verifican al volcar
+
+    def setUp(self):
+        super().setUp()
+        self.crear_curso()
+
+    def auditorias(self):
+        auditoria.escritor.volcar()
+        return list(AuditoriaCalificaciones.objects.order_by('id_auditoria'))
+
+    def test_crear_actualizar_y_eliminar(self):
+        calificacion = self.calificar(self.estudiantes[0], leccion1=6)
+        calificacion.examen = 9
+        calificacion.save()
+        calificacion.save()  # sin cambios: no se audita
+        calificacion.delete()
+
+        crear, actualizar, eliminar = self.auditorias()
+        self.assertEqual((crear.accion, crear.datos_anteriores, crear.datos_nuevos['leccion1']), ('CREAR', None, '6.00'))
+        self.assertEqual((actualizar.datos_anteriores['examen'], actualizar.datos_nuevos['examen']), ('0.00', '9.00'))
+        # La calificación se eliminó antes del volcado: queda en NULL, como con SET_NULL
+        self.assertIsNone(actualizar.calificacion_id)
+        self.assertEqual(actualizar.datos_nuevos['trimestre'], 1)
+        self.assertEqual((eliminar.accion, eliminar.calificacion_id, eliminar.datos_nuevos), ('ELIMINAR', None, None))
+        self.assertEqual(eliminar.datos_anteriores['estudiante_id'], self.estudiantes[0].pk)
+
+    def test_cascada_de_asignatura(self):
+        self.calificar(self.estudiantes[0], leccion1=6)
+        self.calificar(self.estudiantes[1], leccion1=7)
+        self.asignatura.delete()
+        self.assertEqual([a.accion for a in self.auditorias()], ['CREAR', 'CREAR', 'ELIMINAR', 'ELIMINAR'])
+
+    def test_guardado_masivo(self):
+        existente = self.calificar(self.estudiantes[0], leccion1=6)
+        guardar_masivo(self.asignatura.pk, 1, [
+            {'estudiante_id': self.estudiantes[0].pk, 'examen': '8'},
+            {'estudiante_id': self.estudiantes[1].pk, 'leccion1': '5'},
+        ])
+        actualizar, crear = sorted(self.auditorias()[1:], key=lambda a: a.accion)
+        self.assertEqual((actualizar.accion, actualizar.calificacion_id), ('ACTUALIZAR', existente.pk))
+        self.assertEqual((actualizar.datos_anteriores['examen'], actualizar.datos_nuevos['examen']), ('0.00', '8.00'))
+        self.assertEqual((crear.accion, crear.datos_nuevos['leccion1']), ('CREAR', '5.00'))
+        self.assertEqual(crear.calificacion_id, Calificacion.objects.get(estudiante=self.estudiantes[1]).pk)
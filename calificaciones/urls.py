@@ -48,6 +48,8 @@ urlpatterns = [
     
     # ========== AJAX ==========
     path('guardar-masivo/', views.guardar_calificaciones_masivo, name='guardar_calificaciones_masivo'),
+    path('autocompletar/estudiantes/', views.autocompletar_estudiantes, name='autocompletar_estudiantes'),
+    path('autocompletar/docentes/', views.autocompletar_docentes, name='autocompletar_docentes'),
  path('boleta/<int:estudiante_id>/trimestre/<int:trimestre>/', 
          views.boleta_estudiante_trimestre, name='boleta_estudiante_trimestre'),
     path('boleta/pdf/<int:estudiante_id>/trimestre/<int:trimestre>/', 
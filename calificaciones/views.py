@@ -3,6 +3,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.core.paginator import Paginator
+from django.db import transaction
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, landscape, A4
 from reportlab.lib import colors
@@ -13,9 +15,23 @@ from io import BytesIO
 import datetime
 import json
 import csv
+import logging
 import traceback
-from .models import Estudiante, Docente, Asignatura, Calificacion
+from decimal import Decimal, InvalidOperation
+from gesinfra_sistema.cache import cachear, version_fragmento
+from gesinfra_sistema.reportes import vista_de_reportes
+from gesinfra_sistema.tiempos import medir
+from .models import Estudiante, Docente, Asignatura, Calificacion, EstadisticaCalificaciones
 from .forms import EstudianteForm, DocenteForm, AsignaturaForm, CalificacionForm
+from .busqueda import buscar_estudiantes
+from .autocompletar import obtener_indice
+from .estadisticas import NOTA_APROBACION, NOTA_SUPLETORIO, totalizar
+from .masivo import guardar_masivo
+
+logger = logging.getLogger(__name__)
+
+# Duración de los fragmentos de la tabla de calificaciones (sistema.html)
+SEGUNDOS_CACHE_FILA = 60 * 60
 
 @login_required
 def sistema_calificaciones(request):
@@ -71,13 +87,28 @@ def sistema_calificaciones(request):
         for cal in calificaciones:
             calificaciones_dict[cal.estudiante.id_estudiante] = cal
     
-    # Crear lista combinada de estudiantes con sus calificaciones
+    # Crear lista combinada de estudiantes con sus calificaciones.
+    # clave_cache identifica el fragmento de cada fila en la plantilla:
+    #   {% cache segundos_cache_fila 'calificaciones_tabla' clave_tabla %}
+    #     {% for item in estudiantes_con_calificaciones_list %}
+    #       {% cache segundos_cache_fila 'calificaciones_fila' item.clave_cache %}...{% endcache %}
+    #     {% endfor %}
+    #   {% endcache %}
+    # Al editar una nota cambia fecha_actualizacion de esa Calificacion y solo
+    # su fila se vuelve a renderizar; las demás salen del cache. Una fila sin
+    # nota depende de la asignatura y el trimestre mostrados, que van en la clave.
+    version_estudiantes = version_fragmento('estudiantes')
     estudiantes_con_calificaciones_list = []
     for estudiante in estudiantes:
         calificacion = calificaciones_dict.get(estudiante.id_estudiante)
+        if calificacion:
+            marca = f'{calificacion.pk}.{calificacion.fecha_actualizacion.timestamp():.6f}'
+        else:
+            marca = f'nueva.{asignatura.pk if asignatura else "-"}.{trimestre}'
         estudiantes_con_calificaciones_list.append({
             'estudiante': estudiante,
-            'calificacion': calificacion
+            'calificacion': calificacion,
+            'clave_cache': f'{version_estudiantes}.{estudiante.id_estudiante}.{marca}',
         })
     
     # Obtener datos para los filtros
@@ -135,6 +166,12 @@ def sistema_calificaciones(request):
         'docente_info': docente_info,
         'anio_lectivo': anio_lectivo,
         'trimestre_nombre': trimestre_nombre,
+        # Tabla completa: el curso y la asignatura seleccionados más la versión de sus datos
+        'clave_tabla': '.'.join([
+            grado, paralelo or '-', str(asignatura_id or '-'), str(trimestre),
+            version_fragmento('calificaciones', 'estudiantes'),
+        ]),
+        'segundos_cache_fila': SEGUNDOS_CACHE_FILA,
     }
     
     return render(request, 'calificaciones/sistema.html', context)
@@ -155,34 +192,36 @@ def guardar_calificaciones_ajax(request):
             if not all([estudiante_id, asignatura_id, trimestre, campo, valor is not None]):
                 return JsonResponse({'success': False, 'error': 'Datos incompletos'})
             
-            # Buscar o crear calificación
-            calificacion, created = Calificacion.objects.get_or_create(
-                estudiante_id=estudiante_id,
-                asignatura_id=asignatura_id,
-                trimestre=trimestre,
-                defaults={
-                    'leccion1': 0,
-                    'leccion2': 0,
-                    'actividad_experiencial': 0,
-                    'proyecto_interdisciplinar': 0,
-                    'examen': 0
-                }
-            )
+            # Una sola transacción (BEGIN IMMEDIATE): lectura, guardado y señales
+            with transaction.atomic():
+                # Buscar o crear calificación
+                calificacion, created = Calificacion.objects.get_or_create(
+                    estudiante_id=estudiante_id,
+                    asignatura_id=asignatura_id,
+                    trimestre=trimestre,
+                    defaults={
+                        'leccion1': 0,
+                        'leccion2': 0,
+                        'actividad_experiencial': 0,
+                        'proyecto_interdisciplinar': 0,
+                        'examen': 0
+                    }
+                )
             
-            # Actualizar campo
-            if campo == 'leccion1':
-                calificacion.leccion1 = float(valor) if valor else 0
-            elif campo == 'leccion2':
-                calificacion.leccion2 = float(valor) if valor else 0
-            elif campo == 'actividad_experiencial':
-                calificacion.actividad_experiencial = float(valor) if valor else 0
-            elif campo == 'proyecto_interdisciplinar':
-                calificacion.proyecto_interdisciplinar = float(valor) if valor else 0
-            elif campo == 'examen':
-                calificacion.examen = float(valor) if valor else 0
+                # Actualizar campo
+                if campo == 'leccion1':
+                    calificacion.leccion1 = float(valor) if valor else 0
+                elif campo == 'leccion2':
+                    calificacion.leccion2 = float(valor) if valor else 0
+                elif campo == 'actividad_experiencial':
+                    calificacion.actividad_experiencial = float(valor) if valor else 0
+                elif campo == 'proyecto_interdisciplinar':
+                    calificacion.proyecto_interdisciplinar = float(valor) if valor else 0
+                elif campo == 'examen':
+                    calificacion.examen = float(valor) if valor else 0
             
-            # Guardar y recalcular
-            calificacion.save()
+                # Guardar y recalcular
+                calificacion.save()
             
             return JsonResponse({
                 'success': True,
@@ -198,6 +237,7 @@ def guardar_calificaciones_ajax(request):
 
 
 @login_required
+@vista_de_reportes
 def generar_pdf_sistema_calificaciones(request):
     """Generar PDF de la tabla del sistema de calificaciones"""
     # Obtener parámetros
@@ -377,7 +417,8 @@ def generar_pdf_sistema_calificaciones(request):
     elements.append(footer)
     
     # Generar PDF
-    doc.build(elements)
+    with medir('pdf'):
+        doc.build(elements)
     pdf = buffer.getvalue()
     buffer.close()
     
@@ -421,8 +462,10 @@ def lista_calificaciones(request):
     GRADOS_EGB_SUPERIOR = ['8EGB', '9EGB', '10EGB']
     
     # Obtener grados disponibles de los estudiantes
-    grados_disponibles = Estudiante.objects.values_list('grado', flat=True).distinct().order_by('grado')
-    paralelos = Estudiante.objects.values_list('paralelo', flat=True).distinct().order_by('paralelo')
+    grados_disponibles, paralelos = cachear('calificaciones:grados_paralelos', ['estudiantes'], lambda: (
+        list(Estudiante.objects.values_list('grado', flat=True).distinct().order_by('grado')),
+        list(Estudiante.objects.values_list('paralelo', flat=True).distinct().order_by('paralelo')),
+    ))
     
     # Organizar grados por nivel
     grados_media = [g for g in GRADOS_EGB_MEDIA if g in grados_disponibles]
@@ -454,7 +497,7 @@ def lista_estudiantes(request):
 @login_required
 def lista_docentes(request):
     """Lista de docentes"""
-    docentes = Docente.objects.all()
+    docentes = cachear('calificaciones:docentes', ['docentes'], lambda: list(Docente.objects.all()))
     
     return render(request, 'calificaciones/docentes/lista.html', {
         'docentes': docentes,
@@ -463,7 +506,10 @@ def lista_docentes(request):
 @login_required
 def lista_asignaturas(request):
     """Lista de asignaturas"""
-    asignaturas = Asignatura.objects.all()
+    asignaturas = cachear(
+        'calificaciones:asignaturas', ['asignaturas', 'docentes'],
+        lambda: list(Asignatura.objects.select_related('docente')),
+    )
     
     return render(request, 'calificaciones/asignaturas/lista.html', {
         'asignaturas': asignaturas,
@@ -786,6 +832,7 @@ def boleta_estudiante_trimestre(request, estudiante_id, trimestre):
         return redirect('calificaciones:lista_estudiantes')
 
 @login_required
+@vista_de_reportes
 def generar_pdf_boleta_trimestre(request, estudiante_id, trimestre):
     """Generar PDF de la boleta por trimestre con diseño profesional"""
     try:
@@ -1382,7 +1429,8 @@ def generar_pdf_boleta_trimestre(request, estudiante_id, trimestre):
         elements.append(Paragraph(footer_text, footer_style))
         
         # ========== GENERAR PDF ==========
-        doc.build(elements)
+        with medir('pdf'):
+            doc.build(elements)
         pdf = buffer.getvalue()
         buffer.close()
         
@@ -1427,6 +1475,7 @@ def boleta_calificaciones(request):
     })
 
 @login_required
+@vista_de_reportes
 def generar_reporte_pdf(request, estudiante_id):
     """Generar PDF de reporte de calificaciones por estudiante"""
     try:
@@ -1607,7 +1656,8 @@ def generar_reporte_pdf(request, estudiante_id):
         elements.append(footer)
         
         # Generar PDF
-        doc.build(elements)
+        with medir('pdf'):
+            doc.build(elements)
         
         # Obtener el PDF del buffer
         pdf = buffer.getvalue()
@@ -1628,25 +1678,181 @@ def generar_reporte_pdf(request, estudiante_id):
         return HttpResponse(f"Error generando PDF: {str(e)}", status=500)
 
 @login_required
+@vista_de_reportes
 def dashboard_estadisticas(request):
-    """Dashboard de estadísticas"""
-    return render(request, 'calificaciones/dashboard/estadisticas.html')
+    """Dashboard de estadísticas leído de la tabla de resumen (no recorre calificaciones)"""
+    grado = request.GET.get('grado', '')
+    paralelo = request.GET.get('paralelo', '')
+    asignatura_id = request.GET.get('asignatura', '')
+    trimestre = request.GET.get('trimestre', '')
+    
+    estadisticas = EstadisticaCalificaciones.objects.select_related('asignatura').filter(total_registros__gt=0)
+    if grado:
+        estadisticas = estadisticas.filter(grado=grado)
+    if paralelo:
+        estadisticas = estadisticas.filter(paralelo=paralelo)
+    if asignatura_id.isdigit():
+        estadisticas = estadisticas.filter(asignatura_id=asignatura_id)
+    if trimestre.isdigit():
+        estadisticas = estadisticas.filter(trimestre=trimestre)
+    estadisticas = cachear(
+        'calificaciones:estadisticas', ['calificaciones', 'estudiantes', 'asignaturas'],
+        lambda: list(estadisticas), grado, paralelo, asignatura_id, trimestre,
+    )
+    
+    context = {
+        'estadisticas': estadisticas,
+        'total': totalizar(estadisticas),
+        'nota_aprobacion': NOTA_APROBACION,
+        'nota_supletorio': NOTA_SUPLETORIO,
+        'grado': grado,
+        'paralelo': paralelo,
+        'asignatura_id': asignatura_id,
+        'trimestre': trimestre,
+        'grado_choices': Estudiante.GRADO_CHOICES,
+        'paralelo_choices': Estudiante.PARALELO_CHOICES,
+        'trimestre_choices': Calificacion.TRIMESTRE_CHOICES,
+        'asignaturas': cachear(
+            'calificaciones:asignaturas', ['asignaturas', 'docentes'],
+            lambda: list(Asignatura.objects.select_related('docente')),
+        ),
+    }
+    return render(request, 'calificaciones/dashboard/estadisticas.html', context)
+
+def _leer_promedio(valor):
+    """Decimal entre 0 y 10, o None si valor está vacío, no es un número finito o se sale del rango"""
+    try:
+        promedio = Decimal(valor)
+    except InvalidOperation:
+        return None
+    # Decimal acepta 'nan', 'inf' y 'snan', que la consulta no puede comparar
+    if not promedio.is_finite() or not Decimal('0') <= promedio <= Decimal('10'):
+        return None
+    return promedio
 
 @login_required
 def busqueda_avanzada(request):
-    """Búsqueda avanzada"""
-    return render(request, 'calificaciones/busqueda/avanzada.html')
+    """Búsqueda avanzada de estudiantes por nombre, cédula, curso y promedio"""
+    texto = request.GET.get('q', '').strip()
+    grado = request.GET.get('grado', '')
+    paralelo = request.GET.get('paralelo', '')
+    jornada = request.GET.get('jornada', '')
+    anio_lectivo = request.GET.get('anio_lectivo', '').strip()
+    
+    # Rango de promedio (0-10); valores no válidos se ignoran
+    promedios = {}
+    for campo in ('promedio_min', 'promedio_max'):
+        valor = request.GET.get(campo, '').strip().replace(',', '.')
+        promedios[campo] = _leer_promedio(valor)
+        if valor and promedios[campo] is None:
+            messages.warning(request, f'El valor "{valor}" no es un promedio válido (0 a 10)')
+    
+    # Sin criterios no se lista toda la tabla de estudiantes
+    hay_criterios = any([texto, grado, paralelo, jornada, anio_lectivo,
+                         promedios['promedio_min'] is not None,
+                         promedios['promedio_max'] is not None])
+    
+    pagina = None
+    if hay_criterios:
+        estudiantes = buscar_estudiantes(
+            texto=texto,
+            grado=grado,
+            paralelo=paralelo,
+            jornada=jornada,
+            anio_lectivo=anio_lectivo,
+            promedio_min=promedios['promedio_min'],
+            promedio_max=promedios['promedio_max'],
+        )
+        pagina = Paginator(estudiantes, 50).get_page(request.GET.get('page'))
+    
+    context = {
+        'pagina': pagina,
+        'estudiantes': pagina.object_list if pagina else [],
+        'total_resultados': pagina.paginator.count if pagina else 0,
+        'hay_criterios': hay_criterios,
+        'query': texto,
+        'grado_filtro': grado,
+        'paralelo_filtro': paralelo,
+        'jornada_filtro': jornada,
+        'anio_lectivo_filtro': anio_lectivo,
+        'promedio_min': promedios['promedio_min'],
+        'promedio_max': promedios['promedio_max'],
+        'GRADO_CHOICES': Estudiante.GRADO_CHOICES,
+        'PARALELO_CHOICES': Estudiante.PARALELO_CHOICES,
+        'JORNADA_CHOICES': Estudiante.JORNADA_CHOICES,
+    }
+    
+    return render(request, 'calificaciones/busqueda/avanzada.html', context)
 
 # ========== AJAX ==========
 
+def _autocompletar(request, nombre_indice):
+    """Respuesta JSON común para los endpoints de autocompletado"""
+    texto = request.GET.get('q', '').strip()
+    if len(texto) < 2:
+        return JsonResponse({'resultados': []})
+    
+    resultados = obtener_indice(nombre_indice).buscar(texto, limite=15)
+    return JsonResponse({
+        'resultados': [
+            {'id': pk, 'texto': nombres, 'cedula': cedula}
+            for pk, nombres, cedula in resultados
+        ]
+    })
+
+@login_required
+def autocompletar_estudiantes(request):
+    """Autocompletado de estudiantes por nombre o cédula (AJAX)"""
+    return _autocompletar(request, 'estudiantes')
+
+@login_required
+def autocompletar_docentes(request):
+    """Autocompletado de docentes por nombre o cédula (AJAX)"""
+    return _autocompletar(request, 'docentes')
+
 @login_required
 def guardar_calificaciones_masivo(request):
     """Guardar calificaciones masivas (AJAX)"""
     if request.method == 'POST':
-        return JsonResponse({'success': True})
-    return JsonResponse({'success': False})
+        try:
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                return JsonResponse({'success': False, 'error': 'Datos incompletos'})
+            asignatura_id = data.get('asignatura_id')
+            trimestre = data.get('trimestre')
+            filas = data.get('calificaciones') or []
+            
+            if not all([asignatura_id, trimestre, filas]):
+                return JsonResponse({'success': False, 'error': 'Datos incompletos'})
+            
+            # Un solo INSERT ... ON CONFLICT DO UPDATE para todo el curso (ver masivo.py)
+            calificaciones = guardar_masivo(asignatura_id, trimestre, filas)
+            
+        except ValueError as e:
+            # JSON mal formado o datos rechazados por guardar_masivo: el mensaje es para el usuario
+            return JsonResponse({'success': False, 'error': str(e)})
+        except Exception:
+            logger.exception('Error al guardar calificaciones masivas')
+            return JsonResponse({'success': False, 'error': 'No se pudieron guardar las calificaciones'})
+        else:
+            return JsonResponse({
+                'success': True,
+                'guardadas': len(calificaciones),
+                'calificaciones': [
+                    {
+                        'estudiante_id': calificacion.estudiante_id,
+                        'promedio_formativo': float(calificacion.aporte_formativo_70),
+                        'promedio_sumativo': float(calificacion.aporte_sumativo_30),
+                        'promedio_final': float(calificacion.promedio_final_100),
+                    }
+                    for calificacion in calificaciones
+                ],
+            })
+    
+    return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 @login_required
+@vista_de_reportes
 def generar_reporte_general_estudiantes(request):
     """Generar reporte general de todos los estudiantes"""
     # Obtener parámetros de filtro
@@ -1672,8 +1878,8 @@ def generar_reporte_general_estudiantes(request):
                      'Edad', 'Sexo', 'Fecha Nacimiento', 'Nacionalidad', 
                      'Lugar Nacimiento', 'Jornada', 'Año Lectivo', 'Fecha Registro'])
     
-    # Datos
-    for estudiante in estudiantes:
+    # Datos: iterator() lee por bloques (cursor de servidor en PostgreSQL) sin cargar toda la tabla
+    for estudiante in estudiantes.iterator(chunk_size=2000):
         writer.writerow([
             estudiante.id_estudiante,
             estudiante.nombres_completos,
@@ -0,0 +1,41 @@
+# gesinfra_sistema/admin.py
+from django.conf import settings
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+
+from . import perfiles as perfiles_guardados
+from .consultas_lentas import resumen_por_huella, rutas_archivos
+
+
+def consultas_lentas(request):
+    """Consultas lentas del archivo rotativo agrupadas por huella (solo staff, ver urls.py)"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Consultas lentas',
+        'resumen': resumen_por_huella(),
+        'umbral_ms': settings.GESINFRA_CONSULTA_LENTA_MS,
+        'archivos': rutas_archivos(),
+    }
+    return TemplateResponse(request, 'admin/gesinfra/consultas_lentas.html', context)
+
+
+def perfiles(request):
+    """Perfiles bajo demanda más recientes (?_perfil=1 en cualquier URL siendo staff)"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfiles de peticiones',
+        'perfiles': perfiles_guardados.listar(),
+        'parametro': perfiles_guardados.PARAMETRO,
+        'directorio': perfiles_guardados.directorio(),
+    }
+    return TemplateResponse(request, 'admin/gesinfra/perfiles.html', context)
+
+
+def perfil_archivo(request, nombre, extension):
+    """Descarga el .prof (pstats, snakeviz) o el .collapsed (flamegraph.pl, speedscope) de un perfil"""
+    ruta = perfiles_guardados.ruta_archivo(nombre, extension)
+    if ruta is None:
+        raise Http404('Perfil no encontrado')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=f'{nombre}.{extension}',
+                        content_type=perfiles_guardados.EXTENSIONES[extension])
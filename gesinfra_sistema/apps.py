@@ -0,0 +1,11 @@
+# gesinfra_sistema/apps.py
+from django.apps import AppConfig
+
+
+class GesinfraSistemaConfig(AppConfig):
+    name = 'gesinfra_sistema'
+    verbose_name = 'GESINFRA'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from . import consultas_lentas  # noqa: F401  (envoltorio en cada conexión)
@@ -3,6 +3,12 @@ ASGI config for gesinfra_sistema project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Los dashboards son vistas async que reparten sus consultas en paralelo
+(gesinfra_sistema/concurrente.py) y la tabla de calificaciones se actualiza por
+websocket (calificaciones/en_vivo.py); se sirven con un servidor ASGI, p. ej.:
+
+    uvicorn gesinfra_sistema.asgi:application --workers 4   (uvicorn[standard], con websockets)
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -13,4 +19,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gesinfra_sistema.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from calificaciones import en_vivo  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Websockets propios (sin Channels); todo lo demás lo atiende Django
+    if scope['type'] == 'websocket':
+        if scope['path'] == en_vivo.RUTA:
+            await en_vivo.websocket(scope, receive, send)
+        else:
+            await receive()
+            await send({'type': 'websocket.close'})
+        return
+    await django_application(scope, receive, send)
+
+# Índices de autocompletado en memoria (calificaciones/autocompletar.py)
+from calificaciones.autocompletar import precargar_indices  # noqa: E402
+precargar_indices()
+
+# Avisos de configuraciones lentas (gesinfra_sistema/checks.py)
+from gesinfra_sistema.checks import advertir_al_iniciar  # noqa: E402
+advertir_al_iniciar()
@@ -0,0 +1,54 @@
+# gesinfra_sistema/benchmark.py
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def base_temporal(using='default', verbosity=0):
+    """Crea una base de datos de prueba desechable para un benchmark.
+
+    Usa la misma maquinaria que el runner de tests (create_test_db), así los
+    datos sintéticos nunca tocan la base real.
+    """
+    connection = connections[using]
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=verbosity)
+
+
+def medir(funcion, repeticiones=20, calentamiento=1):
+    """Ejecuta funcion varias veces y devuelve estadísticas en milisegundos"""
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    tiempos.sort()
+    return {
+        'min': tiempos[0],
+        'mediana': statistics.median(tiempos),
+        'p95': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        'max': tiempos[-1],
+    }
+
+
+def tabla_resultados(resultados):
+    """Formatea {nombre: estadísticas} como tabla de texto"""
+    ancho = max(len(nombre) for nombre in resultados)
+    lineas = [f"{'caso'.ljust(ancho)}  {'min':>9}  {'mediana':>9}  {'p95':>9}  {'max':>9}"]
+    for nombre, r in resultados.items():
+        lineas.append(
+            f"{nombre.ljust(ancho)}  {r['min']:>7.2f}ms  {r['mediana']:>7.2f}ms  "
+            f"{r['p95']:>7.2f}ms  {r['max']:>7.2f}ms"
+        )
+    return '\n'.join(lineas)
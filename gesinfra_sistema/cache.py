@@ -0,0 +1,121 @@
+# gesinfra_sistema/cache.py
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metricas
+from .reportes import instantanea_en_uso
+
+# Versiones que bumpean las señales de cada app (signals.py) con post_save/post_delete
+VERSIONES = [
+    'estudiantes',      # calificaciones.Estudiante
+    'calificaciones',   # calificaciones.Calificacion
+    'docentes',         # calificaciones.Docente
+    'asignaturas',      # calificaciones.Asignatura
+    'equipos',          # inventario.Equipo
+    'mantenimientos',   # inventario.Mantenimiento
+    'encuestas',        # accesibilidad.EncuestaBarreras
+    'instituciones',    # accesibilidad.InstitucionEducativa
+    'puntajes',         # accesibilidad.PuntajeInstitucion / ResumenRegional (ranking nacional)
+    # 'puntajes.<provincia>': ranking de una provincia (accesibilidad/ranking.py)
+]
+
+
+def _clave_version(nombre):
+    return f'version:{nombre}'
+
+
+def versiones(*nombres):
+    """Versión actual de cada nombre, leídas en una sola llamada al cache"""
+    claves = {_clave_version(nombre): nombre for nombre in nombres}
+    encontradas = cache.get_many(claves)
+    faltantes = [clave for clave in claves if clave not in encontradas]
+    for clave in faltantes:
+        # Versión perdida (reinicio, expulsión): una nueva basada en el reloj
+        # garantiza que no se reutilicen claves guardadas con la anterior
+        cache.add(clave, time.time_ns(), None)
+    if faltantes:
+        encontradas.update(cache.get_many(faltantes))
+    return [encontradas[_clave_version(nombre)] for nombre in nombres]
+
+
+def incrementar_version(nombre):
+    """Invalida todo lo cacheado que depende de nombre; devuelve la versión nueva"""
+    clave = _clave_version(nombre)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(clave, version, None)
+        return version
+
+
+def incrementar_al_confirmar(*nombres):
+    """incrementar_version tras el commit: antes, otra petición podría volver a
+    cachear los datos viejos con la versión nueva.
+    """
+    def incrementar():
+        for nombre in nombres:
+            incrementar_version(nombre)
+    transaction.on_commit(incrementar)
+
+
+def clave_versionada(prefijo, dependencias, *partes):
+    """'prefijo:v1.v2[@instantánea]:hash(partes)'; cambia en cuanto cambia alguna de las dependencias"""
+    version = '.'.join(str(v) for v in versiones(*dependencias))
+    tomada = instantanea_en_uso()
+    if tomada is not None:
+        # Calculado desde la base de reportes: puede ir atrasado respecto de la
+        # versión, así que no se comparte con lo calculado desde la principal
+        version = f'{version}@{tomada:.0f}'
+    if not partes:
+        return f'{prefijo}:{version}'
+    detalle = hashlib.md5(repr(partes).encode('utf-8')).hexdigest()
+    return f'{prefijo}:{version}:{detalle}'
+
+
+# Distingue "no está en el cache" de un resultado None guardado
+_FALTA = object()
+
+
+def cachear(prefijo, dependencias, calcular, *partes, timeout=None):
+    """Devuelve el resultado cacheado de calcular() o lo calcula y lo guarda.
+
+    partes distingue variantes del mismo resultado (filtros, página...). El
+    resultado debe poder serializarse con pickle: listas o dicts, no querysets
+    perezosos. Conviene cachear agregados o listas acotadas: la clave cambia
+    con cada guardado de las dependencias, así que una tabla entera se
+    vuelve a leer igual y solo ocupa memoria.
+    """
+    clave = clave_versionada(prefijo, dependencias, *partes)
+    resultado = cache.get(clave, _FALTA)
+    metricas.sumar('gesinfra_cache_consultas_total', resultado=('fallo' if resultado is _FALTA else 'acierto'))
+    if resultado is _FALTA:
+        resultado = calcular()
+        if timeout is None:
+            cache.set(clave, resultado)
+        else:
+            cache.set(clave, resultado, timeout)
+    return resultado
+
+
+async def acachear(prefijo, dependencias, calcular, *partes, timeout=None):
+    """cachear() para vistas async: calcular() devuelve un awaitable (p. ej. en_paralelo)"""
+    clave = await sync_to_async(clave_versionada)(prefijo, dependencias, *partes)
+    resultado = await cache.aget(clave, _FALTA)
+    metricas.sumar('gesinfra_cache_consultas_total', resultado=('fallo' if resultado is _FALTA else 'acierto'))
+    if resultado is _FALTA:
+        resultado = await calcular()
+        if timeout is None:
+            await cache.aset(clave, resultado)
+        else:
+            await cache.aset(clave, resultado, timeout)
+    return resultado
+
+
+def version_fragmento(*dependencias):
+    """Texto para el vary_on de {% cache %}: el fragmento se regenera cuando cambia alguna dependencia"""
+    return '.'.join(str(v) for v in versiones(*dependencias))
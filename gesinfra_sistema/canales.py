@@ -0,0 +1,284 @@
+# gesinfra_sistema/canales.py
+import asyncio
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+from django.http.request import validate_host
+
+logger = logging.getLogger('gesinfra_sistema.canales')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensaje (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grupo TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    fecha REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mensaje_fecha ON mensaje (fecha);
+CREATE TABLE IF NOT EXISTS escucha (
+    grupo TEXT NOT NULL,
+    proceso INTEGER NOT NULL,
+    hasta REAL NOT NULL,
+    PRIMARY KEY (grupo, proceso)
+);
+"""
+
+# Mensajes pendientes por websocket; si el cliente no los lee a tiempo se le pide recargar
+MAXIMO_PENDIENTES = 200
+RECARGAR = json.dumps({'tipo': 'recargar'})
+
+# Segundos que vale el anuncio de los grupos que escucha un proceso; se renueva a la mitad
+VIGENCIA_ESCUCHA = 10
+
+# Una conexión por hilo y archivo, abierta en el primer uso; el esquema se crea una vez por proceso
+_local = threading.local()
+_preparados = set()
+
+
+def _conexion():
+    ruta = settings.GESINFRA_CANALES_PATH
+    conexiones = _local.__dict__.setdefault('conexiones', {})
+    conexion = conexiones.get(ruta)
+    if conexion is None:
+        conexion = sqlite3.connect(ruta, timeout=10)
+        if ruta not in _preparados:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(ESQUEMA)
+            _preparados.add(ruta)
+        conexiones[ruta] = conexion
+    return conexion
+
+
+def _descartar():
+    # Tras un error (archivo borrado, bloqueado...) el próximo uso abre la conexión y el esquema de nuevo
+    ruta = settings.GESINFRA_CANALES_PATH
+    _preparados.discard(ruta)
+    conexion = _local.__dict__.get('conexiones', {}).pop(ruta, None)
+    if conexion is not None:
+        conexion.close()
+
+
+def _descartar_si_falla(funcion):
+    # Para lo que corre en los hilos de asyncio.to_thread: la conexión a descartar es la de ese hilo
+    @functools.wraps(funcion)
+    def envoltura(*args):
+        try:
+            return funcion(*args)
+        except sqlite3.Error:
+            _descartar()
+            raise
+    return envoltura
+
+
+def _reiniciar():
+    # Un hijo de fork no usa las conexiones del padre
+    _local.__dict__.pop('conexiones', None)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar)
+
+
+# ========== PUBLICACIÓN ==========
+
+def publicar(mensajes):
+    """Agrega [(grupo, datos), ...] al archivo compartido; los reparte el proceso de cada websocket.
+
+    Se llama después del commit (transaction.on_commit). Solo se escriben los
+    mensajes de grupos que algún proceso escucha (tabla escucha). Si el
+    archivo está ocupado los mensajes se pierden: la tabla recargada siempre
+    muestra lo guardado, esto solo evita tener que recargarla.
+    """
+    if not settings.GESINFRA_CANALES or not mensajes:
+        return
+    ahora = time.time()
+    try:
+        conexion = _conexion()
+        escuchados = {
+            grupo for grupo, in conexion.execute('SELECT DISTINCT grupo FROM escucha WHERE hasta > ?', (ahora,))
+        }
+        mensajes = [(grupo, datos) for grupo, datos in mensajes if escuchados.intersection(_contenedores(grupo))]
+        if not mensajes:
+            return
+        with conexion:
+            conexion.executemany(
+                'INSERT INTO mensaje (grupo, datos, fecha) VALUES (?, ?, ?)',
+                [(grupo, json.dumps(datos, default=str), ahora) for grupo, datos in mensajes],
+            )
+    except sqlite3.Error:
+        _descartar()
+        logger.warning('No se pudieron publicar %d mensajes', len(mensajes), exc_info=True)
+
+
+@_descartar_si_falla
+def _ultimo_id():
+    return _conexion().execute('SELECT COALESCE(MAX(id), 0) FROM mensaje').fetchone()[0]
+
+
+@_descartar_si_falla
+def _leer_desde(ultimo):
+    return _conexion().execute('SELECT id, grupo, datos FROM mensaje WHERE id > ? ORDER BY id', (ultimo,)).fetchall()
+
+
+@_descartar_si_falla
+def _anunciar(grupos, ahora):
+    """Reemplaza los grupos que escucha este proceso y borra escuchas y mensajes vencidos"""
+    conexion = _conexion()
+    proceso = os.getpid()
+    with conexion:
+        conexion.execute('DELETE FROM escucha WHERE proceso = ? OR hasta < ?', (proceso, ahora))
+        conexion.executemany(
+            'INSERT INTO escucha (grupo, proceso, hasta) VALUES (?, ?, ?)',
+            [(grupo, proceso, ahora + VIGENCIA_ESCUCHA) for grupo in grupos],
+        )
+        conexion.execute('DELETE FROM mensaje WHERE fecha < ?', (ahora - settings.GESINFRA_CANALES_RETENCION,))
+
+
+def _contenedores(grupo):
+    # 'a:b:c:' -> 'a:', 'a:b:', 'a:b:c:': quien escucha 'a:b:' recibe también lo de 'a:b:c:'
+    partes = grupo.split(':')[:-1]
+    return [':'.join(partes[:n]) + ':' for n in range(1, len(partes) + 1)]
+
+
+# ========== SUSCRIPCIONES ==========
+
+class Suscripciones:
+    """Websockets abiertos en este proceso, por grupo.
+
+    Mientras haya alguno, una tarea lee los mensajes nuevos del archivo
+    compartido cada GESINFRA_CANALES_INTERVALO segundos y los deja en la cola
+    de cada websocket del grupo. Así un guardado en cualquier proceso (WSGI o
+    ASGI) llega a los websockets de todos. La misma tarea anuncia sus grupos
+    en la tabla escucha (al cambiar y cada VIGENCIA_ESCUCHA / 2 segundos) y
+    entonces borra los mensajes de más de GESINFRA_CANALES_RETENCION segundos.
+    """
+
+    def __init__(self):
+        self.grupos = {}
+        self.tarea = None
+
+    def agregar(self, grupo):
+        cola = asyncio.Queue(MAXIMO_PENDIENTES)
+        self.grupos.setdefault(grupo, set()).add(cola)
+        if self.tarea is None or self.tarea.done():
+            self.tarea = asyncio.get_running_loop().create_task(self._repartir())
+        return cola
+
+    def quitar(self, grupo, cola):
+        colas = self.grupos.get(grupo, set())
+        colas.discard(cola)
+        if not colas:
+            self.grupos.pop(grupo, None)
+
+    async def _repartir(self):
+        ultimo = await asyncio.to_thread(_ultimo_id)
+        anunciados, renovar = frozenset(), 0
+        while True:
+            if not self.grupos:
+                # Sin websockets: se retira el anuncio, salvo que alguno llegue mientras tanto
+                try:
+                    await asyncio.to_thread(_anunciar, (), time.time())
+                except sqlite3.Error:
+                    pass
+                if not self.grupos:
+                    return
+                anunciados = frozenset()
+            try:
+                grupos, ahora = frozenset(self.grupos), time.time()
+                if grupos != anunciados or ahora >= renovar:
+                    await asyncio.to_thread(_anunciar, grupos, ahora)
+                    anunciados, renovar = grupos, ahora + VIGENCIA_ESCUCHA / 2
+                filas = await asyncio.to_thread(_leer_desde, ultimo)
+            except sqlite3.Error:
+                filas = []
+            for ultimo, grupo, datos in filas:
+                for contenedor in _contenedores(grupo):
+                    for cola in self.grupos.get(contenedor, ()):
+                        _entregar(cola, datos)
+            await asyncio.sleep(settings.GESINFRA_CANALES_INTERVALO)
+
+
+def _entregar(cola, datos):
+    try:
+        cola.put_nowait(datos)
+    except asyncio.QueueFull:
+        while not cola.empty():
+            cola.get_nowait()
+        cola.put_nowait(RECARGAR)
+
+
+suscripciones = Suscripciones()
+
+
+# ========== WEBSOCKETS ==========
+
+def _origen_permitido(scope):
+    # Otro sitio no puede abrir el websocket con la cookie de sesión del usuario
+    cabeceras = dict(scope.get('headers', []))
+    origen = cabeceras.get(b'origin')
+    if origen is None:
+        return True
+    permitidos = settings.ALLOWED_HOSTS or (['.localhost', '127.0.0.1', '[::1]'] if settings.DEBUG else [])
+    return validate_host(urlsplit(origen.decode('latin-1')).hostname or '', permitidos)
+
+
+def _usuario(scope):
+    cabeceras = dict(scope.get('headers', []))
+    cookies = parse_cookie(cabeceras.get(b'cookie', b'').decode('latin-1'))
+    sesion = import_module(settings.SESSION_ENGINE).SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    try:
+        # get_user solo necesita request.session
+        usuario = get_user(SimpleNamespace(session=sesion))
+        return usuario if usuario.is_authenticated and usuario.is_active else None
+    finally:
+        close_old_connections()
+
+
+async def autenticar(scope):
+    """Usuario de la cookie de sesión del websocket, o None si no hay sesión o el origen es ajeno"""
+    if not _origen_permitido(scope):
+        return None
+    return await sync_to_async(_usuario)(scope)
+
+
+async def rechazar(send):
+    # Un close antes del accept: el servidor responde 403 al handshake
+    await send({'type': 'websocket.close', 'code': 4403})
+
+
+async def servir(grupo, receive, send):
+    """Acepta el websocket y le envía los mensajes de grupo (texto JSON) hasta que el cliente se desconecte.
+
+    Lo que envíe el cliente se ignora.
+    """
+    await send({'type': 'websocket.accept'})
+    cola = suscripciones.agregar(grupo)
+    recibido = asyncio.ensure_future(receive())
+    mensaje = asyncio.ensure_future(cola.get())
+    try:
+        while True:
+            listos, _ = await asyncio.wait({recibido, mensaje}, return_when=asyncio.FIRST_COMPLETED)
+            if mensaje in listos:
+                await send({'type': 'websocket.send', 'text': mensaje.result()})
+                mensaje = asyncio.ensure_future(cola.get())
+            if recibido in listos:
+                if recibido.result()['type'] == 'websocket.disconnect':
+                    return
+                recibido = asyncio.ensure_future(receive())
+    finally:
+        recibido.cancel()
+        mensaje.cancel()
+        suscripciones.quitar(grupo, cola)
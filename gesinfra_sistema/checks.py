@@ -0,0 +1,82 @@
+# gesinfra_sistema/checks.py
+import logging
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+logger = logging.getLogger('gesinfra_sistema')
+
+LOADER_CACHEADO = 'django.template.loaders.cached.Loader'
+
+
+def _usa_loader_cacheado(plantillas):
+    loaders = plantillas.get('OPTIONS', {}).get('loaders')
+    if loaders is None:
+        # Sin loaders explícitos Django ya usa cached.Loader
+        return True
+    return any(
+        (loader[0] if isinstance(loader, (list, tuple)) else loader) == LOADER_CACHEADO
+        for loader in loaders
+    )
+
+
+@register('rendimiento')
+def revisar_rendimiento(app_configs=None, **kwargs):
+    """Advierte de configuraciones que penalizan el rendimiento en producción"""
+    if not getattr(settings, 'GESINFRA_PRODUCCION', False):
+        return []
+
+    avisos = []
+    if settings.DEBUG:
+        avisos.append(Warning(
+            'DEBUG está activo: cada consulta SQL de la petición se guarda en memoria.',
+            hint='Quite GESINFRA_DEBUG=1.',
+            id='gesinfra.W001',
+        ))
+
+    for alias, base in settings.DATABASES.items():
+        if 'pool' in base.get('OPTIONS', {}):
+            # Con el pool de psycopg las conexiones ya se reutilizan (CONN_MAX_AGE debe ser 0)
+            pass
+        elif not base.get('CONN_MAX_AGE'):
+            avisos.append(Warning(
+                f'La base "{alias}" abre una conexión nueva en cada petición (CONN_MAX_AGE=0).',
+                hint='Defina GESINFRA_CONN_MAX_AGE con un valor mayor que 0.',
+                id='gesinfra.W002',
+            ))
+        elif not base.get('CONN_HEALTH_CHECKS'):
+            avisos.append(Warning(
+                f'La base "{alias}" reutiliza conexiones sin verificarlas (CONN_HEALTH_CHECKS).',
+                id='gesinfra.W003',
+            ))
+        opciones = base.get('OPTIONS', {})
+        solo_lectura = 'query_only=1' in opciones.get('init_command', '')
+        if base['ENGINE'].endswith('sqlite3') and not solo_lectura and opciones.get('transaction_mode') != 'IMMEDIATE':
+            avisos.append(Warning(
+                f'La base SQLite "{alias}" usa transacciones DEFERRED: con guardados simultáneos '
+                'fallan con "database is locked" sin esperar busy_timeout.',
+                hint="Conserve OPTIONS['transaction_mode'] = 'IMMEDIATE' de settings.py.",
+                id='gesinfra.W006',
+            ))
+
+    for plantillas in settings.TEMPLATES:
+        if plantillas['BACKEND'].endswith('DjangoTemplates') and not _usa_loader_cacheado(plantillas):
+            avisos.append(Warning(
+                'Las plantillas se leen y compilan en cada render (sin cached.Loader).',
+                id='gesinfra.W004',
+            ))
+
+    if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        avisos.append(Warning(
+            'El cache es local a cada proceso: con varios workers las versiones de '
+            'gesinfra_sistema/cache.py no se comparten y se pueden servir datos viejos.',
+            hint='Use GESINFRA_CACHE=archivo.',
+            id='gesinfra.W005',
+        ))
+    return avisos
+
+
+def advertir_al_iniciar():
+    """Escribe en el log los avisos de revisar_rendimiento al arrancar cada proceso"""
+    for aviso in revisar_rendimiento():
+        logger.warning('%s (%s)%s', aviso.msg, aviso.id, f' {aviso.hint}' if aviso.hint else '')
@@ -0,0 +1,37 @@
+# gesinfra_sistema/concurrente.py
+import asyncio
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from .tiempos import medicion_actual
+
+
+def _en_hilo_propio(consulta):
+    # Fuera del hilo de la petición cada consulta abre su propia conexión; las
+    # envolturas de TiemposMiddleware solo están en las del hilo de la petición
+    def ejecutar():
+        medicion = medicion_actual()
+        try:
+            with ExitStack() as envoltorios:
+                if medicion is not None:
+                    for conexion in connections.all():
+                        envoltorios.enter_context(conexion.execute_wrapper(medicion))
+                return consulta()
+        finally:
+            # Nadie más cierra las conexiones de los hilos del pool, y
+            # close_old_connections() las dejaría abiertas con CONN_MAX_AGE > 0
+            connections.close_all()
+    return sync_to_async(ejecutar, thread_sensitive=False)()
+
+
+async def en_paralelo(**consultas):
+    """Ejecuta cada consulta (función sin argumentos) a la vez, en su propio hilo y conexión.
+
+    Devuelve un dict con el resultado de cada una bajo el mismo nombre. La
+    duración total es la de la consulta más lenta, no la suma; la base de
+    reportes y la medición de la petición se heredan por contextvars.
+    """
+    resultados = await asyncio.gather(*(_en_hilo_propio(consulta) for consulta in consultas.values()))
+    return dict(zip(consultas, resultados))
@@ -0,0 +1,164 @@
+# gesinfra_sistema/consultas_lentas.py
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .tiempos import medicion_actual
+
+logger = logging.getLogger('gesinfra_sistema.consultas_lentas')
+
+# Módulos que no cuentan como origen de una consulta aunque estén en el proyecto
+MODULOS_INTERNOS = ('gesinfra_sistema',)
+
+
+# ========== ARCHIVO ==========
+
+def ruta_archivo():
+    return os.path.join(settings.GESINFRA_LOG_DIR, 'consultas_lentas.log')
+
+
+def rutas_archivos():
+    """El archivo actual y sus copias rotadas (.1, .2, ...), del más nuevo al más viejo"""
+    ruta = ruta_archivo()
+    return [ruta] + [f'{ruta}.{n}' for n in range(1, settings.GESINFRA_CONSULTAS_LENTAS_COPIAS + 1)]
+
+
+def _configurar_logger():
+    if logger.handlers:
+        return
+    os.makedirs(settings.GESINFRA_LOG_DIR, exist_ok=True)
+    archivo = RotatingFileHandler(
+        ruta_archivo(), maxBytes=settings.GESINFRA_CONSULTAS_LENTAS_BYTES,
+        backupCount=settings.GESINFRA_CONSULTAS_LENTAS_COPIAS, encoding='utf-8',
+    )
+    archivo.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(archivo)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+# ========== REGISTRO ==========
+
+def huella(sql):
+    """Identifica consultas iguales salvo por sus valores: literales, parámetros y listas IN"""
+    normalizada = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    normalizada = re.sub(r'\b\d+(?:\.\d+)?\b', '?', normalizada)
+    normalizada = normalizada.replace('%s', '?')
+    normalizada = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', normalizada)
+    normalizada = re.sub(r'\s+', ' ', normalizada).strip()
+    return hashlib.md5(normalizada.encode('utf-8')).hexdigest()[:12], normalizada
+
+
+def forma_parametros(params, many):
+    """Tipos de los parámetros, sin sus valores (pueden ser notas o cédulas)"""
+    if params is None:
+        return None
+    if many:
+        params = list(params)
+        return {'filas': len(params), 'columnas': forma_parametros(params[0], False) if params else []}
+    if isinstance(params, dict):
+        return {clave: type(valor).__name__ for clave, valor in params.items()}
+    return [type(valor).__name__ for valor in params]
+
+
+def origen():
+    """Primera línea del proyecto en la pila, preferentemente de un views.py: 'archivo.py:línea en función'"""
+    base = str(settings.BASE_DIR)
+    candidato = None
+    marco = sys._getframe(2)
+    while marco is not None:
+        archivo = marco.f_code.co_filename
+        if archivo.startswith(base) and 'site-packages' not in archivo:
+            relativo = os.path.relpath(archivo, base)
+            if not relativo.startswith(MODULOS_INTERNOS):
+                descripcion = f'{relativo}:{marco.f_lineno} en {marco.f_code.co_name}'
+                if relativo.endswith('views.py'):
+                    return descripcion
+                candidato = candidato or descripcion
+        marco = marco.f_back
+    return candidato
+
+
+def registrar_si_lenta(execute, sql, params, many, context):
+    """Envoltorio de execute: las consultas que superan el umbral van a consultas_lentas.log"""
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = (time.perf_counter() - inicio) * 1000
+        if duracion >= settings.GESINFRA_CONSULTA_LENTA_MS:
+            _configurar_logger()
+            medicion = medicion_actual()
+            peticion = medicion.peticion if medicion is not None else None
+            coincidencia = getattr(peticion, 'resolver_match', None)
+            clave, _ = huella(sql)
+            logger.info(json.dumps({
+                'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'huella': clave,
+                'ms': round(duracion, 1),
+                'sql': sql,
+                'parametros': forma_parametros(params, many),
+                'base': context['connection'].alias,
+                'url': coincidencia.view_name if coincidencia is not None else None,
+                'origen': origen(),
+            }, default=str))
+
+
+@receiver(connection_created)
+def instalar_en_conexion(sender, connection, **kwargs):
+    # connection_created se repite en cada reconexión del mismo DatabaseWrapper
+    if registrar_si_lenta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(registrar_si_lenta)
+
+
+# ========== RESUMEN ==========
+
+def leer_registros():
+    for ruta in rutas_archivos():
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    try:
+                        yield json.loads(linea)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def resumen_por_huella():
+    """Registros agrupados por huella, de mayor a menor tiempo total"""
+    grupos = {}
+    for registro in leer_registros():
+        grupo = grupos.get(registro['huella'])
+        if grupo is None:
+            grupo = grupos[registro['huella']] = {
+                'huella': registro['huella'],
+                'sql': huella(registro['sql'])[1],
+                'veces': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'urls': {}, 'origenes': {}, 'ultima': registro['fecha'],
+            }
+        grupo['veces'] += 1
+        grupo['total_ms'] += registro['ms']
+        grupo['max_ms'] = max(grupo['max_ms'], registro['ms'])
+        grupo['ultima'] = max(grupo['ultima'], registro['fecha'])
+        for campo, destino in (('url', 'urls'), ('origen', 'origenes')):
+            if registro.get(campo):
+                grupo[destino][registro[campo]] = grupo[destino].get(registro[campo], 0) + 1
+
+    resumen = sorted(grupos.values(), key=lambda g: g['total_ms'], reverse=True)
+    for grupo in resumen:
+        grupo['promedio_ms'] = round(grupo['total_ms'] / grupo['veces'], 1)
+        grupo['total_ms'] = round(grupo['total_ms'], 1)
+        grupo['urls'] = sorted(grupo['urls'].items(), key=lambda par: par[1], reverse=True)
+        grupo['origenes'] = sorted(grupo['origenes'].items(), key=lambda par: par[1], reverse=True)
+    return resumen
@@ -0,0 +1,165 @@
+# gesinfra_sistema/fts.py
+import re
+
+from django.db import connections
+
+
+class IndiceFTS:
+    """Índice de texto completo FTS5 (SQLite) sobre columnas de una tabla del ORM.
+
+    La tabla virtual usa contenido externo: el texto vive en la tabla del
+    modelo y FTS5 solo guarda los términos. Los triggers la mantienen
+    sincronizada con cualquier escritura (ORM, admin, SQL directo).
+
+    FTS5 busca prefijos de palabra: 'lat' encuentra 'Latitude', pero 'itude'
+    no. Los textos con términos de menos de MINIMO_TERMINO caracteres siguen
+    usando icontains (ver usar_para).
+    """
+
+    MINIMO_TERMINO = 3
+
+    def __init__(self, tabla, tabla_contenido, columna_id, columnas):
+        self.tabla = tabla
+        self.tabla_contenido = tabla_contenido
+        self.columna_id = columna_id
+        self.columnas = list(columnas)
+        # Bases (alias, archivo) donde ya se comprobó que la tabla FTS5 existe
+        self._comprobadas = set()
+
+    # ========== ESQUEMA ==========
+
+    def sql_tabla(self):
+        return f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.tabla} USING fts5(
+                {', '.join(self.columnas)},
+                content='{self.tabla_contenido}', content_rowid='{self.columna_id}',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """
+
+    def sql_triggers(self):
+        columnas = ', '.join(self.columnas)
+        nuevos = ', '.join(f'new.{c}' for c in self.columnas)
+        viejos = ', '.join(f'old.{c}' for c in self.columnas)
+        insertar = (
+            f'INSERT INTO {self.tabla}(rowid, {columnas}) '
+            f'VALUES (new.{self.columna_id}, {nuevos});'
+        )
+        borrar = (
+            f"INSERT INTO {self.tabla}({self.tabla}, rowid, {columnas}) "
+            f"VALUES ('delete', old.{self.columna_id}, {viejos});"
+        )
+        return {
+            f'{self.tabla}_ai': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.tabla}_ai '
+                f'AFTER INSERT ON {self.tabla_contenido} BEGIN {insertar} END'
+            ),
+            f'{self.tabla}_ad': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.tabla}_ad '
+                f'AFTER DELETE ON {self.tabla_contenido} BEGIN {borrar} END'
+            ),
+            f'{self.tabla}_au': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.tabla}_au '
+                f'AFTER UPDATE OF {self.columna_id}, {columnas} ON {self.tabla_contenido} '
+                f'BEGIN {borrar} {insertar} END'
+            ),
+        }
+
+    def soportado(self, using='default'):
+        """Indica si la base de datos puede tener el índice: SQLite compilado con FTS5"""
+        conexion = connections[using]
+        if conexion.vendor != 'sqlite':
+            return False
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return bool(cursor.fetchone()[0])
+
+    def disponible(self, using='default'):
+        """Indica si el índice se puede consultar: FTS5 soportado y la tabla creada"""
+        clave = (using, connections[using].settings_dict['NAME'])
+        if clave in self._comprobadas:
+            return True
+        if not self.soportado(using):
+            return False
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.tabla])
+            if cursor.fetchone() is None:
+                return False
+        self._comprobadas.add(clave)
+        return True
+
+    def usar_para(self, texto, using='default'):
+        """Indica si conviene resolver texto con el índice en lugar de icontains"""
+        terminos = re.findall(r'\w+', texto or '')
+        if not terminos or any(len(termino) < self.MINIMO_TERMINO for termino in terminos):
+            return False
+        return self.disponible(using)
+
+    def asegurar(self, using='default'):
+        """Crea la tabla FTS5 y sus triggers si faltan, y reindexa cuando hizo falta crearlos.
+
+        Se ejecuta después de cada migrate: SQLite reconstruye la tabla de
+        contenido en algunos AlterField y con ello descarta los triggers.
+        """
+        if not self.soportado(using):
+            return False
+
+        triggers = self.sql_triggers()
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                [f'{self.tabla}%'],
+            )
+            existentes = {fila[0] for fila in cursor.fetchall()}
+
+            faltantes = [nombre for nombre in triggers if nombre not in existentes]
+            if self.tabla in existentes and not faltantes:
+                return False
+
+            cursor.execute(self.sql_tabla())
+            for nombre in faltantes:
+                cursor.execute(triggers[nombre])
+        self.reconstruir(using)
+        return True
+
+    def reconstruir(self, using='default'):
+        """Vuelve a generar el índice completo a partir de la tabla de contenido"""
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.tabla}({self.tabla}) VALUES ('rebuild')")
+
+    # ========== CONSULTAS ==========
+
+    @staticmethod
+    def construir_consulta(texto):
+        """Convierte el texto del usuario en una consulta FTS5 de prefijos.
+
+        'lab-comp hp' -> '"lab"* "comp"* "hp"*' (todas las palabras deben aparecer).
+        Cada término va entre comillas para que la sintaxis FTS5 del usuario
+        (AND, OR, NEAR, comillas) no se interprete.
+        """
+        terminos = re.findall(r'\w+', texto or '')
+        return ' '.join(f'"{termino}"*' for termino in terminos)
+
+    def filtrar(self, queryset, texto, por_relevancia=True):
+        """Filtra un queryset por texto, ordenado por relevancia (bm25) si se pide.
+
+        La unión se escribe como `id = rowid + 0` para que SQLite no pueda usar
+        el rowid de la tabla FTS5 como índice: así siempre parte del MATCH y no
+        reevalúa la consulta de texto por cada fila que dejan los otros filtros.
+        """
+        consulta = self.construir_consulta(texto)
+        if not consulta:
+            return queryset.none()
+
+        extra = {
+            'tables': [self.tabla],
+            'where': [
+                f'{self.tabla_contenido}.{self.columna_id} = {self.tabla}.rowid + 0',
+                f'{self.tabla} MATCH %s',
+            ],
+            'params': [consulta],
+        }
+        if por_relevancia:
+            extra['select'] = {'relevancia': f'{self.tabla}.rank'}
+            extra['order_by'] = ['relevancia']
+        return queryset.extra(**extra)
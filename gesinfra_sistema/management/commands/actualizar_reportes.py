@@ -0,0 +1,28 @@
+# gesinfra_sistema/management/commands/actualizar_reportes.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gesinfra_sistema.reportes import actualizar_instantanea, hay_base_de_reportes
+
+
+class Command(BaseCommand):
+    help = 'Copia la base principal sobre la base de reportes (una vez o cada --cada segundos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cada', type=int, default=0,
+                            help=f'Repetir cada N segundos (p. ej. {settings.GESINFRA_REPORTES_SEGUNDOS})')
+
+    def handle(self, *args, **options):
+        if not hay_base_de_reportes():
+            # settings_postgres.py: los reportes leen de la principal, no hay nada que copiar
+            self.stdout.write('Sin base de reportes configurada; no hay nada que actualizar')
+            return
+        while True:
+            inicio = time.perf_counter()
+            actualizar_instantanea()
+            self.stdout.write(f'Base de reportes actualizada en {time.perf_counter() - inicio:.2f}s')
+            if not options['cada']:
+                break
+            time.sleep(options['cada'])
@@ -0,0 +1,228 @@
+# gesinfra_sistema/metricas.py
+import atexit
+import bisect
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# nombre -> (tipo, ayuda, límites de los buckets si es histograma)
+METRICAS = {
+    'gesinfra_http_solicitud_segundos': (
+        'histogram', 'Duración de las peticiones por nombre de URL, método y estado',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'gesinfra_db_consultas_total': ('counter', 'Consultas SQL ejecutadas por nombre de URL', None),
+    'gesinfra_db_segundos_total': ('counter', 'Tiempo en consultas SQL por nombre de URL', None),
+    'gesinfra_pdf_segundos': (
+        'histogram', 'Tiempo de construcción de los PDF con ReportLab',
+        (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    ),
+    'gesinfra_pdf_bytes': (
+        'histogram', 'Tamaño de los PDF generados',
+        (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000),
+    ),
+    'gesinfra_cache_consultas_total': ('counter', 'Lecturas de gesinfra_sistema/cache.py por resultado', None),
+    'gesinfra_calificaciones_guardadas_total': ('counter', 'Calificaciones guardadas por vía', None),
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS serie (
+    nombre TEXT NOT NULL,
+    etiquetas TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (nombre, etiquetas)
+)
+"""
+
+
+def _etiquetas(etiquetas):
+    # Texto estable de las etiquetas, ya en el formato de Prometheus
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{clave}="{escapar(valor)}"' for clave, valor in sorted(etiquetas.items()))
+
+
+class Registro:
+    """Incrementos pendientes de este proceso.
+
+    Cada proceso acumula en memoria y un hilo aparte suma sus deltas al
+    archivo SQLite compartido cada GESINFRA_METRICAS_SEGUNDOS, así ninguna
+    petición espera esa escritura; /metrics lee el total de todos los
+    procesos. Todas las series son sumables (contadores y buckets acumulados),
+    así que el orden en que escriben los procesos no importa.
+    """
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Estado vacío; también en el hijo de un fork, que no debe volver a sumar lo del padre"""
+        self.pendientes = {}
+        self.candado = threading.Lock()
+        self.hilo = None
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        self._acumular([(nombre, valor, etiquetas)])
+
+    def observar(self, nombre, valor, **etiquetas):
+        """Observación de un histograma: su bucket (y los siguientes, son acumulados), _sum y _count"""
+        limites = METRICAS[nombre][2]
+        incrementos = [
+            (f'{nombre}_bucket', 1, dict(etiquetas, le=limite))
+            for limite in limites[bisect.bisect_left(limites, valor):]
+        ]
+        incrementos += [
+            (f'{nombre}_bucket', 1, dict(etiquetas, le='+Inf')),
+            (f'{nombre}_sum', valor, etiquetas),
+            (f'{nombre}_count', 1, etiquetas),
+        ]
+        self._acumular(incrementos)
+
+    def _acumular(self, incrementos):
+        with self.candado:
+            for nombre, valor, etiquetas in incrementos:
+                clave = (nombre, _etiquetas(etiquetas))
+                self.pendientes[clave] = self.pendientes.get(clave, 0) + valor
+            # Se crea con el primer incremento de cada proceso
+            if self.hilo is None or not self.hilo.is_alive():
+                self.hilo = threading.Thread(target=self._escribir, name='metricas', daemon=True)
+                self.hilo.start()
+
+    def _escribir(self):
+        while True:
+            time.sleep(settings.GESINFRA_METRICAS_SEGUNDOS)
+            self.volcar()
+
+    def volcar(self):
+        """Suma los incrementos pendientes al archivo compartido"""
+        with self.candado:
+            pendientes, self.pendientes = self.pendientes, {}
+        if not pendientes:
+            return
+        try:
+            conexion = _conectar()
+            try:
+                with conexion:
+                    conexion.executemany(
+                        'INSERT INTO serie (nombre, etiquetas, valor) VALUES (?, ?, ?) '
+                        'ON CONFLICT (nombre, etiquetas) DO UPDATE SET valor = valor + excluded.valor',
+                        [(nombre, etiquetas, valor) for (nombre, etiquetas), valor in pendientes.items()],
+                    )
+            finally:
+                conexion.close()
+        except sqlite3.Error:
+            # Archivo ocupado: los incrementos vuelven a quedar pendientes para el próximo volcado
+            with self.candado:
+                for clave, valor in pendientes.items():
+                    self.pendientes[clave] = self.pendientes.get(clave, 0) + valor
+
+
+def _numero(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _orden(fila):
+    # Buckets de un histograma en orden numérico de le, no alfabético
+    nombre, etiquetas, _ = fila
+    resto, _, le = etiquetas.partition('le="')
+    if not le:
+        return nombre, etiquetas, 0
+    le, _, despues = le.partition('"')
+    return nombre, resto + despues, float('inf') if le == '+Inf' else float(le)
+
+
+def _conectar():
+    conexion = sqlite3.connect(settings.GESINFRA_METRICAS_PATH, timeout=10)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute(ESQUEMA)
+    return conexion
+
+
+registro = Registro()
+atexit.register(registro.volcar)
+if hasattr(os, 'register_at_fork'):
+    # Los workers de gunicorn se crean con fork después de importar la aplicación
+    os.register_at_fork(after_in_child=registro.reiniciar)
+
+sumar = registro.sumar
+observar = registro.observar
+
+
+# ========== ORÍGENES ==========
+
+def observar_peticion(request, response, segundos, medicion):
+    """Llamado por TiemposMiddleware al terminar cada petición"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    url = coincidencia.view_name if coincidencia is not None else 'sin_url'
+    observar('gesinfra_http_solicitud_segundos', segundos,
+             url=url, metodo=request.method, estado=response.status_code)
+    sumar('gesinfra_db_consultas_total', medicion.consultas, url=url)
+    sumar('gesinfra_db_segundos_total', medicion.segundos_db, url=url)
+    if 'pdf' in medicion.secciones:
+        observar('gesinfra_pdf_segundos', medicion.secciones['pdf'], url=url)
+        if not response.streaming:
+            observar('gesinfra_pdf_bytes', len(response.content), url=url)
+
+
+# ========== EXPOSICIÓN ==========
+
+def texto_prometheus():
+    """Todas las series del archivo compartido en el formato de texto de Prometheus"""
+    registro.volcar()
+    if not os.path.exists(settings.GESINFRA_METRICAS_PATH):
+        filas = []
+    else:
+        conexion = _conectar()
+        try:
+            filas = conexion.execute('SELECT nombre, etiquetas, valor FROM serie').fetchall()
+        finally:
+            conexion.close()
+
+    series = {}
+    for nombre, etiquetas, valor in sorted(filas, key=_orden):
+        familia = nombre
+        for sufijo in ('_bucket', '_sum', '_count'):
+            if nombre.endswith(sufijo) and nombre[:-len(sufijo)] in METRICAS:
+                familia = nombre[:-len(sufijo)]
+        series.setdefault(familia, []).append((nombre, etiquetas, valor))
+
+    # Proporción de aciertos del cache, calculada a partir de los contadores
+    cache = {e: v for _, e, v in series.get('gesinfra_cache_consultas_total', [])}
+    aciertos, fallos = cache.get('resultado="acierto"', 0), cache.get('resultado="fallo"', 0)
+
+    lineas = []
+    for familia, (tipo, ayuda, _) in METRICAS.items():
+        lineas.append(f'# HELP {familia} {ayuda}')
+        lineas.append(f'# TYPE {familia} {tipo}')
+        for nombre, etiquetas, valor in series.get(familia, []):
+            lineas.append(f'{nombre}{{{etiquetas}}} {_numero(valor)}' if etiquetas else f'{nombre} {_numero(valor)}')
+    lineas.append('# HELP gesinfra_cache_aciertos_ratio Aciertos / lecturas del cache')
+    lineas.append('# TYPE gesinfra_cache_aciertos_ratio gauge')
+    lineas.append(f'gesinfra_cache_aciertos_ratio {_numero(aciertos / (aciertos + fallos) if aciertos + fallos else 0)}')
+    return '\n'.join(lineas) + '\n'
+
+
+def _acceso_permitido(request):
+    token = settings.GESINFRA_METRICAS_TOKEN
+    if token and secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_staff:
+        return True
+    # La dirección de origen no sirve detrás de un proxy: fuera de DEBUG no hay acceso anónimo
+    return settings.DEBUG and not token
+
+
+def vista_metricas(request):
+    """GET /metrics para 'Authorization: Bearer <GESINFRA_METRICAS_TOKEN>' o el staff.
+
+    Solo con DEBUG y sin token configurado responde a cualquiera.
+    """
+    if not _acceso_permitido(request):
+        return HttpResponseForbidden()
+    return HttpResponse(texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
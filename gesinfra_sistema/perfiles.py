@@ -0,0 +1,179 @@
+# gesinfra_sistema/perfiles.py
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# ?_perfil=1 o la cabecera X-Gesinfra-Perfil activan el perfil de una petición (solo staff)
+PARAMETRO = '_perfil'
+META_CABECERA = 'HTTP_X_GESINFRA_PERFIL'
+# La respuesta perfilada indica el nombre con el que se guardó
+CABECERA_RESPUESTA = 'X-Gesinfra-Perfil'
+
+EXTENSIONES = {'prof': 'application/octet-stream', 'collapsed': 'text/plain; charset=utf-8'}
+
+
+def directorio():
+    return os.path.join(settings.GESINFRA_LOG_DIR, 'perfiles')
+
+
+# ========== MUESTREO ==========
+
+class Muestreo(threading.Thread):
+    """Toma la pila del hilo de la petición cada intervalo y cuenta las pilas repetidas.
+
+    El resultado está en formato 'collapsed' (una pila por línea, marcos
+    separados por ';' y el número de muestras), el que leen flamegraph.pl y
+    speedscope. cProfile da el árbol de llamadas; esto, las pilas completas.
+    """
+
+    def __init__(self, hilo_objetivo, intervalo=0.001):
+        super().__init__(daemon=True)
+        self.hilo_objetivo = hilo_objetivo
+        self.intervalo = intervalo
+        self.pilas = {}
+        self.activo = threading.Event()
+        self.activo.set()
+
+    def run(self):
+        while self.activo.is_set():
+            marco = sys._current_frames().get(self.hilo_objetivo)
+            if marco is not None:
+                marcos = []
+                while marco is not None:
+                    codigo = marco.f_code
+                    marcos.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                    marco = marco.f_back
+                pila = ';'.join(reversed(marcos))
+                self.pilas[pila] = self.pilas.get(pila, 0) + 1
+            time.sleep(self.intervalo)
+
+    def detener(self):
+        self.activo.clear()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{pila} {muestras}\n' for pila, muestras in sorted(self.pilas.items()))
+
+
+# ========== ARCHIVOS ==========
+
+def _resumen_texto(perfil, lineas=30):
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(lineas)
+    return salida.getvalue()
+
+
+def guardar(request, response, perfil, muestreo, segundos):
+    """Escribe nombre.prof (pstats), nombre.collapsed y nombre.json; devuelve nombre"""
+    os.makedirs(directorio(), exist_ok=True)
+    coincidencia = getattr(request, 'resolver_match', None)
+    url = coincidencia.view_name if coincidencia is not None else 'sin_url'
+    nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{url.replace(':', '-')}-{uuid.uuid4().hex[:6]}"
+    base = os.path.join(directorio(), nombre)
+
+    perfil.dump_stats(f'{base}.prof')
+    with open(f'{base}.collapsed', 'w', encoding='utf-8') as archivo:
+        archivo.write(muestreo.collapsed())
+    with open(f'{base}.json', 'w', encoding='utf-8') as archivo:
+        json.dump({
+            'nombre': nombre,
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'url': url,
+            'ruta': request.get_full_path(),
+            'usuario': request.user.get_username(),
+            'estado': response.status_code,
+            'ms': round(segundos * 1000, 1),
+            'muestras': sum(muestreo.pilas.values()),
+            'resumen': _resumen_texto(perfil),
+        }, archivo, ensure_ascii=False)
+
+    _limpiar()
+    return nombre
+
+
+def _limpiar():
+    # Conserva solo los GESINFRA_PERFILES_MAXIMO perfiles más recientes
+    for viejo in sorted(glob.glob(os.path.join(directorio(), '*.json')))[:-settings.GESINFRA_PERFILES_MAXIMO]:
+        base = viejo[:-len('.json')]
+        for extension in ('json', *EXTENSIONES):
+            try:
+                os.remove(f'{base}.{extension}')
+            except FileNotFoundError:
+                pass
+
+
+def listar(limite=50):
+    """Metadatos de los perfiles más recientes, el último primero"""
+    perfiles = []
+    for ruta in sorted(glob.glob(os.path.join(directorio(), '*.json')), reverse=True)[:limite]:
+        with open(ruta, encoding='utf-8') as archivo:
+            perfiles.append(json.load(archivo))
+    return perfiles
+
+
+def ruta_archivo(nombre, extension):
+    """Ruta de un archivo de perfil, o None si el nombre no corresponde a uno guardado"""
+    if extension not in EXTENSIONES or os.path.basename(nombre) != nombre or nombre.startswith('.'):
+        return None
+    ruta = os.path.join(directorio(), f'{nombre}.{extension}')
+    return ruta if os.path.isfile(ruta) else None
+
+
+# ========== MIDDLEWARE ==========
+
+def perfilar(request, view_func, view_args, view_kwargs):
+    """Ejecuta la vista (y el render de un TemplateResponse) bajo cProfile y el muestreo"""
+    perfil = cProfile.Profile()
+    muestreo = Muestreo(threading.get_ident())
+    inicio = time.perf_counter()
+    muestreo.start()
+    try:
+        response = perfil.runcall(view_func, request, *view_args, **view_kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = perfil.runcall(response.render)
+    finally:
+        muestreo.detener()
+    response[CABECERA_RESPUESTA] = guardar(request, response, perfil, muestreo, time.perf_counter() - inicio)
+    return response
+
+
+class PerfilesMiddleware:
+    """Perfil bajo demanda de una petición de staff; va al final de MIDDLEWARE.
+
+    Las peticiones sin la marca solo pagan buscar una cadena en QUERY_STRING y
+    una clave en META.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.GESINFRA_PERFILES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Con get_response async devuelve su corrutina: el handler la espera
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        marcada = META_CABECERA in request.META or PARAMETRO in request.META.get('QUERY_STRING', '')
+        if not marcada or iscoroutinefunction(view_func) or not request.user.is_staff:
+            # Las vistas async (dashboards) reparten su trabajo en otros hilos: cProfile no lo vería
+            return None
+        if META_CABECERA not in request.META and PARAMETRO not in request.GET:
+            return None
+        return perfilar(request, view_func, view_args, view_kwargs)
@@ -0,0 +1,173 @@
+# gesinfra_sistema/reportes.py
+import contextvars
+import functools
+import os
+import sqlite3
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+ALIAS_REPORTES = 'reportes'
+
+# Solo los modelos del proyecto; sesiones y usuarios siempre desde la base principal
+APPS_REPORTES = {'calificaciones', 'inventario', 'accesibilidad', 'usuarios'}
+
+# Cookie con el momento de la última escritura del usuario (lectura de lo propio)
+COOKIE_ESCRITURA = 'gesinfra_escritura'
+
+METODOS_SEGUROS = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+# Momento de la instantánea que usa la petición actual, o None si lee de la principal
+_instantanea = contextvars.ContextVar('gesinfra_instantanea', default=None)
+
+
+def vista_de_reportes(vista):
+    """Marca una vista de solo lectura (PDF, exportación, dashboard) para leer de la base de reportes"""
+    vista.usa_reportes = True
+    return vista
+
+
+def hay_base_de_reportes():
+    """False con settings_postgres.py, que no define la base de reportes"""
+    return ALIAS_REPORTES in settings.DATABASES
+
+
+def instantanea_en_uso():
+    """Momento (time.time) de la instantánea que lee esta petición; None si lee de la principal"""
+    return _instantanea.get()
+
+
+# ========== INSTANTÁNEA ==========
+
+def _ruta_marca(ruta):
+    # La fecha de la copia va aparte: el archivo de la base cambia de mtime en cada checkpoint
+    return f'{ruta}.tomada'
+
+
+def fecha_instantanea():
+    """Momento en que se tomó la instantánea actual, o None si no hay ninguna"""
+    if not hay_base_de_reportes():
+        return None
+    try:
+        return os.stat(_ruta_marca(settings.DATABASES[ALIAS_REPORTES]['NAME'])).st_mtime
+    except OSError:
+        return None
+
+
+def actualizar_instantanea(origen='default'):
+    """Copia la base principal sobre la de reportes con la API de backup de SQLite.
+
+    La copia se hace página a página dentro de la misma base de reportes, así
+    las consultas que estén leyéndola ven la versión anterior o la nueva,
+    nunca una mezcla. Devuelve el momento que representa la copia.
+    """
+    ruta_origen = str(settings.DATABASES[origen]['NAME'])
+    ruta_destino = str(settings.DATABASES[ALIAS_REPORTES]['NAME'])
+    tomada = time.time()
+
+    conexion_origen = sqlite3.connect(ruta_origen)
+    conexion_destino = sqlite3.connect(ruta_destino, timeout=30)
+    try:
+        conexion_origen.backup(conexion_destino)
+    finally:
+        conexion_destino.close()
+        conexion_origen.close()
+
+    marca = _ruta_marca(ruta_destino)
+    with open(marca, 'a'):
+        pass
+    os.utime(marca, (tomada, tomada))
+    return tomada
+
+
+def _instantanea_para(request):
+    """Fecha de la instantánea si esta petición puede leerla; None si debe ir a la principal"""
+    tomada = fecha_instantanea()
+    if tomada is None or time.time() - tomada > settings.GESINFRA_REPORTES_VIGENCIA:
+        return None
+    try:
+        escritura = float(request.COOKIES.get(COOKIE_ESCRITURA, 0))
+    except ValueError:
+        escritura = 0
+    if escritura >= tomada:
+        # El usuario guardó después de la copia: debe ver sus propios cambios
+        return None
+    return tomada
+
+
+# ========== ROUTER Y MIDDLEWARE ==========
+
+class RouterReportes:
+    """Envía las lecturas de las vistas marcadas con vista_de_reportes a la base de reportes"""
+
+    def db_for_read(self, model, **hints):
+        if (_instantanea.get() is not None and model._meta.app_label in APPS_REPORTES
+                and hay_base_de_reportes()):
+            return ALIAS_REPORTES
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Es la misma base copiada: las relaciones entre ambas son válidas
+        if {obj1._state.db, obj2._state.db} <= {'default', ALIAS_REPORTES}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == ALIAS_REPORTES:
+            return False
+        return None
+
+
+class ReportesMiddleware:
+    """Activa la base de reportes en las vistas marcadas y recuerda cuándo escribió cada usuario"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._usa_instantanea = False
+        try:
+            response = self.get_response(request)
+        finally:
+            # set y no reset(token): bajo ASGI process_view corre en otra copia
+            # del contexto y el token no sería válido aquí
+            if request._usa_instantanea:
+                _instantanea.set(None)
+        return self.marcar_escritura(request, response)
+
+    async def __acall__(self, request):
+        request._usa_instantanea = False
+        try:
+            response = await self.get_response(request)
+        finally:
+            if request._usa_instantanea:
+                _instantanea.set(None)
+        return self.marcar_escritura(request, response)
+
+    def marcar_escritura(self, request, response):
+        if request.method not in METODOS_SEGUROS and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_ESCRITURA, f'{time.time():.3f}',
+                max_age=settings.GESINFRA_REPORTES_VIGENCIA, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'usa_reportes', False) and request.method in METODOS_SEGUROS:
+            tomada = _instantanea_para(request)
+            if tomada is not None:
+                _instantanea.set(tomada)
+                request._usa_instantanea = True
+        return None
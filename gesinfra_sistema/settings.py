@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     # Mis apps
+    'gesinfra_sistema.apps.GesinfraSistemaConfig',
     'calificaciones.apps.CalificacionesConfig',
     'inventario.apps.InventarioConfig',
     'accesibilidad.apps.AccesibilidadConfig',
@@ -36,20 +37,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gesinfra_sistema.tiempos.TiemposMiddleware',  # primero: mide toda la petición
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gesinfra_sistema.reportes.ReportesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'gesinfra_sistema.perfiles.PerfilesMiddleware',  # último: ejecuta la vista bajo cProfile
 ]
 
 ROOT_URLCONF = 'gesinfra_sistema.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el render (Server-Timing, gesinfra_sistema/tiempos.py)
+        'BACKEND': 'gesinfra_sistema.tiempos.MedidasDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,16 +68,124 @@ TEMPLATES = [
     },
 ]
 
+# Cabecera Server-Timing con consultas, plantillas, PDF y total de cada petición; fuera
+# de DEBUG solo para el staff (la línea de log de gesinfra_sistema.tiempos se escribe siempre)
+GESINFRA_SERVER_TIMING = os.environ.get('GESINFRA_SERVER_TIMING', '1') == '1'
+
+# Registro de consultas lentas (gesinfra_sistema/consultas_lentas.py, admin/consultas-lentas/)
+GESINFRA_LOG_DIR = os.environ.get('GESINFRA_LOG_DIR', str(BASE_DIR / 'logs'))
+GESINFRA_CONSULTA_LENTA_MS = float(os.environ.get('GESINFRA_CONSULTA_LENTA_MS', '200'))
+GESINFRA_CONSULTAS_LENTAS_BYTES = 5 * 1024 * 1024
+GESINFRA_CONSULTAS_LENTAS_COPIAS = 5
+
+# Perfiles bajo demanda de staff con ?_perfil=1 (gesinfra_sistema/perfiles.py, admin/perfiles/)
+GESINFRA_PERFILES = os.environ.get('GESINFRA_PERFILES', '1') == '1'
+GESINFRA_PERFILES_MAXIMO = 100
+
+# MÉTRICAS /metrics en formato Prometheus (gesinfra_sistema/metricas.py). Cada proceso
+# suma sus contadores al archivo SQLite compartido cada GESINFRA_METRICAS_SEGUNDOS.
+GESINFRA_METRICAS = os.environ.get('GESINFRA_METRICAS', '1') == '1'
+GESINFRA_METRICAS_PATH = os.environ.get('GESINFRA_METRICAS_PATH', str(BASE_DIR / 'metricas.sqlite3'))
+GESINFRA_METRICAS_SEGUNDOS = 5
+# Fuera de DEBUG /metrics solo responde a este token (Bearer) y al staff
+GESINFRA_METRICAS_TOKEN = os.environ.get('GESINFRA_METRICAS_TOKEN', '')
+
+# Tabla de calificaciones en vivo por websocket (gesinfra_sistema/canales.py, calificaciones/en_vivo.py).
+# Los guardados de cualquier proceso se escriben en el archivo SQLite compartido (solo los
+# de grupos con algún websocket abierto) y cada proceso ASGI con websockets lo lee cada
+# GESINFRA_CANALES_INTERVALO segundos; los mensajes duran GESINFRA_CANALES_RETENCION segundos.
+GESINFRA_CANALES = os.environ.get('GESINFRA_CANALES', '1') == '1'
+GESINFRA_CANALES_PATH = os.environ.get('GESINFRA_CANALES_PATH', str(BASE_DIR / 'canales.sqlite3'))
+GESINFRA_CANALES_INTERVALO = 0.25
+GESINFRA_CANALES_RETENCION = 60
+
+# Auditoría de calificaciones (calificaciones/auditoria.py): los eventos se guardan en
+# lotes desde un hilo aparte, cuando se juntan GESINFRA_AUDITORIA_LOTE o pasan
+# GESINFRA_AUDITORIA_SEGUNDOS, y al terminar el proceso. Con la base inaccesible se
+# conservan a lo sumo GESINFRA_AUDITORIA_MAXIMO eventos pendientes.
+GESINFRA_AUDITORIA_LOTE = 100
+GESINFRA_AUDITORIA_SEGUNDOS = 2
+GESINFRA_AUDITORIA_MAXIMO = 10000
+
 WSGI_APPLICATION = 'gesinfra_sistema.wsgi.application'
 
 # BASE DE DATOS SQLite (puedes cambiar a MySQL/PostgreSQL después)
+# PRAGMAs que ejecuta cada conexión nueva (init_command), pensados para varios
+# docentes guardando notas a la vez:
+# - WAL: los lectores no bloquean al que escribe ni el que escribe a los lectores
+# - synchronous=NORMAL: con WAL la base sigue íntegra ante un corte; solo hace fsync en los checkpoints
+# - busy_timeout: milisegundos que una escritura espera el bloqueo antes de 'database is locked'
+# - mmap_size / cache_size (negativo = KiB): lecturas de reportes desde memoria
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('GESINFRA_SQLITE_BUSY_TIMEOUT', '5000')),
+    'mmap_size': int(os.environ.get('GESINFRA_SQLITE_MMAP_MB', '256')) * 1024 * 1024,
+    'cache_size': -int(os.environ.get('GESINFRA_SQLITE_CACHE_MB', '64')) * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {nombre}={valor}' for nombre, valor in SQLITE_PRAGMAS.items()),
+            # atomic() empieza con BEGIN IMMEDIATE: toma el bloqueo de escritura al inicio y
+            # espera busy_timeout, en vez de fallar al pasar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# BASE DE REPORTES: copia de solo lectura de la principal para PDFs, exportaciones
+# y dashboards (gesinfra_sistema/reportes.py). La refresca periódicamente el comando
+# actualizar_reportes; si no existe o tiene más de GESINFRA_REPORTES_VIGENCIA
+# segundos, esas vistas leen de la principal.
+GESINFRA_REPORTES_SEGUNDOS = int(os.environ.get('GESINFRA_REPORTES_SEGUNDOS', '300'))
+GESINFRA_REPORTES_VIGENCIA = 3 * GESINFRA_REPORTES_SEGUNDOS
+
+DATABASES['reportes'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.environ.get('GESINFRA_DB_REPORTES', str(BASE_DIR / 'reportes.sqlite3')),
+    'OPTIONS': {
+        'init_command': ';'.join([
+            'PRAGMA query_only=1',
+            f"PRAGMA busy_timeout={SQLITE_PRAGMAS['busy_timeout']}",
+            f"PRAGMA mmap_size={SQLITE_PRAGMAS['mmap_size']}",
+            f"PRAGMA cache_size={SQLITE_PRAGMAS['cache_size']}",
+        ]),
+    },
+    # En los tests es la misma base que default
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['gesinfra_sistema.reportes.RouterReportes']
+
+# CACHE (ver gesinfra_sistema/cache.py)
+# GESINFRA_CACHE=locmem: memoria de cada proceso (desarrollo, un solo proceso)
+# GESINFRA_CACHE=archivo: directorio compartido por todos los procesos del servidor
+GESINFRA_CACHE = os.environ.get('GESINFRA_CACHE', 'locmem')
+
+if GESINFRA_CACHE == 'archivo':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('GESINFRA_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+            'TIMEOUT': 600,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gesinfra',
+            'TIMEOUT': 600,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -0,0 +1,65 @@
+"""
+Configuración de producción sobre PostgreSQL.
+
+Parte de settings_produccion.py y solo reemplaza la base de datos: SQLite
+admite un único escritor a la vez, PostgreSQL no. Requiere psycopg 3
+(pip install "psycopg[binary,pool]"). Uso:
+
+    DJANGO_SETTINGS_MODULE=gesinfra_sistema.settings_postgres
+
+Para probar en local basta un contenedor:
+
+    docker run -d -p 5432:5432 -e POSTGRES_DB=gesinfra -e POSTGRES_USER=gesinfra \\
+        -e POSTGRES_PASSWORD=gesinfra postgres:16
+
+Variables (además de las de settings_produccion.py):
+    GESINFRA_PG_NAME, GESINFRA_PG_USER, GESINFRA_PG_PASSWORD
+    GESINFRA_PG_HOST, GESINFRA_PG_PORT   servidor (localhost:5432)
+    GESINFRA_PG_POOL_MIN, GESINFRA_PG_POOL_MAX
+                             conexiones del pool de cada proceso (2 y 10)
+    GESINFRA_PG_PGBOUNCER    '1' si las conexiones pasan por PgBouncer en modo
+                             transacción: el pool lo hace el servidor y no cada proceso
+"""
+import os
+
+from .settings_produccion import *  # noqa: F401,F403
+from .settings_produccion import DATABASES
+
+PGBOUNCER = os.environ.get('GESINFRA_PG_PGBOUNCER', '') == '1'
+
+segundos_conexion = DATABASES['default']['CONN_MAX_AGE']
+
+DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.environ.get('GESINFRA_PG_NAME', 'gesinfra'),
+    'USER': os.environ.get('GESINFRA_PG_USER', 'gesinfra'),
+    'PASSWORD': os.environ.get('GESINFRA_PG_PASSWORD', ''),
+    'HOST': os.environ.get('GESINFRA_PG_HOST', 'localhost'),
+    'PORT': os.environ.get('GESINFRA_PG_PORT', '5432'),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        # Una petición pesada (PDF de todo un grado) no debe retener filas bloqueadas
+        'options': '-c statement_timeout=30000 -c idle_in_transaction_session_timeout=60000',
+    },
+}
+
+if PGBOUNCER:
+    # PgBouncer reparte las conexiones del servidor entre todos los procesos.
+    # En modo transacción los cursores de servidor no sobreviven fuera de una
+    # transacción, así que .iterator() vuelve a leer en bloques desde el cliente.
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': segundos_conexion,
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    })
+else:
+    # Pool de psycopg dentro de cada proceso; incompatible con CONN_MAX_AGE > 0
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('GESINFRA_PG_POOL_MIN', '2')),
+        'max_size': int(os.environ.get('GESINFRA_PG_POOL_MAX', '10')),
+        'timeout': 10,
+    }
+
+# La base de reportes es una copia de archivo SQLite (gesinfra_sistema/reportes.py);
+# con PostgreSQL los lectores no bloquean a los escritores y no hace falta
+del DATABASES['reportes']
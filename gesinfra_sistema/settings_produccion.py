@@ -0,0 +1,77 @@
+"""
+Configuración de producción de gesinfra_sistema.
+
+Parte de settings.py y toma de variables de entorno todo lo que cambia entre
+servidores. Uso:
+
+    DJANGO_SETTINGS_MODULE=gesinfra_sistema.settings_produccion
+
+Variables:
+    GESINFRA_SECRET_KEY      clave secreta (obligatoria)
+    GESINFRA_ALLOWED_HOSTS   dominios separados por comas
+    GESINFRA_DEBUG           '1' para activar DEBUG (no recomendado)
+    GESINFRA_DB_PATH         ruta del archivo SQLite
+    GESINFRA_CONN_MAX_AGE    segundos que se reutiliza una conexión (600)
+    GESINFRA_CACHE           'archivo' (por defecto aquí) o 'locmem'
+    GESINFRA_CACHE_DIR       directorio del cache en archivos
+    GESINFRA_LOG_LEVEL       nivel de los logs (INFO)
+    GESINFRA_METRICAS_TOKEN  token Bearer para leer /metrics (además del staff)
+    GESINFRA_SERVER_TIMING   '1' para enviar la cabecera Server-Timing al staff
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Con varios procesos el cache debe ser compartido; settings.py lee esta variable
+os.environ.setdefault('GESINFRA_CACHE', 'archivo')
+
+from .settings import *  # noqa: E402,F401,F403
+from .settings import BASE_DIR, DATABASES, TEMPLATES  # noqa: E402
+
+GESINFRA_PRODUCCION = True
+
+SECRET_KEY = os.environ.get('GESINFRA_SECRET_KEY', '')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Defina GESINFRA_SECRET_KEY para la configuración de producción')
+
+DEBUG = os.environ.get('GESINFRA_DEBUG', '') == '1'
+
+ALLOWED_HOSTS = [h.strip() for h in os.environ.get('GESINFRA_ALLOWED_HOSTS', '').split(',') if h.strip()]
+
+# Server-Timing expone la forma de las consultas de cada vista: apagada salvo que se pida
+GESINFRA_SERVER_TIMING = os.environ.get('GESINFRA_SERVER_TIMING', '') == '1'
+
+# BASE DE DATOS: conexiones persistentes, verificadas antes de reutilizarse
+DATABASES['default'].update({
+    'NAME': os.environ.get('GESINFRA_DB_PATH', str(BASE_DIR / 'db.sqlite3')),
+    'CONN_MAX_AGE': int(os.environ.get('GESINFRA_CONN_MAX_AGE', '600')),
+    'CONN_HEALTH_CHECKS': True,
+})
+DATABASES['reportes'].update({
+    'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+    'CONN_HEALTH_CHECKS': True,
+})
+
+# PLANTILLAS: compiladas una vez por proceso (cached.Loader)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{asctime} {levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('GESINFRA_LOG_LEVEL', 'INFO'),
+    },
+}
@@ -0,0 +1,349 @@
+# gesinfra_sistema/tests.py
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import canales, consultas_lentas, metricas, perfiles
+from .cache import cachear, incrementar_al_confirmar
+from .checks import revisar_rendimiento
+
+
+# ========== CACHE ==========
+
+class CacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calculos = 0
+
+    def leer(self):
+        def calcular():
+            self.calculos += 1
+            return self.calculos
+        return cachear('pruebas:cache', ['pruebas'], calcular)
+
+    def test_se_invalida_al_confirmar(self):
+        primero = self.leer()
+        with self.captureOnCommitCallbacks(execute=True):
+            incrementar_al_confirmar('pruebas')
+            # Hasta el commit se sigue sirviendo lo cacheado
+            self.assertEqual(self.leer(), primero)
+        self.assertEqual(self.leer(), primero + 1)
+        self.assertEqual(self.leer(), primero + 1)
+
+    def test_no_se_invalida_si_se_revierte(self):
+        primero = self.leer()
+        with self.captureOnCommitCallbacks(execute=True) as pendientes:
+            try:
+                with transaction.atomic():
+                    incrementar_al_confirmar('pruebas')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(pendientes, [])
+        self.assertEqual(self.leer(), primero)
+
+
+# ========== CHECKS ==========
+
+class ChecksRendimientoTests(SimpleTestCase):
+
+    def avisos(self):
+        return {aviso.id for aviso in revisar_rendimiento()}
+
+    def test_solo_en_produccion(self):
+        with self.settings(GESINFRA_PRODUCCION=False, DEBUG=True):
+            self.assertEqual(self.avisos(), set())
+
+    @override_settings(GESINFRA_PRODUCCION=True)
+    def test_avisos_de_produccion(self):
+        with self.settings(DEBUG=True):
+            self.assertIn('gesinfra.W001', self.avisos())
+        # La configuración de pruebas: loaders sin cache y LocMem
+        self.assertLessEqual({'gesinfra.W004', 'gesinfra.W005'}, self.avisos())
+        self.assertNotIn('gesinfra.W001', self.avisos())
+
+        plantillas = [{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'OPTIONS': {'loaders': [('django.template.loaders.cached.Loader', [
+                'django.template.loaders.app_directories.Loader',
+            ])]},
+        }]
+        archivo = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                               'LOCATION': tempfile.gettempdir()}}
+        with self.settings(TEMPLATES=plantillas, CACHES=archivo):
+            self.assertFalse({'gesinfra.W004', 'gesinfra.W005'} & self.avisos())
+
+
+# ========== SQLITE ==========
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'solo para SQLite')
+class SQLiteTests(SimpleTestCase):
+
+    def conectar(self):
+        # La base de pruebas está en memoria (sin WAL): una conexión nueva a un archivo con las mismas OPTIONS
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        conexion = DatabaseWrapper({**connections['default'].settings_dict,
+                                    'NAME': os.path.join(directorio.name, 'db.sqlite3')}, alias='pruebas')
+        self.addCleanup(conexion.close)
+        return conexion
+
+    def pragma(self, conexion, nombre):
+        with conexion.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nombre}')
+            return cursor.fetchone()[0]
+
+    def test_cada_conexion_aplica_los_pragmas(self):
+        conexion = self.conectar()
+        self.assertEqual(self.pragma(conexion, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(conexion, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(conexion, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(conexion, 'temp_store'), 2)   # MEMORY
+
+    def test_las_transacciones_empiezan_con_begin_immediate(self):
+        conexion = self.conectar()
+        sentencias = []
+
+        def anotar(ejecutar, sql, params, many, context):
+            sentencias.append(sql)
+            return ejecutar(sql, params, many, context)
+
+        # Lo que hace atomic() al abrir la transacción más externa
+        with conexion.execute_wrapper(anotar):
+            conexion.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        conexion.rollback()
+        conexion.set_autocommit(True)
+        self.assertIn('BEGIN IMMEDIATE', sentencias)
+
+
+# ========== CONSULTAS LENTAS ==========
+
+class ConsultasLentasTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(GESINFRA_LOG_DIR=directorio.name, GESINFRA_CONSULTA_LENTA_MS=50)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # El logger se configura una vez por proceso: que escriba en el directorio de la prueba
+        anteriores = consultas_lentas.logger.handlers[:]
+        consultas_lentas.logger.handlers = []
+
+        def restaurar():
+            for manejador in consultas_lentas.logger.handlers:
+                manejador.close()
+            consultas_lentas.logger.handlers = anteriores
+        self.addCleanup(restaurar)
+
+    def ejecutar(self, segundos, sql='SELECT nombre FROM asignatura WHERE id = %s', params=(7,)):
+        def execute(sql, params, many, context):
+            time.sleep(segundos)
+            return 'resultado'
+        return consultas_lentas.registrar_si_lenta(execute, sql, params, False, {'connection': connection})
+
+    def test_solo_se_registran_las_lentas(self):
+        self.assertEqual(self.ejecutar(0), 'resultado')
+        self.assertEqual(list(consultas_lentas.leer_registros()), [])
+
+        self.assertEqual(self.ejecutar(0.06), 'resultado')
+        [registro] = consultas_lentas.leer_registros()
+        self.assertEqual(registro['sql'], 'SELECT nombre FROM asignatura WHERE id = %s')
+        self.assertGreaterEqual(registro['ms'], 50)
+        # Los tipos de los parámetros, no sus valores
+        self.assertEqual(registro['parametros'], ['int'])
+        self.assertEqual(registro['base'], 'default')
+
+        self.ejecutar(0.06, params=(8,))
+        [grupo] = consultas_lentas.resumen_por_huella()
+        self.assertEqual(grupo['veces'], 2)
+
+    def test_envuelve_las_conexiones_de_django(self):
+        with self.settings(GESINFRA_CONSULTA_LENTA_MS=0):
+            User.objects.filter(username='nadie').exists()
+        self.assertIn('auth_user', next(consultas_lentas.leer_registros())['sql'])
+
+
+# ========== MÉTRICAS ==========
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        archivo = override_settings(GESINFRA_METRICAS_PATH=os.path.join(directorio.name, 'metricas.sqlite3'))
+        archivo.enable()
+        self.addCleanup(archivo.disable)
+
+    @override_settings(DEBUG=False, GESINFRA_METRICAS_TOKEN='secreto')
+    def test_fuera_de_debug_exige_token_o_staff(self):
+        # Sin token, aunque la petición venga de la propia máquina (p. ej. el proxy)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+
+        respuesta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'# TYPE gesinfra_http_solicitud_segundos histogram', respuesta.content)
+
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(DEBUG=False, GESINFRA_METRICAS_TOKEN='')
+    def test_sin_token_solo_el_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(User.objects.create_user('docente'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requiere fork')
+    def test_el_hijo_de_un_fork_no_hereda_pendientes(self):
+        metricas.sumar('gesinfra_cache_consultas_total', resultado='acierto')
+        pid = os.fork()
+        if pid == 0:
+            vacio = not metricas.registro.pendientes and metricas.registro.hilo is None
+            os._exit(0 if vacio else 1)
+        _, estado = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(estado), 0)
+
+
+# ========== PERFILES ==========
+
+@override_settings(GESINFRA_PERFILES=True)
+class PerfilesTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(GESINFRA_LOG_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.admin = User.objects.create_user('admin', is_staff=True)
+
+    def test_solo_con_la_marca_y_siendo_staff(self):
+        self.client.force_login(self.admin)
+        self.assertNotIn(perfiles.CABECERA_RESPUESTA, self.client.get('/admin/perfiles/'))
+        self.assertNotIn(perfiles.CABECERA_RESPUESTA, self.client.get('/admin/perfiles/?sin_perfil=1'))
+        # Las vistas async no se perfilan
+        self.assertNotIn(perfiles.CABECERA_RESPUESTA, self.client.get(reverse('accesibilidad:dashboard'), {'_perfil': 1}))
+        self.assertEqual(perfiles.listar(), [])
+
+        self.client.force_login(User.objects.create_user('docente'))
+        respuesta = self.client.get(reverse('calificaciones:sistema_calificaciones'), {'_perfil': 1})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn(perfiles.CABECERA_RESPUESTA, respuesta)
+        self.assertEqual(perfiles.listar(), [])
+
+    def test_perfila_sin_alterar_la_respuesta(self):
+        self.client.force_login(self.admin)
+        normal = self.client.get(reverse('calificaciones:sistema_calificaciones'))
+        perfilada = self.client.get(reverse('calificaciones:sistema_calificaciones'), HTTP_X_GESINFRA_PERFIL='1')
+        self.assertEqual(perfilada.status_code, 200)
+        self.assertEqual(perfilada.content, normal.content)
+        nombre = perfilada[perfiles.CABECERA_RESPUESTA]
+
+        # Un TemplateResponse se renderiza dentro del perfil
+        respuesta = self.client.get('/admin/perfiles/', {'_perfil': 1})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([perfil['nombre'] for perfil in respuesta.context['perfiles']], [nombre])
+
+        [ultimo, primero] = perfiles.listar()
+        self.assertEqual(primero['nombre'], nombre)
+        self.assertEqual((primero['url'], primero['estado'], primero['usuario']),
+                         ('calificaciones:sistema_calificaciones', 200, 'admin'))
+        self.assertIn('sistema_calificaciones', primero['resumen'])
+        for extension in perfiles.EXTENSIONES:
+            self.assertIsNotNone(perfiles.ruta_archivo(ultimo['nombre'], extension))
+
+    def test_desactivado_no_se_instala(self):
+        with self.settings(GESINFRA_PERFILES=False), self.assertRaises(MiddlewareNotUsed):
+            perfiles.PerfilesMiddleware(lambda request: None)
+
+
+# ========== TIEMPOS ==========
+
+@override_settings(DEBUG=False, GESINFRA_SERVER_TIMING=True, GESINFRA_METRICAS=False)
+class ServerTimingTests(TestCase):
+
+    def test_fuera_de_debug_solo_para_el_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get('/metrics'))
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertIn('db;dur=', self.client.get('/metrics')['Server-Timing'])
+
+    async def test_asgi(self):
+        self.assertNotIn('Server-Timing', await self.async_client.get('/metrics'))
+        usuario = await User.objects.acreate(username='admin', is_staff=True)
+        await self.async_client.aforce_login(usuario)
+        self.assertIn('vista;dur=', (await self.async_client.get('/metrics'))['Server-Timing'])
+
+
+# ========== CANALES ==========
+
+class CanalesTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        archivo = override_settings(
+            GESINFRA_CANALES=True, GESINFRA_CANALES_INTERVALO=0.01,
+            GESINFRA_CANALES_PATH=os.path.join(directorio.name, 'canales.sqlite3'),
+        )
+        archivo.enable()
+        self.addCleanup(archivo.disable)
+
+    def mensajes(self):
+        return canales._conexion().execute('SELECT grupo, fecha FROM mensaje ORDER BY id').fetchall()
+
+    async def esperar_anuncio(self, grupo):
+        for _ in range(200):
+            escucha = await asyncio.to_thread(
+                lambda: canales._conexion().execute('SELECT grupo FROM escucha').fetchall()
+            )
+            if (grupo,) in escucha:
+                return
+            await asyncio.sleep(0.01)
+        self.fail(f'{grupo} no se anunció')
+
+    def test_sin_websockets_no_se_escribe_nada(self):
+        canales.publicar([('calificaciones:1:1:8EGB:A:', {'tipo': 'fila'})])
+        self.assertEqual(self.mensajes(), [])
+
+    async def test_ida_y_vuelta_y_retencion(self):
+        cola = canales.suscripciones.agregar('calificaciones:1:1:8EGB:')
+        await self.esperar_anuncio('calificaciones:1:1:8EGB:')
+
+        # Un paralelo del grado escuchado llega; otro grado no se escribe
+        await asyncio.to_thread(canales.publicar, [
+            ('calificaciones:1:1:8EGB:A:', {'tipo': 'fila', 'estudiante_id': 1}),
+            ('calificaciones:1:1:9EGB:A:', {'tipo': 'fila', 'estudiante_id': 2}),
+        ])
+        datos = await asyncio.wait_for(cola.get(), timeout=5)
+        self.assertEqual(json.loads(datos), {'tipo': 'fila', 'estudiante_id': 1})
+        self.assertEqual([grupo for grupo, _ in await asyncio.to_thread(self.mensajes)],
+                         ['calificaciones:1:1:8EGB:A:'])
+
+        # Al renovar el anuncio se borran los mensajes más viejos que la retención
+        def envejecer():
+            with canales._conexion() as conexion:
+                conexion.execute('UPDATE mensaje SET fecha = ?', (time.time() - 61,))
+            canales._anunciar(['calificaciones:1:1:8EGB:'], time.time())
+        await asyncio.to_thread(envejecer)
+        self.assertEqual(await asyncio.to_thread(self.mensajes), [])
+
+        # El último websocket que se va retira el anuncio
+        canales.suscripciones.quitar('calificaciones:1:1:8EGB:', cola)
+        await asyncio.wait_for(canales.suscripciones.tarea, timeout=5)
+        await asyncio.to_thread(canales.publicar, [('calificaciones:1:1:8EGB:A:', {'tipo': 'fila'})])
+        self.assertEqual(await asyncio.to_thread(self.mensajes), [])
@@ -0,0 +1,197 @@
+# gesinfra_sistema/tiempos.py
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+from . import metricas
+
+logger = logging.getLogger('gesinfra_sistema.tiempos')
+
+# Medición de la petición en curso; None fuera de TiemposMiddleware
+_medicion = contextvars.ContextVar('gesinfra_medicion', default=None)
+
+
+class Medicion:
+    """Tiempos acumulados de una petición: consultas SQL y secciones medidas con medir()"""
+
+    __slots__ = ('peticion', 'consultas', 'segundos_db', 'secciones', 'candado')
+
+    def __init__(self, peticion=None):
+        self.peticion = peticion
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.secciones = {}
+        # Las vistas async suman desde varios hilos a la vez (gesinfra_sistema/concurrente.py)
+        self.candado = threading.Lock()
+
+    def sumar(self, nombre, segundos):
+        with self.candado:
+            self.secciones[nombre] = self.secciones.get(nombre, 0.0) + segundos
+
+    def __call__(self, execute, sql, params, many, context):
+        # Envoltorio de connection.execute_wrapper(): cuenta y cronometra cada consulta
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self.candado:
+                self.consultas += 1
+                self.segundos_db += duracion
+
+
+def medicion_actual():
+    return _medicion.get()
+
+
+@contextmanager
+def medir(nombre):
+    """Suma la duración del bloque a la sección nombre de la petición (p. ej. 'pdf')"""
+    medicion = _medicion.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.sumar(nombre, time.perf_counter() - inicio)
+
+
+# ========== PLANTILLAS ==========
+
+class PlantillaMedida:
+    """Plantilla del backend de Django cuyo render() se suma a la sección 'plantillas'"""
+
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    @property
+    def origin(self):
+        return self.plantilla.origin
+
+    @property
+    def template(self):
+        return self.plantilla.template
+
+    def render(self, context=None, request=None):
+        with medir('plantillas'):
+            return self.plantilla.render(context, request)
+
+
+class MedidasDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates que mide el tiempo de render de cada plantilla (incluye sus {% include %})"""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+# ========== MIDDLEWARE ==========
+
+def _nombre_url(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    return coincidencia.view_name if coincidencia is not None else None
+
+
+def _server_timing(medicion, total):
+    partes = [f'db;dur={medicion.segundos_db * 1000:.1f};desc="{medicion.consultas} consultas"']
+    partes += [f'{nombre};dur={segundos * 1000:.1f}' for nombre, segundos in medicion.secciones.items()]
+    partes.append(f'vista;dur={total * 1000:.1f}')
+    return ', '.join(partes)
+
+
+def _es_staff(request):
+    usuario = getattr(request, 'user', None)
+    return usuario is not None and usuario.is_staff
+
+
+async def _aes_staff(request):
+    auser = getattr(request, 'auser', None)
+    return auser is not None and (await auser()).is_staff
+
+
+def _envolver_conexiones(envoltorios, medicion):
+    # Las conexiones son propias de cada hilo: se envuelven las del hilo que llama
+    for conexion in connections.all():
+        envoltorios.enter_context(conexion.execute_wrapper(medicion))
+
+
+class TiemposMiddleware:
+    """Mide consultas, plantillas, PDFs y el total de cada petición.
+
+    Los resultados van en una línea JSON del logger gesinfra_sistema.tiempos
+    con el nombre de la URL y, con GESINFRA_SERVER_TIMING, en la cabecera
+    Server-Timing (visible en las herramientas de desarrollo del navegador);
+    fuera de DEBUG la cabecera solo se envía al staff.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cabecera = getattr(settings, 'GESINFRA_SERVER_TIMING', True)
+        self.metricas = getattr(settings, 'GESINFRA_METRICAS', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion(request)
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as envoltorios:
+                _envolver_conexiones(envoltorios, medicion)
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        total = time.perf_counter() - inicio
+        cabecera = self.cabecera and (settings.DEBUG or _es_staff(request))
+        return self.terminar(request, response, medicion, total, cabecera)
+
+    async def __acall__(self, request):
+        medicion = Medicion(request)
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        envoltorios = ExitStack()
+        try:
+            # Bajo ASGI el código síncrono de la petición (sync_to_async) corre
+            # siempre en el mismo hilo: se envuelven las conexiones de ese hilo
+            await sync_to_async(_envolver_conexiones)(envoltorios, medicion)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(envoltorios.close)()
+            _medicion.reset(token)
+        total = time.perf_counter() - inicio
+        cabecera = self.cabecera and (settings.DEBUG or await _aes_staff(request))
+        return self.terminar(request, response, medicion, total, cabecera)
+
+    def terminar(self, request, response, medicion, total, cabecera):
+        if cabecera:
+            response['Server-Timing'] = _server_timing(medicion, total)
+        if self.metricas:
+            metricas.observar_peticion(request, response, total, medicion)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'url': _nombre_url(request),
+                'metodo': request.method,
+                'estado': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'consultas': medicion.consultas,
+                'db_ms': round(medicion.segundos_db * 1000, 1),
+                **{f'{nombre}_ms': round(segundos * 1000, 1) for nombre, segundos in medicion.secciones.items()},
+            }))
+        return response
@@ -3,9 +3,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
 from usuarios.views import dashboard as usuarios_dashboard
+from gesinfra_sistema.admin import consultas_lentas, perfiles, perfil_archivo
+from gesinfra_sistema.metricas import vista_metricas
 
 urlpatterns = [
+    path('admin/consultas-lentas/', admin.site.admin_view(consultas_lentas), name='consultas_lentas'),
+    path('admin/perfiles/', admin.site.admin_view(perfiles), name='perfiles'),
+    path('admin/perfiles/<str:nombre>.<str:extension>', admin.site.admin_view(perfil_archivo), name='perfil_archivo'),
     path('admin/', admin.site.urls),
+    path('metrics', vista_metricas, name='metricas'),
     path('', lambda request: redirect('usuarios_dashboard')),  # Redirige al dashboard de usuarios
     path('usuarios/', include('usuarios.urls')),
     path('inventario/', include('inventario.urls')),
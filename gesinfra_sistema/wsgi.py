@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gesinfra_sistema.settings')
 
 application = get_wsgi_application()
+
+# Índices de autocompletado en memoria (calificaciones/autocompletar.py)
+from calificaciones.autocompletar import precargar_indices  # noqa: E402
+precargar_indices()
+
+# Avisos de configuraciones lentas (gesinfra_sistema/checks.py)
+from gesinfra_sistema.checks import advertir_al_iniciar  # noqa: E402
+advertir_al_iniciar()
@@ -1,6 +1,18 @@
 # inventario/apps.py
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def crear_indice_busqueda(sender, using='default', **kwargs):
+    """Asegura el índice FTS5 de equipos después de cada migrate"""
+    from .busqueda import INDICE_EQUIPOS
+    INDICE_EQUIPOS.asegurar(using)
+
 
 class InventarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventario'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(crear_indice_busqueda, sender=self)
@@ -0,0 +1,32 @@
+# inventario/busqueda.py
+from django.db.models import Q
+
+from gesinfra_sistema.fts import IndiceFTS
+
+INDICE_EQUIPOS = IndiceFTS(
+    tabla='inventario_equipo_fts',
+    tabla_contenido='inventario_equipo',
+    columna_id='id_equipo',
+    columnas=['codigo_inventario', 'marca', 'modelo', 'numero_serie'],
+)
+
+
+def normalizar_busqueda(texto):
+    """'  Dell   LATITUDE ' -> 'dell latitude': misma búsqueda, misma clave de cache"""
+    return ' '.join(texto.split()).lower()
+
+
+def filtrar_equipos(equipos, texto):
+    """Filtra un queryset de Equipo por texto usando el índice FTS5 cuando existe.
+
+    Sin índice, o con términos cortos, busca el texto en cualquier parte de
+    los campos con icontains.
+    """
+    if not INDICE_EQUIPOS.usar_para(texto, equipos.db):
+        return equipos.filter(
+            Q(codigo_inventario__icontains=texto) |
+            Q(marca__icontains=texto) |
+            Q(modelo__icontains=texto) |
+            Q(numero_serie__icontains=texto)
+        )
+    return INDICE_EQUIPOS.filtrar(equipos, texto)
@@ -0,0 +1,60 @@
+# inventario/estadisticas.py
+from django.db.models import Count, Q, Sum
+
+from gesinfra_sistema.cache import acachear, cachear
+from gesinfra_sistema.concurrente import en_paralelo
+
+from .models import Equipo, Mantenimiento
+
+
+def agregar_equipos():
+    """Totales, conteos por estado y por tipo y costo total en una sola consulta.
+
+    Cada conteo es un Count(filter=...) sobre el mismo recorrido de la tabla,
+    en lugar de un COUNT/SUM/GROUP BY por separado.
+    """
+    agregados = {
+        'total': Count('id_equipo'),
+        'costo_total': Sum('costo'),
+    }
+    for i, (estado, _) in enumerate(Equipo.ESTADO_CHOICES):
+        agregados[f'estado_{i}'] = Count('id_equipo', filter=Q(estado=estado))
+    for i, (tipo, _) in enumerate(Equipo.TIPO_CHOICES):
+        agregados[f'tipo_{i}'] = Count('id_equipo', filter=Q(tipo=tipo))
+
+    fila = Equipo.objects.aggregate(**agregados)
+
+    return {
+        'total': fila['total'],
+        'costo_total': fila['costo_total'] or 0,
+        'por_estado': {
+            estado: fila[f'estado_{i}'] for i, (estado, _) in enumerate(Equipo.ESTADO_CHOICES)
+        },
+        'por_tipo': {
+            tipo: fila[f'tipo_{i}'] for i, (tipo, _) in enumerate(Equipo.TIPO_CHOICES)
+        },
+    }
+
+
+def _consultas_dashboard():
+    # Independientes entre sí: resumen_dashboard las hace una tras otra, aresumen_dashboard a la vez
+    return {
+        'equipos': agregar_equipos,
+        'total_mantenimientos': Mantenimiento.objects.count,
+        'ultimos_mantenimientos': lambda: list(
+            Mantenimiento.objects.select_related('equipo').order_by('-fecha')[:5]
+        ),
+    }
+
+
+def resumen_dashboard():
+    """Datos del dashboard de inventario, cacheados hasta que cambie un equipo o mantenimiento"""
+    def calcular():
+        return {nombre: consulta() for nombre, consulta in _consultas_dashboard().items()}
+    return cachear('inventario:dashboard', ['equipos', 'mantenimientos'], calcular)
+
+
+async def aresumen_dashboard():
+    """resumen_dashboard() para la vista async: las consultas corren a la vez, cada una en su conexión"""
+    return await acachear('inventario:dashboard', ['equipos', 'mantenimientos'],
+                          lambda: en_paralelo(**_consultas_dashboard()))
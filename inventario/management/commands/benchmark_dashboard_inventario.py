@@ -0,0 +1,80 @@
+# inventario/management/commands/benchmark_dashboard_inventario.py
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+
+from gesinfra_sistema.benchmark import base_temporal, medir, tabla_resultados
+from gesinfra_sistema.cache import incrementar_version
+from inventario.estadisticas import agregar_equipos, resumen_dashboard
+from inventario.models import Equipo, Mantenimiento
+
+
+def consultas_anteriores():
+    """Las consultas que hacía dashboard_inventario antes de agregar_equipos()"""
+    total_equipos = Equipo.objects.count()
+    equipos_operativos = Equipo.objects.filter(estado='OPERATIVO').count()
+    equipos_mantenimiento = Equipo.objects.filter(estado='MANTENIMIENTO').count()
+    total_mantenimientos = Mantenimiento.objects.count()
+    costo_total = Equipo.objects.aggregate(total=Sum('costo'))['total'] or 0
+    ultimos = list(Mantenimiento.objects.select_related('equipo').order_by('-fecha')[:5])
+    por_tipo = list(Equipo.objects.values('tipo').annotate(total=Count('id_equipo')))
+    return total_equipos, equipos_operativos, equipos_mantenimiento, total_mantenimientos, costo_total, ultimos, por_tipo
+
+
+def consultas_actuales():
+    incrementar_version('equipos')
+    return resumen_dashboard()
+
+
+class Command(BaseCommand):
+    help = 'Mide el costo del dashboard de inventario sobre una base temporal con N equipos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipos', type=int, default=100000, help='Equipos sintéticos a crear')
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with base_temporal():
+            self.stdout.write(f"Creando {options['equipos']} equipos en la base temporal...")
+            self.crear_equipos(options['equipos'])
+
+            casos = {
+                'antes': consultas_anteriores,
+                'agregado único': agregar_equipos,
+                'resumen sin cache': consultas_actuales,
+                'resumen con cache': resumen_dashboard,
+            }
+            resultados = {}
+            for nombre, funcion in casos.items():
+                with CaptureQueriesContext(connection) as consultas:
+                    funcion()
+                resultados[f'{nombre} [{len(consultas)} SQL]'] = medir(funcion, options['repeticiones'])
+
+            incrementar_version('equipos')
+            self.stdout.write(tabla_resultados(resultados))
+
+    def crear_equipos(self, cantidad):
+        estados = [e for e, _ in Equipo.ESTADO_CHOICES]
+        tipos = [t for t, _ in Equipo.TIPO_CHOICES]
+        condiciones = [c for c, _ in Equipo.CONDICION_CHOICES]
+        Equipo.objects.bulk_create(
+            (
+                Equipo(
+                    codigo_inventario=f'BENCH-{i:07d}',
+                    tipo=random.choice(tipos),
+                    marca=random.choice(['Dell', 'HP', 'Lenovo', 'Epson', 'Cisco']),
+                    modelo=f'M-{random.randint(1, 500)}',
+                    numero_serie=f'SN{i:09d}',
+                    anio_adquisicion=random.randint(2010, 2025),
+                    costo=Decimal(random.randint(10000, 250000)) / 100,
+                    estado=random.choice(estados),
+                    condicion_fisica=random.choice(condiciones),
+                )
+                for i in range(cantidad)
+            ),
+            batch_size=5000,
+        )
@@ -0,0 +1,20 @@
+# inventario/management/commands/reconstruir_indice_equipos.py
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.busqueda import INDICE_EQUIPOS
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda FTS5 de equipos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not INDICE_EQUIPOS.soportado(using):
+            raise CommandError('El índice necesita SQLite compilado con FTS5')
+
+        if not INDICE_EQUIPOS.asegurar(using):
+            INDICE_EQUIPOS.reconstruir(using)
+        self.stdout.write(self.style.SUCCESS('✅ Índice de búsqueda de equipos reconstruido'))
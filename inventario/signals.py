@@ -0,0 +1,19 @@
+# inventario/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gesinfra_sistema.cache import incrementar_al_confirmar
+
+from .models import Equipo, Mantenimiento
+
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_delete, sender=Equipo)
+def equipo_modificado(sender, **kwargs):
+    incrementar_al_confirmar('equipos')
+
+
+@receiver(post_save, sender=Mantenimiento)
+@receiver(post_delete, sender=Mantenimiento)
+def mantenimiento_modificado(sender, **kwargs):
+    incrementar_al_confirmar('mantenimientos')
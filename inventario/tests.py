@@ -1,3 +1,184 @@
-from django.test import TestCase
+# inventario/tests.py
+import datetime
+import threading
+import unittest
+from decimal import Decimal
 
-# Create your tests here.
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .busqueda import INDICE_EQUIPOS, filtrar_equipos
+from .estadisticas import agregar_equipos, resumen_dashboard
+from .models import Equipo, Mantenimiento
+
+
+def crear_equipo(codigo, marca, modelo, numero_serie):
+    return Equipo.objects.create(
+        codigo_inventario=codigo, tipo='LAPTOP', marca=marca, modelo=modelo, numero_serie=numero_serie,
+        anio_adquisicion=2023, costo=Decimal('850.00'), estado='OPERATIVO', condicion_fisica='BUENO',
+    )
+
+
+def buscar(texto):
+    return sorted(filtrar_equipos(Equipo.objects.all(), texto).values_list('codigo_inventario', flat=True))
+
+
+class DatosEquipos(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.latitude = crear_equipo('LAB-001', 'Dell', 'Latitude 5420', 'SN-DELL-01')
+        cls.proyector = crear_equipo('AULA-010', 'Epson', 'Proyección PowerLite', 'SN-EPS-10')
+
+
+# ========== BÚSQUEDA ==========
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'FTS5 solo existe en SQLite')
+class BusquedaFTSTests(DatosEquipos):
+
+    def test_el_indice_sigue_a_las_escrituras(self):
+        self.assertTrue(INDICE_EQUIPOS.usar_para('latitude', 'default'))
+        self.assertEqual(buscar('latitude'), ['LAB-001'])
+
+        self.latitude.modelo = 'Vostro 3520'
+        self.latitude.save()
+        self.assertEqual(buscar('latitude'), [])
+        self.assertEqual(buscar('vostro'), ['LAB-001'])
+
+        self.latitude.delete()
+        self.assertEqual(buscar('vostro'), [])
+        self.assertEqual(buscar('dell'), [])
+
+        crear_equipo('LAB-002', 'Lenovo', 'ThinkPad E14', 'SN-LEN-02')
+        self.assertEqual(buscar('thinkpad'), ['LAB-002'])
+
+    def test_prefijos_y_tildes(self):
+        self.assertEqual(buscar('lati'), ['LAB-001'])
+        self.assertEqual(buscar('PROYECCION'), ['AULA-010'])
+        self.assertEqual(buscar('proyecc epson'), ['AULA-010'])
+        # Todas las palabras deben aparecer, y solo al inicio de una palabra
+        self.assertEqual(buscar('dell epson'), [])
+        self.assertEqual(buscar('itude'), [])
+
+
+class BusquedaSinIndiceTests(DatosEquipos):
+
+    def test_terminos_cortos_usan_icontains(self):
+        # Un término de menos de MINIMO_TERMINO caracteres no pasa por el índice
+        self.assertFalse(INDICE_EQUIPOS.usar_para('de', 'default'))
+        self.assertEqual(buscar('de'), ['LAB-001'])
+
+    def test_sin_tabla_fts_vuelve_a_icontains(self):
+        # En PostgreSQL el índice nunca está disponible; en SQLite se simula que falta la tabla
+        with mock.patch.object(INDICE_EQUIPOS, 'tabla', 'tabla_inexistente_fts'), \
+                mock.patch.object(INDICE_EQUIPOS, '_comprobadas', set()):
+            self.assertFalse(INDICE_EQUIPOS.disponible('default'))
+            # icontains encuentra el texto dentro de la palabra, pero no ignora las tildes
+            self.assertEqual(buscar('itude'), ['LAB-001'])
+            self.assertEqual(buscar('proyección'), ['AULA-010'])
+            self.assertEqual(buscar('proyeccion'), [])
+
+
+# ========== DASHBOARD ==========
+
+class EstadisticasTests(DatosEquipos):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_un_agregado_da_los_mismos_conteos(self):
+        self.proyector.tipo, self.proyector.estado = 'PROYECTOR', 'BAJA'
+        self.proyector.save()
+        with self.assertNumQueries(1):
+            equipos = agregar_equipos()
+        # Lo que antes se calculaba con un COUNT/SUM por cada valor
+        self.assertEqual(equipos['total'], Equipo.objects.count())
+        self.assertEqual(equipos['costo_total'], Equipo.objects.aggregate(total=Sum('costo'))['total'])
+        for estado, _ in Equipo.ESTADO_CHOICES:
+            self.assertEqual(equipos['por_estado'][estado], Equipo.objects.filter(estado=estado).count(), estado)
+        for tipo, _ in Equipo.TIPO_CHOICES:
+            self.assertEqual(equipos['por_tipo'][tipo], Equipo.objects.filter(tipo=tipo).count(), tipo)
+        self.assertEqual((equipos['por_tipo']['PROYECTOR'], equipos['por_estado']['BAJA']), (1, 1))
+
+    def test_sin_equipos(self):
+        Equipo.objects.all().delete()
+        equipos = agregar_equipos()
+        self.assertEqual((equipos['total'], equipos['costo_total']), (0, 0))
+        self.assertEqual(set(equipos['por_estado'].values()), {0})
+
+    def test_el_resumen_se_cachea_hasta_que_cambia_un_equipo(self):
+        self.assertEqual(resumen_dashboard()['equipos']['total'], 2)
+        with self.assertNumQueries(0):
+            resumen_dashboard()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_equipo('LAB-002', 'Lenovo', 'ThinkPad E14', 'SN-LEN-02')
+        self.assertEqual(resumen_dashboard()['equipos']['total'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Mantenimiento.objects.create(
+                equipo=self.latitude, fecha=datetime.date(2025, 3, 1), tipo='CORRECTIVO',
+                descripcion='Pantalla', actividades_realizadas='Cambio de pantalla', estado_posterior='OPERATIVO',
+            )
+        self.assertEqual(resumen_dashboard()['total_mantenimientos'], 1)
+
+
+class DashboardAsyncTests(TransactionTestCase):
+    # TransactionTestCase: las consultas de en_paralelo usan otras conexiones y solo ven lo confirmado
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('docente')
+        laptop = crear_equipo('LAB-001', 'Dell', 'Latitude 5420', 'SN-DELL-01')
+        proyector = crear_equipo('AULA-010', 'Epson', 'PowerLite', 'SN-EPS-10')
+        proyector.estado = 'MANTENIMIENTO'
+        proyector.save()
+        for dia, equipo in ((1, laptop), (2, proyector)):
+            Mantenimiento.objects.create(
+                equipo=equipo, usuario=self.usuario, fecha=datetime.date(2025, 3, dia), tipo='PREVENTIVO',
+                descripcion='Limpieza', actividades_realizadas='Limpieza interna', estado_posterior='OPERATIVO',
+            )
+
+    async def dashboard(self):
+        await self.async_client.aforce_login(self.usuario)
+        respuesta = await self.async_client.get(reverse('inventario:dashboard'))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.context
+
+    async def test_mismos_datos_que_la_version_sincrona(self):
+        contexto = await self.dashboard()
+        await cache.aclear()
+        resumen = await sync_to_async(resumen_dashboard)()
+
+        self.assertEqual((contexto['total_equipos'], contexto['equipos_operativos'], contexto['equipos_mantenimiento']),
+                         (2, 1, 1))
+        self.assertEqual(contexto['total_equipos'], resumen['equipos']['total'])
+        self.assertEqual(contexto['equipos_por_estado'], resumen['equipos']['por_estado'])
+        self.assertEqual(contexto['costo_total'], resumen['equipos']['costo_total'])
+        self.assertEqual(contexto['total_mantenimientos'], resumen['total_mantenimientos'])
+        self.assertEqual(contexto['ultimos_mantenimientos'], resumen['ultimos_mantenimientos'])
+        self.assertEqual(contexto['equipos_por_tipo'], [{'tipo': 'LAPTOP', 'total': 2}])
+
+    @unittest.skipIf(connection.vendor == 'sqlite', 'SQLite no cierra la base de pruebas en memoria')
+    async def test_no_deja_conexiones_abiertas(self):
+        # El hilo de la prueba atiende las partes síncronas de la petición; las demás son del pool
+        hilo_de_la_prueba = threading.get_ident()
+        abiertas = []
+
+        def anotar(sender, connection, **kwargs):
+            if threading.get_ident() != hilo_de_la_prueba:
+                abiertas.append(connection)
+        connection_created.connect(anotar)
+        self.addCleanup(connection_created.disconnect, anotar)
+
+        await self.dashboard()
+        self.assertGreaterEqual(len(abiertas), 3)
+        self.assertEqual([conexion for conexion in abiertas if conexion.connection is not None], [])
@@ -1,38 +1,40 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count, Sum
+from django.template.response import TemplateResponse
 from .models import Equipo, Ubicacion, Mantenimiento
 from .forms import EquipoForm, UbicacionForm, MantenimientoForm
+from .busqueda import filtrar_equipos, normalizar_busqueda
+from .estadisticas import aresumen_dashboard
+from gesinfra_sistema.cache import cachear
+from gesinfra_sistema.reportes import vista_de_reportes
 
 @login_required
-def dashboard_inventario(request):
-    # Estadísticas
-    total_equipos = Equipo.objects.count()
-    equipos_operativos = Equipo.objects.filter(estado='OPERATIVO').count()
-    equipos_mantenimiento = Equipo.objects.filter(estado='MANTENIMIENTO').count()
-    total_mantenimientos = Mantenimiento.objects.count()
-    
-    # Costo total del inventario
-    costo_total = Equipo.objects.aggregate(total=Sum('costo'))['total'] or 0
-    
-    # Últimos mantenimientos
-    ultimos_mantenimientos = Mantenimiento.objects.select_related('equipo').order_by('-fecha')[:5]
-    
-    # Equipos por tipo
-    equipos_por_tipo = Equipo.objects.values('tipo').annotate(total=Count('id_equipo'))
+@vista_de_reportes
+async def dashboard_inventario(request):
+    # Estadísticas: agregado de equipos, conteo y últimos mantenimientos a la vez, cacheados (ver estadisticas.py)
+    resumen = await aresumen_dashboard()
+    equipos = resumen['equipos']
+    
+    # Equipos por tipo (solo los tipos con equipos registrados)
+    equipos_por_tipo = [
+        {'tipo': tipo, 'total': total}
+        for tipo, total in equipos['por_tipo'].items() if total
+    ]
     
     context = {
-        'total_equipos': total_equipos,
-        'equipos_operativos': equipos_operativos,
-        'equipos_mantenimiento': equipos_mantenimiento,
-        'total_mantenimientos': total_mantenimientos,
-        'costo_total': costo_total,
-        'ultimos_mantenimientos': ultimos_mantenimientos,
+        'total_equipos': equipos['total'],
+        'equipos_operativos': equipos['por_estado']['OPERATIVO'],
+        'equipos_mantenimiento': equipos['por_estado']['MANTENIMIENTO'],
+        'equipos_por_estado': equipos['por_estado'],
+        'total_mantenimientos': resumen['total_mantenimientos'],
+        'costo_total': equipos['costo_total'],
+        'ultimos_mantenimientos': resumen['ultimos_mantenimientos'],
         'equipos_por_tipo': equipos_por_tipo,
     }
     
-    return render(request, 'inventario/dashboard.html', context)
+    # TemplateResponse: el handler la renderiza en un hilo, donde el usuario y la sesión pueden consultar la base
+    return TemplateResponse(request, 'inventario/dashboard.html', context)
 
 @login_required
 def lista_equipos(request):
@@ -42,20 +44,24 @@ def lista_equipos(request):
     
     equipos = Equipo.objects.all()
     
-    if query:
-        equipos = equipos.filter(
-            Q(codigo_inventario__icontains=query) |
-            Q(marca__icontains=query) |
-            Q(modelo__icontains=query) |
-            Q(numero_serie__icontains=query)
-        )
-    
     if tipo:
         equipos = equipos.filter(tipo=tipo)
     
     if estado:
         equipos = equipos.filter(estado=estado)
     
+    if query:
+        # Índice FTS5 con prefijos y orden por relevancia (ver busqueda.py). Se
+        # cachean solo los ids encontrados, con la búsqueda normalizada como clave
+        busqueda = normalizar_busqueda(query)
+        ids = cachear(
+            'inventario:busqueda', ['equipos'],
+            lambda: list(filtrar_equipos(equipos, busqueda).values_list('id_equipo', flat=True)),
+            busqueda, tipo, estado,
+        )
+        encontrados = Equipo.objects.in_bulk(ids)
+        equipos = [encontrados[pk] for pk in ids if pk in encontrados]
+    
     context = {
         'equipos': equipos,
         'query': query,
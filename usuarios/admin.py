@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import Contador
 
-# Register your models here.
+@admin.register(Contador)
+class ContadorAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'valor', 'fecha_actualizacion')
+    readonly_fields = ('fecha_actualizacion',)
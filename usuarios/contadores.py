@@ -0,0 +1,70 @@
+# usuarios/contadores.py
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from gesinfra_sistema.cache import incrementar_version
+
+from .models import Contador
+
+# Contador -> modelo contado
+MODELOS_CONTADOS = {
+    'estudiantes': 'calificaciones.Estudiante',
+    'calificaciones': 'calificaciones.Calificacion',
+    'docentes': 'calificaciones.Docente',
+}
+
+
+def sumar(nombre, delta, using='default'):
+    """Suma delta al contador con un UPDATE atómico (valor = valor + delta).
+
+    Dentro de transaction.atomic el contador se confirma o se revierte junto
+    con el INSERT/DELETE que lo dispara.
+    """
+    actualizados = Contador.objects.using(using).filter(nombre=nombre).update(
+        valor=F('valor') + delta, fecha_actualizacion=timezone.now()
+    )
+    if not actualizados:
+        # Primera vez: se parte del conteo real en lugar de cero
+        reconciliar(nombre, using=using)
+
+
+def reconciliar(nombre, using='default'):
+    """Recalcula un contador con COUNT(*) y devuelve (anterior, actual)"""
+    modelo = apps.get_model(MODELOS_CONTADOS[nombre])
+    with transaction.atomic(using=using):
+        contador, _ = Contador.objects.using(using).select_for_update().get_or_create(nombre=nombre)
+        anterior = contador.valor
+        contador.valor = modelo.objects.using(using).count()
+        contador.save(using=using, update_fields=['valor', 'fecha_actualizacion'])
+    incrementar_version(nombre)
+    return anterior, contador.valor
+
+
+def _al_guardar(nombre):
+    def receptor(sender, instance, created, raw=False, using='default', **kwargs):
+        if created and not raw:
+            sumar(nombre, 1, using=using)
+    return receptor
+
+
+def _al_eliminar(nombre):
+    def receptor(sender, instance, using='default', **kwargs):
+        sumar(nombre, -1, using=using)
+    return receptor
+
+
+def conectar_senales():
+    """Conecta post_save/post_delete de cada modelo contado (llamado desde apps.py).
+
+    bulk_create y update no envían señales; para esas cargas se usa el
+    comando reconciliar_contadores.
+    """
+    for nombre, etiqueta in MODELOS_CONTADOS.items():
+        modelo = apps.get_model(etiqueta)
+        post_save.connect(_al_guardar(nombre), sender=modelo, weak=False,
+                          dispatch_uid=f'contador_{nombre}_save')
+        post_delete.connect(_al_eliminar(nombre), sender=modelo, weak=False,
+                            dispatch_uid=f'contador_{nombre}_delete')
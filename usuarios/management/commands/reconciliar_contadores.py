@@ -0,0 +1,22 @@
+# usuarios/management/commands/reconciliar_contadores.py
+from django.core.management.base import BaseCommand
+
+from usuarios.contadores import MODELOS_CONTADOS, reconciliar
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores del dashboard con COUNT(*) y corrige las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+
+    def handle(self, *args, **options):
+        for nombre in MODELOS_CONTADOS:
+            anterior, actual = reconciliar(nombre, using=options['database'])
+            if anterior != actual:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠ {nombre}: {anterior} -> {actual} (diferencia {actual - anterior:+d})'
+                ))
+            else:
+                self.stdout.write(f'{nombre}: {actual}')
+        self.stdout.write(self.style.SUCCESS('✅ Contadores reconciliados'))
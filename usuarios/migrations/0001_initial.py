@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+def cargar_contadores(apps, schema_editor):
+    Contador = apps.get_model('usuarios', 'Contador')
+    modelos = {
+        'estudiantes': apps.get_model('calificaciones', 'Estudiante'),
+        'calificaciones': apps.get_model('calificaciones', 'Calificacion'),
+        'docentes': apps.get_model('calificaciones', 'Docente'),
+    }
+    db = schema_editor.connection.alias
+    for nombre, modelo in modelos.items():
+        Contador.objects.using(db).update_or_create(
+            nombre=nombre, defaults={'valor': modelo.objects.using(db).count()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('calificaciones', '0005_estudiante_promedio_general_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contador',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Nombre')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Valor')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Contador',
+                'verbose_name_plural': 'Contadores',
+            },
+        ),
+        migrations.RunPython(cargar_contadores, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,24 @@
 from django.db import models
 
-# Create your models here.
+class Contador(models.Model):
+    """Conteo de filas de un modelo, mantenido por señales (usuarios/contadores.py)"""
+    nombre = models.CharField(max_length=50, primary_key=True, verbose_name="Nombre")
+    valor = models.BigIntegerField(default=0, verbose_name="Valor")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Contador"
+        verbose_name_plural = "Contadores"
+    
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+    
+    @classmethod
+    def obtener(cls, *nombres):
+        """Lee varios contadores por clave primaria en una sola consulta.
+
+        Siempre de la base principal: la instantánea de reportes puede ir atrasada
+        y leer unas filas por clave primaria no cuesta nada.
+        """
+        valores = dict(cls.objects.using('default').filter(nombre__in=nombres).values_list('nombre', 'valor'))
+        return {nombre: valores.get(nombre, 0) for nombre in nombres}
@@ -3,6 +3,10 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.template.response import TemplateResponse
+from asgiref.sync import sync_to_async
+from gesinfra_sistema.cache import acachear
+from .models import Contador
 
 # ========== AUTHENTICATION ==========
 def login_view(request):
@@ -33,22 +37,18 @@ def logout_view(request):
 
 # ========== DASHBOARD ==========
 @login_required
-def dashboard(request):
-    # Importar dinámicamente para evitar circular imports
-    try:
-        from calificaciones.models import Estudiante, Calificacion, Docente
-        estudiantes_count = Estudiante.objects.count()
-        calificaciones_count = Calificacion.objects.count()
-        docentes_count = Docente.objects.count()
-    except:
-        estudiantes_count = 0
-        calificaciones_count = 0
-        docentes_count = 0
+async def dashboard(request):
+    # Contadores mantenidos por señales (usuarios/contadores.py): una lectura por clave primaria
+    # de la base principal, así que ni la instantánea de reportes ni consultas en paralelo aportan
+    contadores = await acachear(
+        'usuarios:dashboard', ['estudiantes', 'calificaciones', 'docentes'],
+        sync_to_async(lambda: Contador.obtener('estudiantes', 'calificaciones', 'docentes')),
+    )
     
     context = {
-        'estudiantes_count': estudiantes_count,
-        'calificaciones_count': calificaciones_count,
-        'docentes_count': docentes_count,
-        'user': request.user,
+        'estudiantes_count': contadores['estudiantes'],
+        'calificaciones_count': contadores['calificaciones'],
+        'docentes_count': contadores['docentes'],
+        'user': await request.auser(),
     }
-    return render(request, 'usuarios/dashboard.html', context)
\ No newline at end of file
+    return TemplateResponse(request, 'usuarios/dashboard.html', context)
\ No newline at end of file